@@ -23,14 +23,18 @@ SOFTWARE.
 """
 
 import errno
-import json
 import time
 
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
 import ili9342c
 import network
 import uos
 from esp32 import raw_temperature, hall_sensor
-from machine import SoftI2C, Pin, SPI, soft_reset, reset
+from machine import SoftI2C, SoftSPI, Pin, SPI, soft_reset, reset
 
 import axp202c
 import vga1_16x16 as font16
@@ -38,15 +42,19 @@ import vga1_8x8 as font8
 from focaltouch import FocalTouch
 from mpu6886 import MPU6886
 from sdcard import SDCard
+from imu_buffer import ImuBuffer, ImuLogger, CsvFormat, CapFormat, SampleClock
+from imu_stats import WindowStats
+from sd_bus import SpiArbiter, SharedSD, SectorCache, WriteBehind
 
 
 class M5Init:
 
     def __init__(self, **kwargs):
-        """ auto start power up and tft services """
+        """ register M5Stack Core2 devices, each is created on first use -- greet() brings up the pmu and tft """
 
         self._m5parms = {'autoboot': None, 'essid': None, 'pwd': None, 'mdir': '/sd', 'imu_wait': 0, 'imu_size': 0,
-                       'json_file': '/imu.json', 'csv_file': '/imu.csv'}
+                       'imu_rate': 0, 'imu_pack': False, 'sd_cache': 16, 'sd_wb': 32,
+                       'sd_hw': True, 'sd_baud': 20000000, 'json_file': '/imu.json', 'csv_file': '/imu.csv'}
         [print("* IGNORING ERROR invalid parm '{}'..".format(k)) for k in kwargs.keys() if
          k not in self.m5parms.keys()]
         
@@ -61,13 +69,29 @@ class M5Init:
         self.YELLOW = ili9342c.YELLOW
         self.WHITE = ili9342c.WHITE
 
+        t = time.ticks_ms()
+        self.boot_ms = {}
+        self._dev = {}
+        self._make = {'axp': self.power_up, 'spi2': lambda: SPI(2, baudrate=self.spi2_baud, sck=Pin(18),
+                                                                  mosi=Pin(23), miso=Pin(38)),
+                      'sensor': lambda: MPU6886(self.i2c), 'tft': self.enable_tft, 'sd': self._mount,
+                      'wifi': self._wlan, 'bus': lambda: SpiArbiter('tft', self.spi2, None, self.spi2_baud)}
+        self._free = {'spi2': lambda d: d.deinit(), 'sd': self._umount, 'wifi': lambda d: d.active(False),
+                      'sensor': lambda d: (d.fifo_stop(), d.int_disable())}
+        # devices holding another, released before it so none is left on a deinit bus
+        self._users = {'spi2': ('bus', 'tft'), 'bus': ('sd',)}
+
         self.i2c = SoftI2C(scl=Pin(22), sda=Pin(21))
-        self.axp = self.power_up()
-        self.spi2 = SPI(2, sck=Pin(18), mosi=Pin(23), miso=Pin(38))
-        self.sensor = MPU6886(self.i2c)
-        self.tft = self.enable_tft()
+        self.fifo_ms = 20  # FIFO drain period, the 1KB FIFO holds 73 samples -- 73ms @ 1kHz
+        self.imu_clock = None
+        self.imu_int_pin = None  # GPIO wired to MPU6886 INT, if any -- otherwise INT_STATUS is polled every imu_int_ms
+        self.imu_int_ms = 10
+        self.sd_bdev = None
+        self.sd_held = None
+        self.spi2_baud = 500000
 
         self.greet()
+        self.boot_ms['init'] = time.ticks_diff(time.ticks_ms(), t)
         print("* M5Stack Core2 initialization complete")
 
     @property
@@ -78,6 +102,55 @@ class M5Init:
     def m5parms(self, value):
         self._m5parms = value
 
+    def device(self, name):
+        """ returns device name, creating it on first use and recording the time taken in boot_ms """
+
+        d = self._dev.get(name)
+        if d is None:
+            t = time.ticks_ms()
+            d = self._make[name]()
+            if d is not None:
+                self._dev[name] = d
+                self.boot_ms[name] = time.ticks_diff(time.ticks_ms(), t)
+        return d
+
+    def release(self, name):
+        """ release device name if it was created, and the devices using it first, the next use creates them
+        again """
+
+        if name in self._dev:
+            [self.release(u) for u in self._users.get(name, ())]
+        d = self._dev.pop(name, None)
+        if d is not None and name in self._free:
+            self._free[name](d)
+        return d is not None
+
+    def boot_report(self):
+        """ print and return ms spent creating each device so far """
+
+        [print("* boot {:<8} {:>5} ms".format(k, v)) for k, v in self.boot_ms.items()]
+        return self.boot_ms
+
+    @property
+    def axp(self):
+        return self.device('axp')
+
+    @property
+    def spi2(self):
+        return self.device('spi2')
+
+    @property
+    def sensor(self):
+        return self.device('sensor')
+
+    @property
+    def tft(self):
+        return self.device('tft')
+
+    @property
+    def wlan(self):
+        return self.device('wifi')
+
     def power_up(self):
         """ turn on M5Stack Core2 """
 
@@ -107,6 +180,7 @@ class M5Init:
     def enable_tft(self):
         """ initialize tft function for display """
 
+        self.device('axp')
         tft = ili9342c.ILI9342C(
             self.spi2,
             320, 240,
@@ -119,24 +193,66 @@ class M5Init:
         return tft
 
     def mount_sd(self):
-        """ mount the sdcard """
+        """ mount the sdcard on first use, returns its vfs or None -- it stays mounted and initialized, sharing
+        SPI2 with the display through the bus arbiter """
+
+        return self.device('sd')
+
+    def _mount(self):
+        """ create and mount the sdcard, returns its vfs or None """
+
+        bus = self.device('bus')
         try:
-            sdc = SDCard()
-            vfs = uos.VfsFat(sdc)
+            if self.m5parms['sd_hw']:
+                spi = self.spi2
+            else:
+                spi = SoftSPI(sck=Pin(18), mosi=Pin(23), miso=Pin(38))
+            cs = Pin(4)
+            bus.add('sd', spi, cs, 100000)
+            bus.acquire('sd')
+            try:
+                sdc = SDCard(spi, cs, max_baudrate=self.m5parms['sd_baud'])
+            finally:
+                bus.release()
+            bdev = SharedSD(sdc, bus)
+            if self.m5parms['sd_wb']:
+                bdev = WriteBehind(bdev, self.m5parms['sd_wb'])
+                self.sd_held = bdev
+            if self.m5parms['sd_cache']:
+                bdev = SectorCache(bdev, self.m5parms['sd_cache'])
+            self.sd_bdev = bdev
+            vfs = uos.VfsFat(bdev)
             uos.mount(vfs, self.m5parms['mdir'])
             print("* Flash Memory root level listing -> {}\nSDCard root files {} -> {}".format(
                 uos.listdir(), self.m5parms['mdir'], uos.listdir(self.m5parms['mdir'])))
+            return vfs
         except OSError as e:
             if e.errno == errno.EPERM:
                 print("{} already mounted".format(self.m5parms['mdir']))
+                return True
+            # no card, a card that fails init or its clock negotiation -- say which before returning None
+            print("* sdcard mount failed -> {}".format(e))
         except Exception as e:
             print("ERROR: {}".format(e))
 
+    def _umount(self, vfs):
+        """ write back held sectors and unmount the sdcard """
+
+        try:
+            if self.sd_bdev:
+                self.sd_bdev.ioctl(3, 0)
+                self.sd_bdev = None
+                self.sd_held = None
+            uos.umount(self.m5parms['mdir'])
+            print("* unmounted {}".format(self.m5parms['mdir']))
+        except OSError as e:
+            print("ERROR: {}".format(e))
+        self.device('bus').remove('sd')
+
     def release_spi2(self):
-        """ release spi channel for sharing """
+        """ hand spi2 back to the display """
 
-        self.spi2.deinit()
-        self.spi2.init()
+        self.device('bus').release()
         print("* released spi2")
 
     def greet(self):
@@ -155,21 +271,45 @@ class M5Init:
         return flag
 
     @staticmethod
-    def is_wifi_connected():
-        """ returns True or False of wifi connection status """
+    def _wlan():
+        """ create and activate the station interface """
 
         wlan = network.WLAN(network.STA_IF)
         wlan.active(True)
+        return wlan
+
+    def is_wifi_connected(self):
+        """ returns True or False of wifi connection status """
+
+        wlan = self.wlan
         print("* wifi connection active -> {}".format(wlan.isconnected()))
         return wlan.isconnected()
 
+    @staticmethod
+    def _sync(coro, name):
+        """ run coroutine coro to completion for a blocking api call -- inside the scheduler that would need a nested
+        event loop, so the coroutine is closed and RuntimeError tells the task to await name instead """
+
+        try:
+            running = asyncio.current_task() is not None
+        except RuntimeError:
+            running = False
+        if running:
+            coro.close()
+            raise RuntimeError("called from a running task, await {}() instead".format(name))
+        return asyncio.run(coro)
+
     def connect_wifi(self):
         """ connect wifi if disconnected """
 
-        wlan = network.WLAN(network.STA_IF)
+        return self._sync(self.aconnect_wifi(), 'aconnect_wifi')
+
+    async def aconnect_wifi(self):
+        """ connect wifi if disconnected, yielding to other coroutines while waiting for the connection """
+
+        wlan = self.wlan
         t1 = time.time()
         run = True
-        wlan.active(True)
         i = 15
         if not wlan.isconnected():
             print("* connecting to wireless '{}' with {} sec timeout ...".format(self.m5parms['essid'], i))
@@ -182,6 +322,7 @@ class M5Init:
             while not wlan.isconnected() and run:
                 if (time.time() - t1) > i:
                     run = False
+                await asyncio.sleep(0.1)
         else:
             print("* wifi connection active -> {}".format(wlan.ifconfig()[0]))
             return wlan.ifconfig()[0]
@@ -192,17 +333,18 @@ class M5Init:
             print("* unable to connect to SSID-> '{}'".format(self.m5parms['essid']))
         return wlan.ifconfig()[0]
 
-    @staticmethod
-    def disconnect_wifi():
+    def disconnect_wifi(self):
         """ disconnect wifi if connected """
 
-        wlan = network.WLAN(network.STA_IF)
-        wlan.active(False)
+        wlan = self._dev.get('wifi')
+        if wlan is None:
+            print("* wifi not active")
+            return '0.0.0.0'
+        self.release('wifi')
         print("* wifi disconnected -> {}".format(wlan.ifconfig()[0]))
         return wlan.ifconfig()[0]
 
-    @staticmethod
-    def scan_wifi():
+    def scan_wifi(self):
         """ scan wlan to extract ssid and RSSI """
         """
         wifi list will have 2 of 6 tuples -- 'ssid, bssid, ch, RSSI, auth and hidden'
@@ -217,8 +359,7 @@ class M5Init:
         bar3 = -78
         bar2 = 80
 
-        wlan = network.WLAN(network.STA_IF)
-        wlan.active(True)
+        wlan = self.wlan
         print("* scanning wifi ..")
         vals = wlan.scan()
 
@@ -240,18 +381,77 @@ class M5Init:
         return lines
 
     def read_imu(self):
-        """  returns a list of samples as a dict of ts, accl, gyro & temp and corresponding uom """
+        """  returns an ImuBuffer of imu_size samples of ts, accl, gyro & temp, uom is in its meta """
 
-        imu = []
+        return self._sync(self.aread_imu(), 'aread_imu')
 
-        for i in range(self.m5parms['imu_size']):
-            imu.append({'ts': {'val': int(str(time.time_ns())[:-6]), 'uom': 'ms'},
-                        'accl': {'val': self.sensor.accel, 'uom': 'mG'},
-                        'gyro': {'val': self.sensor.gyro, 'uom': 'deg/s'},
-                        'temp': {'val': self.sensor.temperature, 'uom': 'F'}})
-            time.sleep_ms(self.m5parms['imu_wait'])
+    async def aread_imu(self):
+        """  coroutine of read_imu that yields to other coroutines between samples """
+
+        imu = ImuBuffer(self.m5parms['imu_size'])
+        await self.imu_stream(imu.append)
         return imu
 
+    async def imu_event(self, mask=0xFF, timeout_ms=None):
+        """  await an MPU6886 interrupt in mask after sensor.int_enable(), returns its INT_STATUS flags or 0 on
+        timeout -- with imu_int_pin the irq sets the flags and waiting costs no I2C traffic """
+
+        t0 = time.ticks_ms()
+        while True:
+            f = self.sensor.int_poll(mask)
+            if f:
+                return f
+            if timeout_ms is not None and time.ticks_diff(time.ticks_ms(), t0) >= timeout_ms:
+                return 0
+            await asyncio.sleep(self.imu_int_ms / 1000)
+
+    async def aimu_on_motion(self, wom_mg=100, timeout_ms=None):
+        """  arm wake on motion at wom_mg and capture imu_size samples with aimu_cap once it fires, returns
+        filename and stat or None on timeout """
+
+        self.sensor.int_enable(wom_mg=wom_mg, pin=self.imu_int_pin)
+        try:
+            f = await self.imu_event(MPU6886.INT_WOM, timeout_ms)
+        finally:
+            self.sensor.int_disable()
+        if not f:
+            return None
+        print("* imu motion {:#04x} -> capturing".format(f))
+        return await self.aimu_cap()
+
+    async def imu_stream(self, fn, size=None, rate=None):
+        """  call fn(ts, accl, gyro, temp) for size (imu_size) samples -- polled on imu_wait ms deadlines kept by
+        imu_clock, or when rate (imu_rate) is set, streamed by the MPU6886 FIFO at rate Hz and drained every fifo_ms """
+
+        size = self.m5parms['imu_size'] if size is None else size
+        rate = self.m5parms['imu_rate'] if rate is None else rate
+        if not rate:
+            self.imu_clock = SampleClock(self.m5parms['imu_wait'])
+            for i in range(size):
+                await self.imu_clock.tick()
+                accl, gyro, temp = self.sensor.read_all()
+                fn(int(str(time.time_ns())[:-6]), accl, gyro, temp)
+            print("* imu sampling {}".format(self.imu_clock.stats()))
+            return
+
+        n = 0
+        self.sensor.fifo_start(rate)
+        try:
+            while n < size:
+                await asyncio.sleep(self.fifo_ms / 1000)
+                ms = int(str(time.time_ns())[:-6])
+                us = time.ticks_us()
+                for ts, raw in self.sensor.fifo_read():
+                    accl, gyro, temp = self.sensor.scale(raw)
+                    fn(ms + time.ticks_diff(ts, us) // 1000, accl, gyro, temp)
+                    n += 1
+                    if n == size:
+                        break
+        finally:
+            if self.sensor.fifo_overflows:
+                print("* imu FIFO overflowed {} times, samples lost".format(self.sensor.fifo_overflows))
+            self.sensor.fifo_stop()
+
     @staticmethod
     def read_hall_sensor():
         """  returns a dict  of timestamp, 3d-readings and their uom """
@@ -382,8 +582,18 @@ class Bos(M5Init):
             'btn_8': {'loc': self.loc_8, 'lbl': 'Btn8', 'border': self.MAGENTA, 'fg': self.YELLOW, 'bg': self.BLACK,
                       'fill': True, 'font': font16}}
         self.touch = None
+        self.touch_ms = 10
+
+        # retained display list -- uid -> (loc, lbl, border, fg, bg, fill, font) as last painted on the tft
+        self.dlist = {}
+        self.painted_px = 0
 
-        self.ctx = dict(btn=True, tbtn=True, pallet=-1, pen=0)
+        self.ctx = dict(btn=True, tbtn=True, pallet=-1, pen=0, app=None, task=None, clk='dt')
+
+        # gestured btn uid -> bound handler, and installed app uid -> its task btns and handlers
+        self.handlers = {'btn_a': self.btn_a, 'btn_b': self.btn_b, 'btn_c': self.btn_c,
+                         'btn_t': self.btn_t, 'btn_w': self.btn_w}
+        self.apps = {}
 
     @property
     def abtns(self):
@@ -434,26 +644,44 @@ class Bos(M5Init):
         return btns
 
     def enable_touch(self):
-        """ enable touch with current btns passed as parm """
+        """ enable touch with current btns passed as parm, samples are queued from the INT pin (G39) """
 
-        touch = FocalTouch(self.i2c, self.btns)
+        touch = FocalTouch(self.i2c, self.btns, irq_pin=Pin(39, Pin.IN))
         return touch
 
     def install_app(self, app, **kwargs):
+        """ label the app btn and its task btns, then register app_N and tsk_NM handlers found on self """
 
         if app[0] in self.abtns.keys():
             self.abtns[app[0]]['lbl'] = app[1]
-            tbtn = getattr(self, 'tbtn' + app[0][-1])
+            n = app[0][-1]
+            tbtn = getattr(self, 'tbtn' + n)
             for k, v in kwargs.items():
                 if k in tbtn.keys():
                     tbtn[k]['lbl'] = v
                 else:
                     print("Error parm '{}' not in btn_5 thro' btn_8 ".format(k))
                     self.hard_reset()
+            tsks = {}
+            for k in tbtn.keys():
+                fn = getattr(self, 'tsk_' + n + k[-1], None)
+                if fn is None:
+                    print("ia> {} has no tsk_{}{} -- missing implementation".format(app[0], n, k[-1]))
+                else:
+                    tsks[k] = fn
+            self.register_app(app[0], tbtn, getattr(self, 'app_' + n, None), **tsks)
         else:
             print("Error parm '{}' not in btn_1 thro' btn_4 ".format(app[0]))
             self.hard_reset()
 
+    def register_app(self, uid, tbtn, app=None, **tsks):
+        """ bind app btn uid to its task btns, a btn_w handler app(uid, x, y) and task handlers tsk(uid, uidt)
+        keyed by task btn -- any callables will do, they are resolved once here instead of per touch """
+
+        self.apps[uid] = {'tbtn': tbtn, 'app': app, 'tsk': tsks}
+        self.handlers[uid] = self.app_btn
+        print("ra> registered {} with tasks {}".format(uid, [k for k in tsks.keys()]))
+
     def write_bootstate(self):
 
         fg = None
@@ -468,12 +696,14 @@ class Bos(M5Init):
 
     def home_screen(self):
 
+        px = self.painted_px
         self.btns = self.define_btns()
         self.btns.update(self.abtns)
         self.edit('btn_w')
         self.home_splash()
         [self.paint(k, v) for k, v in self.btns.items() if k not in ['btn_w', 'btn_a', 'btn_b', 'btn_c']]
         self.touch = self.enable_touch()
+        print("hs> painted {} px".format(self.painted_px - px))
 
     def home_splash(self):
 
@@ -488,80 +718,157 @@ class Bos(M5Init):
 
     def app_screen(self, uid, tbtn):
 
+        px = self.painted_px
         saved_lbl = None
-        [self.btns.pop(k) for k in self.btns.keys() if k not in (uid, 'btn_w', 'btn_a', 'btn_b', 'btn_c')]
-        if uid in ('btn_1', 'btn_2', 'btn_3', 'btn_4'):
+        [self.btns.pop(k) for k in list(self.btns.keys()) if k not in (uid, 'btn_w', 'btn_a', 'btn_b', 'btn_c')]
+        if uid in self.apps:
             saved_lbl = self.btns[uid]['lbl']
         self.btns.update(tbtn)
+        self.touch.index_btns()
         self.edit(uid, lbl='QUIT', bg=self.RED)
         self.edit('btn_w')
         [self.paint(k, v) for k, v in self.btns.items() if k not in ['btn_a', 'btn_b', 'btn_c']]
-        if uid in ('btn_1', 'btn_2', 'btn_3', 'btn_4'):
+        if uid in self.apps:
             self.btns[uid]['lbl'] = saved_lbl
             self.btns[uid]['bg'] = self.BLACK
-        print("as> going in to run {} task loop".format(uid))
-        self.run_tsk(uid)
+        print("as> painted {} px, going in to run {} task loop".format(self.painted_px - px, uid))
+        self.ctx['app'] = uid
 
     def run_app(self):
+        """ start the cooperative scheduler -- touch, clock and app tasks run as coroutines """
+
+        asyncio.run(self.app_loop())
+
+    async def app_loop(self):
         """ outer loop for app selection with task state stored in dict(ctx) """
 
+        asyncio.create_task(self.clock_loop())
         while True:
-            touched_btn = self.touch.btn_gesture()
+            await self.touch_wait()
+            touched_btn = self.touch.poll_btn()
             if touched_btn is not None:
-                getattr(self, list(touched_btn.keys())[0])(touched_btn)
+                handler = self.handlers.get(list(touched_btn.keys())[0])
+                if handler is not None:
+                    handler(touched_btn)
+            if self.ctx['app'] is not None:
+                await self.run_tsk(self.ctx['app'])
+                self.ctx['app'] = None
+
+    async def touch_wait(self):
+        """ yield to other coroutines every touch_ms until a touch sample is queued or a stroke is in progress """
+
+        await asyncio.sleep(0)
+        while self.touch.irq_pin is not None and not self.touch.touch_pending:
+            await asyncio.sleep(self.touch_ms / 1000)
+            if self.touch.gesture.down:
+                return
+
+    def start_tsk(self, res):
+        """ schedule the coroutine returned by an async app task, cancelling the one still running """
+
+        if res is None or not hasattr(res, 'send'):
+            return
+        self.cancel_tsk()
+        self.ctx['task'] = asyncio.create_task(self._guard_tsk(res))
 
-    def run_tsk(self, uid):
-        """ inner loop for selected app """
+    @staticmethod
+    async def _guard_tsk(coro):
+        """ await an app task coroutine, reporting errors the way run_tsk does for plain tasks """
 
-        tp_prev = None
-        i = 0
+        try:
+            await coro
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print("rt> task failed -> {}".format(e))
+
+    def cancel_tsk(self):
+        """ cancel the running app task if any """
+
+        task = self.ctx['task']
+        if task is not None and not task.done():
+            task.cancel()
+            print("ct> cancelled running task")
+        self.ctx['task'] = None
+
+    async def run_tsk(self, uid):
+        """ inner loop for selected app, QUIT is armed once the stroke that opened the app has lifted -- every sample
+        is fed to the gesture engine, so a stroke ends on a lift report or, in INT mode, release_ms without one """
+
+        app = self.apps[uid]['app']
+        tsks = self.apps[uid]['tsk']
+        w0 = self.loc_w[1]
+        w1 = self.loc_w[1] + self.loc_w[3]
+        pn = px = py = None
         x = None
         y = None
+        touch = self.touch
+        ges = touch.gesture
+        opening = ges.down
         while True:
-            tp = self.touch.touch_points
-            if tp_prev != tp:
-                try:
-                    x = tp[0]['x']
-                    y = tp[0]['y']
-                except IndexError as e:
-                    pass
+            await self.touch_wait()
+            if touch.irq_pin is None:
+                touch.read_frame()
+            elif touch.next_sample() is None:
+                if touch.expire():
+                    ges.feed(0, 0, 0, touch.tp_t)
+                    opening = False
+                continue
+            # the first point is read from its slots, scans are compared without building a point list
+            n = touch.tp_n
+            tx = touch.tp_x[0]
+            ty = touch.tp_y[0]
+            ges.feed(n, tx, ty, touch.tp_t)
+            if opening:
+                opening = ges.down
+                pn, px, py = n, tx, ty
+                continue
+            if n != pn or (n and (tx != px or ty != py)):
+                if n:
+                    x = tx
+                    y = ty
+                uidt = touch.hit(x, y) if n else None
                 if x == 0 and y == 0:
                     continue
-                elif y in range(self.loc_w[1], self.loc_w[1] + self.loc_w[3]):
-                    app_x = 'app_' + uid[-1]
-                    try:
-                        getattr(self, app_x)(uid, x, y)
-                    except Exception as e:
-                        print("rt> {} -- missing implementation?".format(e))
-                elif i > 0 and self.touch.touch_detected(self.btns[uid]['loc']):
+                elif w0 <= y < w1:
+                    if app is not None:
+                        try:
+                            self.start_tsk(app(uid, x, y))
+                        except Exception as e:
+                            print("rt> {} app handler failed -> {}".format(uid, e))
+                elif uidt == uid:
                     print("rt> exiting run {} task loop".format(uid))
                     break
-                elif self.touch.touch_detected(self.loc_5):
-                    tsk = 'tsk_' + uid[-1] + '5'
-                    try:
-                        getattr(self, tsk)(uid, 'btn_5')
-                    except Exception as e:
-                        print("rt> {} -- missing implementation?".format(e))
-                elif self.touch.touch_detected(self.loc_6):
-                    tsk = 'tsk_' + uid[-1] + '6'
-                    try:
-                        getattr(self, tsk)(uid, 'btn_6')
-                    except Exception as e:
-                        print("rt> {} -- missing implementation?".format(e))
-                elif self.touch.touch_detected(self.loc_7):
-                    tsk = 'tsk_' + uid[-1] + '7'
-                    try:
-                        getattr(self, tsk)(uid, 'btn_7')
-                    except Exception as e:
-                        print("rt> {} -- missing implementation?".format(e))
-                elif self.touch.touch_detected(self.loc_8):
-                    tsk = 'tsk_' + uid[-1] + '8'
+                elif uidt in tsks:
                     try:
-                        getattr(self, tsk)(uid, 'btn_8')
+                        self.start_tsk(tsks[uidt](uid, uidt))
                     except Exception as e:
-                        print("rt> {} -- missing implementation?".format(e))
-            tp_prev = tp
-            i = i + 1
+                        print("rt> {}:{} task failed -> {}".format(uid, uidt, e))
+            pn, px, py = n, tx, ty
+        self.cancel_tsk()
+        self.touch.gesture.reset()
+
+    async def clock_loop(self):
+        """ refresh the btn_t clock every second while it is on screen and write out aged sdcard sectors """
+
+        while True:
+            await asyncio.sleep(1)
+            if self.sd_held is not None:
+                try:
+                    self.sd_held.poll()
+                except OSError as e:
+                    print("* sdcard flush failed -> {}".format(e))
+            if self.btns is not None and 'btn_t' in self.btns:
+                self.show_clock()
+
+    def show_clock(self):
+        """ draw time only or date and time on btn_t as chosen by ctx['clk'] """
+
+        if self.ctx['clk'] == 'tm':
+            self.tft.text(font16, self.clock()['tm'], 0, 12, self.YELLOW, self.BLACK)
+        else:
+            self.tft.text(font16, self.clock()['dt'], 0, 12, self.YELLOW, self.BLACK)
+        self.invalidate('btn_t')
 
     @staticmethod
     def clock():
@@ -579,25 +886,62 @@ class Bos(M5Init):
         tm = h + ':' + m + ':' + s
         dt = tm + ' ' + wk[t[6]] + ' ' + mo[t[1] - 1] + ' ' + str(t[2])
         clk = {'dt': dt, 'tm': tm}
-        print("cl> clock ", clk)
         return clk
 
-    def paint(self, k, v):
-        """ refresh screen for chosen btn """
+    def paint(self, k, v, force=False):
+        """ refresh screen for chosen btn, pushing only what changed since it was last painted """
 
         loc = v['loc']
-        if v['fill']:
-            self.tft.fill_rect(loc[0], loc[1], loc[2], loc[3], v['bg'])
-        self.tft.rect(loc[0], loc[1], loc[2], loc[3], v['border'])
-        self.tft.text(v['font'], v['lbl'], loc[0] + 6, loc[1] + 12, v['fg'], v['bg'])
+        font = v['font']
+        now = (loc, v['lbl'], v['border'], v['fg'], v['bg'], v['fill'], font)
+        was = self.dlist.get(k)
+        if was == now and not force:
+            return
+
+        if force or was is None or was[0] != loc or was[4] != v['bg'] or was[5] != v['fill']:
+            if v['fill']:
+                self.tft.fill_rect(loc[0], loc[1], loc[2], loc[3], v['bg'])
+                self.painted_px += loc[2] * loc[3]
+            self.tft.rect(loc[0], loc[1], loc[2], loc[3], v['border'])
+            self.tft.text(font, v['lbl'], loc[0] + 6, loc[1] + 12, v['fg'], v['bg'])
+            self.painted_px += 2 * (loc[2] + loc[3]) + len(v['lbl']) * font.WIDTH * font.HEIGHT
+            self.invalidate(loc=loc, keep=k)
+        else:
+            if was[2] != v['border']:
+                self.tft.rect(loc[0], loc[1], loc[2], loc[3], v['border'])
+                self.painted_px += 2 * (loc[2] + loc[3])
+            if was[1] != v['lbl'] or was[3] != v['fg'] or was[6] != font:
+                # clear what the old label covered beyond the new one
+                ow = len(was[1]) * was[6].WIDTH
+                oh = was[6].HEIGHT
+                if ow > len(v['lbl']) * font.WIDTH or oh > font.HEIGHT:
+                    self.tft.fill_rect(loc[0] + 6, loc[1] + 12, ow, oh, v['bg'])
+                    self.painted_px += ow * oh
+                self.tft.text(font, v['lbl'], loc[0] + 6, loc[1] + 12, v['fg'], v['bg'])
+                self.painted_px += len(v['lbl']) * font.WIDTH * font.HEIGHT
+        self.dlist[k] = now
+
+    def invalidate(self, uid=None, loc=None, keep=None):
+        """ forget what is on screen for uid, for btns overlapping loc, or for all btns -- call after drawing
+        over a btn directly with tft so that its next paint is a full one """
+
+        if uid is not None:
+            self.dlist.pop(uid, None)
+        elif loc is None:
+            self.dlist.clear()
+        else:
+            for k in [k for k, v in self.dlist.items() if k != keep and
+                      v[0][0] < loc[0] + loc[2] and loc[0] < v[0][0] + v[0][2] and
+                      v[0][1] < loc[1] + loc[3] and loc[1] < v[0][1] + v[0][3]]:
+                del self.dlist[k]
 
     def edit(self, uid, **kwargs):
-        """ configure btn properties """
+        """ configure btn properties and repaint what changed, edit(uid) alone repaints the btn in full """
 
         for k, v in kwargs.items():
             if self.btns[uid][k] != v:
                 self.btns[uid][k] = v
-        self.paint(uid, self.btns[uid])
+        self.paint(uid, self.btns[uid], force=not kwargs)
         print("ed> {} {}".format(uid, kwargs))
 
     def btn_a(self, btn):
@@ -626,6 +970,7 @@ class Bos(M5Init):
 
         if btn['btn_c']['action'] == 'HOLD':
             self.tft.fill(self.BLACK)
+            self.invalidate()
             self.hard_reset()
         else:
             print("bc> Not Implemented ..")
@@ -637,11 +982,12 @@ class Bos(M5Init):
         action = btn[uid]['action']
 
         if action == 'TAP':
-            self.tft.fill_rect(0, 0, 144, 40, self.BLACK)
-            self.tft.text(font16, self.clock()['tm'], 0, 12, self.YELLOW, self.BLACK)
+            self.ctx['clk'] = 'tm'
+            self.tft.fill_rect(0, 0, 320, 40, self.BLACK)
         else:
+            self.ctx['clk'] = 'dt'
             self.tft.fill_rect(0, 0, 320, 40, self.BLACK)
-            self.tft.text(font16, self.clock()['dt'], 0, 12, self.YELLOW, self.BLACK)
+        self.show_clock()
 
     @staticmethod
     def btn_w(btn):
@@ -653,74 +999,34 @@ class Bos(M5Init):
         if action is not None:
             print("bw> Not Implemented ..")
 
-    def btn_1(self, btn):
+    def app_btn(self, btn):
+        """ toggle between the home screen and the app screen of a registered app btn """
 
         uid = list(btn.keys())[0]
-        loc = btn[uid]['loc']
-        action = btn[uid]['action']
-
-        if action == 'Tap' or 'HOLD':
-
-            if self.ctx['btn']:
-                self.app_screen(uid, self.tbtn1)
-                self.ctx['btn'] = False
-            else:
-                self.home_screen()
-                self.ctx['btn'] = True
-
+        if uid not in self.apps:
+            print("ab> {} has no app installed ..".format(uid))
+        elif self.ctx['btn']:
+            self.app_screen(uid, self.apps[uid]['tbtn'])
+            self.ctx['btn'] = False
         else:
-            print("b1> Not Implemented ..")
+            self.home_screen()
+            self.ctx['btn'] = True
 
-    def btn_2(self, btn):
+    def btn_1(self, btn):
 
-        uid = list(btn.keys())[0]
-        loc = btn[uid]['loc']
-        action = btn[uid]['action']
+        self.app_btn(btn)
 
-        if action == 'Tap' or 'HOLD':
+    def btn_2(self, btn):
 
-            if self.ctx['btn']:
-                self.app_screen(uid, self.tbtn2)
-                self.ctx['btn'] = False
-            else:
-                self.home_screen()
-                self.ctx['btn'] = True
-        else:
-            print("b2> Not Implemented ..")
+        self.app_btn(btn)
 
     def btn_3(self, btn):
 
-        uid = list(btn.keys())[0]
-        loc = btn[uid]['loc']
-        action = btn[uid]['action']
-
-        if action == 'Tap' or 'HOLD':
-
-            if self.ctx['btn']:
-                self.app_screen(uid, self.tbtn3)
-                self.ctx['btn'] = False
-            else:
-                self.home_screen()
-                self.ctx['btn'] = True
-        else:
-            print("b3> Not Implemented ..")
+        self.app_btn(btn)
 
     def btn_4(self, btn):
 
-        uid = list(btn.keys())[0]
-        loc = btn[uid]['loc']
-        action = btn[uid]['action']
-
-        if action == 'Tap' or 'HOLD':
-
-            if self.ctx['btn']:
-                self.app_screen(uid, self.tbtn4)
-                self.ctx['btn'] = False
-            else:
-                self.home_screen()
-                self.ctx['btn'] = True
-        else:
-            print("b4> Not Implemented ..")
+        self.app_btn(btn)
 
     def write(self, tl, font=None, xl=None, yl=None, fg=None, bg=None):
         """ write txt from a list at x,y coordinates in a list"""
@@ -778,39 +1084,78 @@ class Bos(M5Init):
         """ save 'ts', 'accl', 'gyro', and 'temp' sensor vals to SDCard as '/sd/imu.json'.
         writes all records at a time for self.m5parms['imu_size'] count -- memory intensive  """
 
+        return self._sync(self.aimu_json(), 'aimu_json')
+
+    async def aimu_json(self):
+        """ coroutine of imu_json """
+
         self.mount_sd()
         fn = self.m5parms['mdir'] + self.m5parms['json_file']
+        imu = await self.aread_imu()
         with open(fn, "w") as f:
-            json.dump(self.read_imu(), f)
+            imu.dump_json(f)
 
         stat = uos.stat(fn)[-4:]
-        self.release_spi2()
         return fn, stat
 
     def imu_csv(self):
         """ save 'ts', 'accl', 'gyro', and 'temp' sensor vals to SDCard as '/sd/imu.csv'.
-        writes one record at a time for self.m5parms['imu_size'] count -- memory friendly """
+        samples into one buffer while the other is written to the card by ImuLogger -- memory friendly """
+
+        return self._sync(self.aimu_csv(), 'aimu_csv')
+
+    async def aimu_csv(self):
+        """ coroutine of imu_csv, the card is written by a background writer task, cancelling it closes the file """
+
+        return await self.aimu_log(".csv", CsvFormat())
+
+    def imu_cap(self):
+        """ save 'ts', 'accl', 'gyro', and 'temp' sensor vals to SDCard as a binary columnar capture '/sd/imuNNNN.imc'
+        about a fifth the size of csv, convert it on host with imu_read.py """
+
+        return self._sync(self.aimu_cap(), 'aimu_cap')
+
+    async def aimu_cap(self):
+        """ coroutine of imu_cap """
+
+        rate = self.m5parms['imu_rate'] or (1000 // self.m5parms['imu_wait'] if self.m5parms['imu_wait'] else 0)
+        return await self.aimu_log(".imc", CapFormat(rate, pack=self.m5parms['imu_pack']))
+
+    def imu_stats(self, window=100, step=None):
+        """ save per window mean, std, min, max, rms and peak of each channel instead of the samples to SDCard as
+        '/sd/imuNNNN.sum.csv' -- one record per step samples over the last window samples """
+
+        return self._sync(self.aimu_stats(window, step), 'aimu_stats')
+
+    async def aimu_stats(self, window=100, step=None):
+        """ coroutine of imu_stats """
 
         self.mount_sd()
-        fn = self.m5parms['mdir'] + "/imu" + str(time.time())[-4:] + ".csv"
+        fn = self.m5parms['mdir'] + "/imu" + str(time.time())[-4:] + ".sum.csv"
         with open(fn, "w") as f:
-            header = "timestamp,accl_x,accl_y,accl_z,gyro_x,gyro_y,gyro_z,temp\n"
-            f.write(header)
-            print(header, end='')
-            for n in range(self.m5parms['imu_size']):
-                ts = int(str(time.time_ns())[:-6])
-                accl = self.sensor.accel
-                gyro = self.sensor.gyro
-                temp = self.sensor.temperature
-
-                line = str(ts) + ',' + str(accl[0]) + ',' + str(accl[1]) + ',' + str(accl[2]) \
-                       + ',' + str(gyro[0]) + ',' + str(gyro[1]) + ',' + str(gyro[2]) + ',' + str(temp) + '\n'
-                f.write(line)
-                print(n + 1, '>', line, end='')
-                time.sleep_ms(self.m5parms['imu_size'])
+            stats = WindowStats(window, step, on_window=lambda s: f.write(s.csv_line()))
+            f.write(stats.header())
+            await self.imu_stream(stats.append)
+            print("* imu summarized {} samples in {} windows".format(stats.n, stats.windows))
+        stat = uos.stat(fn)[-4:]
+        return fn, stat
+
+    async def aimu_log(self, ext, fmt):
+        """ log imu_size samples to a new SDCard file in fmt, returns filename and stat """
+
+        self.mount_sd()
+        fn = self.m5parms['mdir'] + "/imu" + str(time.time())[-4:] + ext
+        with open(fn, "wb") as f:
+            log = ImuLogger(f, fmt)
+            writer = asyncio.create_task(log.writer())
+            try:
+                await self.imu_stream(log.append)
+            finally:
+                await log.close(writer)
+                print("* imu logged {} samples, dropped {}, {} flushes of max {} ms, {} bytes".format(
+                    log.samples, log.dropped, log.flushes, log.max_ms, log.nbytes))
 
         stat = uos.stat(fn)[-4:]
-        self.release_spi2()
         return fn, stat
 
     def set_imu_parm(self, uid, parm):
@@ -834,9 +1179,88 @@ class Bos(M5Init):
 
         loc = self.btns[uid]['loc']
         self.edit(uid, lbl=parm, font=font8)
-        self.write([self.m5parms[parm]], xl=[loc[0] + 28], yl=[loc[1] + 24])
+        self.write(['{:<4}'.format(self.m5parms[parm])], xl=[loc[0] + 28], yl=[loc[1] + 24])
         return self.m5parms[parm]
 
+    def draw_line(self, x0, y0, x1, y1, pen=1, color=None, clip=None):
+        """ sweep a pen x pen square brush from x0, y0 to x1, y1 -- each Bresenham run along the major axis is
+        pushed as a single fill_rect, optionally clipped to a loc, returns the number of rects pushed """
+
+        if color is None:
+            color = self.GREEN
+        dx = abs(x1 - x0)
+        dy = abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        rects = 0
+
+        x = x0
+        y = y0
+        if dx >= dy:
+            rx = x
+            err = dx // 2
+            for _ in range(dx):
+                x += sx
+                err -= dy
+                if err < 0:
+                    rects += self._fill_clip(min(rx, x - sx), y, abs(x - sx - rx) + pen, pen, color, clip)
+                    y += sy
+                    err += dx
+                    rx = x
+            rects += self._fill_clip(min(rx, x), y, abs(x - rx) + pen, pen, color, clip)
+        else:
+            ry = y
+            err = dy // 2
+            for _ in range(dy):
+                y += sy
+                err -= dx
+                if err < 0:
+                    rects += self._fill_clip(x, min(ry, y - sy), pen, abs(y - sy - ry) + pen, color, clip)
+                    x += sx
+                    err += dy
+                    ry = y
+            rects += self._fill_clip(x, min(ry, y), pen, abs(y - ry) + pen, color, clip)
+        return rects
+
+    def _fill_clip(self, x, y, w, h, color, clip):
+        """ fill_rect clipped to clip loc, returns 1 if anything was pushed """
+
+        if clip is not None:
+            x2 = min(x + w, clip[0] + clip[2])
+            y2 = min(y + h, clip[1] + clip[3])
+            x = max(x, clip[0])
+            y = max(y, clip[1])
+            w = x2 - x
+            h = y2 - y
+        if w <= 0 or h <= 0:
+            return 0
+        self.tft.fill_rect(x, y, w, h, color)
+        return 1
+
+    def draw_bars(self, hts, prev, loc, fg=None, bg=None):
+        """ bar chart of heights hts across loc, bottom aligned -- only the part of each bar that differs from
+        prev is pushed, as one fill_rect grown in fg or shrunk in bg, prev is updated, returns rects pushed """
+
+        if fg is None:
+            fg = self.GREEN
+        if bg is None:
+            bg = self.BLACK
+        w = loc[2] // len(hts)
+        y1 = loc[1] + loc[3]
+        rects = 0
+        for i in range(len(hts)):
+            h = min(max(hts[i], 0), loc[3])
+            p = prev[i]
+            if h > p:
+                self.tft.fill_rect(loc[0] + i * w, y1 - h, w - 1, h - p, fg)
+            elif h < p:
+                self.tft.fill_rect(loc[0] + i * w, y1 - p, w - 1, p - h, bg)
+            else:
+                continue
+            prev[i] = h
+            rects += 1
+        return rects
+
     def draw_digit(self, digit=8, x=10, y=50, w=24, h=4, color=None):
 
         digit = str(digit)
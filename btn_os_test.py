@@ -21,7 +21,17 @@ LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
+import gc
+import time
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
 from btn_os import Bos
+from mpu6886 import MPU6886
+from imu_buffer import ImuBuffer
 
 
 
@@ -55,10 +65,40 @@ class BosTest(Bos):
         self.disconnect_wifi()
 
     def imu_test(self):
-        print("returns a list of samples as a dict of ts, accl, gyro & temp and corresponding uom")
+        print("returns an ImuBuffer of ts, accl, gyro & temp samples with uom in its meta")
         self.m5parms['imu_size'] = 1
-        [[print("  {} -> {}".format(k, v)) for k, v in sample.items()]
-         for sample in self.read_imu()]
+        imu = self.read_imu()
+        print("  meta -> {}".format(imu.meta))
+        [print("  {} -> {}".format(i, imu.row(i))) for i in range(len(imu))]
+
+    def imu_memory_test(self):
+        print("heap bytes per sample, list of dicts vs ImuBuffer ..")
+        n = 200
+        accl, gyro, temp = self.sensor.read_all()
+        gc.collect()
+        free = gc.mem_free()
+        imu = [{'ts': {'val': time.time_ns() // 1000000, 'uom': 'ms'}, 'accl': {'val': accl, 'uom': 'mG'},
+                'gyro': {'val': gyro, 'uom': 'deg/s'}, 'temp': {'val': temp, 'uom': 'F'}} for _ in range(n)]
+        print("  dicts -> {} bytes".format((free - gc.mem_free()) // n))
+        imu = None
+        gc.collect()
+        free = gc.mem_free()
+        imu = ImuBuffer(n)
+        [imu.append(time.time_ns() // 1000000, accl, gyro, temp) for _ in range(n)]
+        print("  ImuBuffer -> {} bytes".format((free - gc.mem_free()) // n))
+
+    def imu_motion_test(self):
+        print("move the M5 within 5 sec to raise MPU6886 wake on motion ..")
+        self.sensor.int_enable(wom_mg=100, pin=self.imu_int_pin)
+        try:
+            f = asyncio.run(self.imu_event(MPU6886.INT_WOM, 5000))
+        finally:
+            self.sensor.int_disable()
+        print("  INT_STATUS -> {:#04x}, {} irqs".format(f, self.sensor.int_count))
+
+    def boot_test(self):
+        print("devices are created on first use, ms spent on each so far ..")
+        self.boot_report()
 
     def hall_test(self):
         print("read_hall_sensor ..")
@@ -78,8 +118,11 @@ if __name__ == "__main__":
     
     print("m5parms -> {}".format(bt.m5parms))
 
-    tests = ["wifi_test",
+    tests = ["boot_test",
+             "wifi_test",
              "imu_test",
+             "imu_memory_test",
+             "imu_motion_test",
              "hall_test",
              "cpu_temp_test",
              "sdcard_erase_test"]
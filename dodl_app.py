@@ -31,13 +31,27 @@ class Dodl(Bos):
         """ inherit all BtnOS methods and properties """
 
         super(Dodl, self).__init__()
+        self.ctx['last'] = None
+        self.ctx['stroke'] = None
 
     def app_3(self, uid, x, y):
-        """ Doodle app invoked by Btn_3 shows output on btn_w space """
-
+        """ Doodle app invoked by Btn_3 shows output on btn_w space, joining touch samples into strokes -- a stroke
+        ends when the gesture engine releases it, on a lift report or release_ms without reports """
+
+        ges = self.touch.gesture
+        if not self.touch.tp_n or not ges.down:
+            # finger lifted -- the next sample starts a new stroke
+            self.ctx['last'] = None
+            return
         clr = self.color[self.ctx['pallet']]
         pt = self.ctx['pen']
-        [[self.tft.pixel(x + i, y + j, clr) for j in range(pt)] for i in range(pt)]
+        last = self.ctx['last']
+        if last is None or self.ctx['stroke'] != ges.t0:
+            last = (x, y)
+        if pt:
+            self.draw_line(last[0], last[1], x, y, pt, clr, clip=self.loc_w)
+        self.ctx['last'] = (x, y)
+        self.ctx['stroke'] = ges.t0
 
     def tsk_35(self, uid, uidt):
         """ Btn_5 selects color pallet """
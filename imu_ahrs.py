@@ -0,0 +1,79 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from math import atan2, sqrt, degrees
+
+
+class Attitude:
+    """ complementary filter of roll and pitch (deg) -- gyro rates are integrated and pulled towards the accel
+    tilt angles by 1 - alpha every update, yaw is gyro integrated only and drifts. Updates take the raw counts
+    array of MPU6886.read_raw or fifo_read, so gyro rates keep their full resolution """
+
+    def __init__(self, gyro_dial=250, alpha=0.98):
+        """ gyro_dial is the gyro full scale in deg/s, alpha the gyro weight per update """
+
+        self.alpha = alpha
+        self.k = gyro_dial / 32768
+        self.bias = [0, 0, 0]
+        self.reset()
+
+    def reset(self):
+        """ restart from the next sample's accel tilt and zero yaw """
+
+        self.roll = 0.0
+        self.pitch = 0.0
+        self.yaw = 0.0
+        self.n = 0
+
+    def level(self, raw):
+        """ take the gyro counts of a stationary sample as bias """
+
+        self.bias[0], self.bias[1], self.bias[2] = raw[4], raw[5], raw[6]
+
+    def update(self, raw, dt):
+        """ fold in one raw sample taken dt seconds after the previous one """
+
+        ax = raw[0]
+        ay = raw[1]
+        az = raw[2]
+        roll = degrees(atan2(ay, az))
+        pitch = degrees(atan2(-ax, sqrt(ay * ay + az * az)))
+        k = self.k * dt
+        if self.n:
+            a = self.alpha
+            r = self.roll + (raw[4] - self.bias[0]) * k
+            # keep the gyro estimate on the same side of +-180 as the accel roll before blending
+            if r - roll > 180:
+                r -= 360
+            elif roll - r > 180:
+                r += 360
+            roll = a * r + (1 - a) * roll
+            pitch = a * (self.pitch + (raw[5] - self.bias[1]) * k) + (1 - a) * pitch
+            if roll > 180:
+                roll -= 360
+            elif roll < -180:
+                roll += 360
+        self.roll = roll
+        self.pitch = pitch
+        self.yaw = (self.yaw + (raw[6] - self.bias[2]) * k + 180) % 360 - 180
+        self.n += 1
@@ -22,8 +22,16 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 import time
+from array import array
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
 
 from btn_os import Bos
+from imu_ahrs import Attitude
+from imu_fft import Spectrum
 
 
 class Imu(Bos):
@@ -31,27 +39,31 @@ class Imu(Bos):
     def __init__(self, **kwargs):
         """ inherit all BtnOS methods and properties """
         super(Imu, self).__init__(**kwargs)
+        self.ctx['view'] = 0
+        self.spectrum = None
 
     def app_2(self, uid, x, y):
         """ 'IMU' app invoked by Btn_2 shows output on btn_w space """
         print("a2> {} x:{} y:{}".format(uid, x, y))
         
 
-    def tsk_25(self, uid, uidt):
-        """ Btn_5  display imu 'accl' and 'gyro' data alternately """
+    async def tsk_25(self, uid, uidt):
+        """ Btn_5  cycle display of imu 'accl' and 'gyro' data, the live vibration spectrum and attitude """
         print("t25> {}:{} -> {}:{}".format(uid, self.btns[uid]['lbl'], uidt, self.tbtn2[uidt]['lbl']))
-        if self.ctx['tbtn']:
+        view = self.ctx['view']
+        self.ctx['view'] = (view + 1) % 4
+        if view == 0:
             self.edit(uidt, lbl='Accl')
-            data = 'accl'
-            hd = ["accl_x", "accl_y", "accl_z", "mG"]
-            self.imu_data(data, hd)
-            self.ctx['tbtn'] = False
-        else:
+            await self.imu_data('accl', ["accl_x", "accl_y", "accl_z", "mG"])
+        elif view == 1:
             self.edit(uidt, lbl='Gyro')
-            data = 'gyro'
-            hd = ["gyro_x", "gyro_y", "gyro_z", "deg/s"]
-            self.imu_data(data, hd)
-            self.ctx['tbtn'] = True
+            await self.imu_data('gyro', ["gyro_x", "gyro_y", "gyro_z", "deg/s"])
+        elif view == 2:
+            self.edit(uidt, lbl='Spec')
+            await self.imu_spectrum()
+        else:
+            self.edit(uidt, lbl='Att')
+            await self.imu_attitude()
 
     def tsk_26(self, uid, uidt):
         """ Btn_6 sets imu sampling imu_wait time """
@@ -67,26 +79,97 @@ class Imu(Bos):
         print("t27> set imu sampling imu_size {}".format(imu_size))
         return imu_size
 
-    def tsk_28(self, uid, uidt):
+    async def tsk_28(self, uid, uidt):
         """ Btn_8 save 'accl', 'gyro' & 'temp' data to SDCard csv format """
         print("t28> {}:{}".format(uid, uidt))
         self.edit('btn_w')
         self.write(["saving", self.m5parms['imu_size'], "samples every", self.m5parms['imu_wait'], "ms"],
                    xl=[0, 56, 96, 208, 248], yl=[184, 184, 184, 184, 184])
-        fn, stat = self.imu_csv()
+        fn, stat = await self.aimu_csv()
         self.imu_fdback(fn, stat)
 
-    def imu_data(self, data, hd):
+    async def imu_data(self, data, hd):
         """ display data """
+        imu = await self.aread_imu()
+        x, y, z = [imu.col(data + a) for a in ('_x', '_y', '_z')]
         self.edit('btn_w')
         self.write(hd, xl=[8, 112, 208, 280], yl=[48, 48, 48, 48])
-        [self.write([v[data]['val'][0], v[data]['val'][1], v[data]['val'][2]],
-                    xl=[0, 104, 208], yl=[60 + i * 12, 60 + i * 12, 60 + i * 12])
-         for i, v in enumerate(self.read_imu()) if i < 10]
+        [self.write([x[i], y[i], z[i]], xl=[0, 104, 208], yl=[60 + i * 12, 60 + i * 12, 60 + i * 12])
+         for i in range(min(len(imu), 10))]
 
         self.write(["ts:" + str(time.time()) + " sec, wait:" + str(str(self.m5parms['imu_wait'])) +
                     "ms, size:" + str(self.m5parms['imu_size'])], yl=[184])
 
+    async def imu_spectrum(self, n=256, bars=64):
+        """ live accl_z vibration spectrum until another task runs -- n point FFT of FIFO samples at imu_rate
+        (500 Hz if unset), bars auto scaled to the peak bin amplitude in mG with a 5 mG floor """
+        if self.spectrum is None or self.spectrum.n != n:
+            self.spectrum = Spectrum(n)
+        spec = self.spectrum
+        rate = self.m5parms['imu_rate'] or 500
+        loc = (self.loc_w[0], self.loc_w[1] + 16, self.loc_w[2], self.loc_w[3] - 40)
+        hts = array('H', bytearray(2 * bars))
+        prev = array('H', bytearray(2 * bars))
+        amp = array('f', [0] * bars)
+        i = [0]
+
+        def put(ts, accl, gyro, temp):
+            spec.x[i[0]] = accl[2]
+            i[0] += 1
+
+        self.edit('btn_w')
+        self.write(["accl_z spectrum", "0 - {} Hz".format(rate // 2)], xl=[8, 200], yl=[44, 44])
+        while True:
+            i[0] = 0
+            await self.imu_stream(put, size=n, rate=rate)
+            t = time.ticks_ms()
+            mag = spec.run()
+            top = max(spec.bands(amp), 5)
+            for b in range(bars):
+                hts[b] = int(loc[3] * amp[b] / top)
+            self.draw_bars(hts, prev, loc)
+            k = spec.peak()
+            self.write(["peak {:>3} Hz {:>6.1f} mG  fft+draw {:>3} ms".format(
+                k * rate // n, 2 * mag[k] ** 0.5 * spec.scale / n, time.ticks_diff(time.ticks_ms(), t))], yl=[184])
+
+    async def imu_attitude(self, rate=200, fps=10):
+        """ live attitude until another task runs -- FIFO samples at rate Hz fused by a complementary filter,
+        a bubble moves with roll and pitch (1 px/deg) and roll, pitch, yaw are written fps times a second """
+        att = Attitude(self.sensor.imuparms['gyro_dial'])
+        cx = self.loc_w[0] + self.loc_w[2] // 2
+        cy = self.loc_w[1] + 64
+        dot = None
+
+        self.edit('btn_w')
+        self.tft.hline(cx - 64, cy, 129, self.WHITE)
+        self.tft.vline(cx, cy - 56, 113, self.WHITE)
+        self.sensor.fifo_start(rate)
+        dt = self.sensor.fifo_period / 1000000
+        drawn = time.ticks_ms()
+        try:
+            while True:
+                await asyncio.sleep(self.fifo_ms / 1000)
+                for ts, raw in self.sensor.fifo_read():
+                    att.update(raw, dt)
+                if time.ticks_diff(time.ticks_ms(), drawn) < 1000 // fps:
+                    continue
+                drawn = time.ticks_ms()
+                x = cx + max(-60, min(60, int(att.roll))) - 3
+                y = cy - max(-52, min(52, int(att.pitch))) - 3
+                if dot != (x, y):
+                    if dot is not None:
+                        self.tft.fill_rect(dot[0], dot[1], 7, 7, self.BLACK)
+                        if dot[1] <= cy < dot[1] + 7:
+                            self.tft.hline(dot[0], cy, 7, self.WHITE)
+                        if dot[0] <= cx < dot[0] + 7:
+                            self.tft.vline(cx, dot[1], 7, self.WHITE)
+                    self.tft.fill_rect(x, y, 7, 7, self.GREEN)
+                    dot = (x, y)
+                self.write(["roll {:>6.1f}  pitch {:>6.1f}  yaw {:>6.1f}".format(att.roll, att.pitch, att.yaw)],
+                           yl=[184])
+        finally:
+            self.sensor.fifo_stop()
+
     def imu_fdback(self, fn, stat):
         """ display feedback from action """
         self.edit('btn_w')
@@ -0,0 +1,371 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import json
+import struct
+import time
+from array import array
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+try:
+    from uctypes import addressof, bytearray_at
+
+    def _raw(a, n):
+        """ bytes view of the first n bytes of array a """
+        return bytearray_at(addressof(a), n)
+except ImportError:
+    def _raw(a, n):
+        """ bytes view of the first n bytes of array a """
+        return memoryview(a).cast('B')[:n]
+
+
+class ImuBuffer:
+    """ preallocated columnar buffer of imu samples, 18 bytes per sample -- ts as ms offsets from t0 in array('i'),
+    accl (mG), gyro (deg/s) and temp (tenths of deg F) in array('h'), units are kept once in meta """
+
+    COLS = ('ts', 'accl_x', 'accl_y', 'accl_z', 'gyro_x', 'gyro_y', 'gyro_z', 'temp')
+    UOM = {'ts': 'ms', 'accl': 'mG', 'gyro': 'deg/s', 'temp': 'F'}
+    SCALE = {'ts': 1, 'accl': 1, 'gyro': 1, 'temp': 0.1}
+
+    def __init__(self, size):
+        """ allocate all columns up front for size samples """
+
+        self.size = size
+        self.n = 0
+        self.t0 = 0
+        self.ts = array('i', bytearray(4 * size))
+        self.cols = [self.ts] + [array('h', bytearray(2 * size)) for _ in range(7)]
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def full(self):
+        return self.n == self.size
+
+    @property
+    def meta(self):
+        return {'t0': self.t0, 'n': self.n, 'cols': ImuBuffer.COLS, 'uom': ImuBuffer.UOM, 'scale': ImuBuffer.SCALE}
+
+    def clear(self):
+        """ forget the samples, the columns are reused """
+
+        self.n = 0
+
+    def append(self, ts, accl, gyro, temp):
+        """ store one sample with ts in ms, returns False when the buffer is full """
+
+        i = self.n
+        if i == self.size:
+            return False
+        if not i:
+            self.t0 = ts
+        c = self.cols
+        c[0][i] = ts - self.t0
+        c[1][i], c[2][i], c[3][i] = accl
+        c[4][i], c[5][i], c[6][i] = gyro
+        c[7][i] = int(temp * 10 + (0.5 if temp >= 0 else -0.5))
+        self.n = i + 1
+        return True
+
+    def col(self, name):
+        """ returns a memoryview of the filled part of a column """
+
+        return memoryview(self.cols[ImuBuffer.COLS.index(name)])[:self.n]
+
+    def row(self, i):
+        """ returns sample i as ts (ms), accl, gyro tuples and temp (deg F) """
+
+        c = self.cols
+        return (self.t0 + c[0][i], (c[1][i], c[2][i], c[3][i]), (c[4][i], c[5][i], c[6][i]), c[7][i] / 10)
+
+    def csv_line(self, i):
+        """ returns sample i as a csv record """
+
+        c = self.cols
+        return '{},{},{},{},{},{},{},{}\n'.format(self.t0 + c[0][i], c[1][i], c[2][i], c[3][i],
+                                                c[4][i], c[5][i], c[6][i], c[7][i] / 10)
+
+    def dump_json(self, f):
+        """ write meta and each column as a json list, a chunk of values at a time """
+
+        f.write('{"meta": ' + json.dumps(self.meta))
+        for k, c in zip(ImuBuffer.COLS, self.cols):
+            f.write(', "{}": ['.format(k))
+            for i in range(0, self.n, 64):
+                f.write((',' if i else '') + ','.join([str(v) for v in c[i:min(i + 64, self.n)]]))
+            f.write(']')
+        f.write('}')
+
+
+class SampleClock:
+    """ fixed period sampling clock -- each sample is due at an absolute ticks_us deadline rather than a sleep
+    after the work, so read and write time do not stretch the period. Deadlines missed by a whole period are
+    skipped and counted, jitter is the lateness of each sample in us. Period 0 samples as fast as possible, every
+    tick is due when it is called """
+
+    def __init__(self, period_ms):
+        self.period = int(period_ms * 1000)
+        self.reset()
+
+    def reset(self):
+        """ start the schedule now and clear the stats """
+
+        self.due = time.ticks_us()
+        self.n = 0
+        self.skipped = 0
+        self.jmin = 0
+        self.jmax = 0
+        self.jsum = 0
+
+    @property
+    def jmean(self):
+        return self.jsum // self.n if self.n else 0
+
+    async def tick(self):
+        """ wait for the next deadline, returns the number of deadlines skipped before it """
+
+        if not self.period:
+            self.due = time.ticks_us()
+        wait = time.ticks_diff(self.due, time.ticks_us())
+        if wait > 0:
+            await asyncio.sleep(wait / 1000000)
+        else:
+            await asyncio.sleep(0)
+        late = time.ticks_diff(time.ticks_us(), self.due)
+        skip = 0
+        if self.period and late >= self.period:
+            skip = late // self.period
+            self.skipped += skip
+            self.due = time.ticks_add(self.due, skip * self.period)
+            late -= skip * self.period
+        late = max(late, 0)
+        self.jmin = min(self.jmin, late) if self.n else late
+        self.jmax = max(self.jmax, late)
+        self.jsum += late
+        self.n += 1
+        self.due = time.ticks_add(self.due, self.period)
+        return skip
+
+    def stats(self):
+        return "period {} us, jitter min/mean/max {}/{}/{} us, {} skipped".format(
+            self.period, self.jmin, self.jmean, self.jmax, self.skipped)
+
+
+class CsvFormat:
+    """ ImuLogger format writing a header line and one csv record per sample """
+
+    def header(self):
+        return b"timestamp,accl_x,accl_y,accl_z,gyro_x,gyro_y,gyro_z,temp\n"
+
+    def block(self, b):
+        for i in range(len(b)):
+            yield b.csv_line(i).encode()
+
+
+class CapFormat:
+    """ ImuLogger format for binary columnar captures, read back on host by imu_read.py.
+    A 64 byte header -- magic, version, header size, rate Hz, column count, typecodes and float scale per column,
+    then per ImuBuffer a block header -- sample count, ts encoding and base epoch ms, followed by each column's
+    little-endian values. ts is uint16 ms deltas (TS_DELTA) or int32 ms offsets from base (TS_OFFSET).
+    Packed blocks (ZZV) hold a uint32 byte length and then each column, ts included, as zigzag varints of the
+    deltas between consecutive samples """
+
+    MAGIC = b'IMUC'
+    VERSION = 1
+    HEAD = '<4sHHHH8s8f12x'
+    BLOCK = '<HHq'
+    TS_OFFSET = 0
+    TS_DELTA = 1
+    ZZV = 2
+
+    def __init__(self, rate=0, delta=True, pack=False):
+        """ rate is the nominal sample rate in Hz, 0 when unknown, pack selects zigzag varint blocks """
+
+        self.rate = rate
+        self.delta = delta
+        self.pack = pack
+        self._d = None
+        self._z = None
+
+    def header(self):
+        scale = [ImuBuffer.SCALE[c.split('_')[0]] for c in ImuBuffer.COLS]
+        return struct.pack(CapFormat.HEAD, CapFormat.MAGIC, CapFormat.VERSION, struct.calcsize(CapFormat.HEAD),
+                           self.rate, len(ImuBuffer.COLS), b'ihhhhhhh', *scale)
+
+    def block(self, b):
+        if self.pack:
+            yield from self._packed(b)
+            return
+        n = len(b)
+        ts = b.ts
+        enc = CapFormat.TS_OFFSET
+        if self.delta:
+            if self._d is None or len(self._d) < n:
+                self._d = array('H', bytearray(2 * b.size))
+            d = self._d
+            prev = 0
+            for i in range(n):
+                v = ts[i] - prev
+                if not 0 <= v <= 0xFFFF:
+                    break
+                d[i] = v
+                prev = ts[i]
+            else:
+                enc = CapFormat.TS_DELTA
+        yield struct.pack(CapFormat.BLOCK, n, enc, b.t0)
+        yield _raw(self._d, 2 * n) if enc == CapFormat.TS_DELTA else _raw(ts, 4 * n)
+        for c in b.cols[1:]:
+            yield _raw(c, 2 * n)
+
+    def _packed(self, b):
+        """ delta, zigzag and varint encode every column into one reused buffer -- a sample of slowly
+        changing readings packs to about a byte per column, 5 bytes for ts and 3 for others at worst """
+
+        n = len(b)
+        if self._z is None or len(self._z) < 26 * b.size:
+            self._z = bytearray(26 * b.size)
+        z = self._z
+        o = 0
+        for c in b.cols:
+            prev = 0
+            for i in range(n):
+                v = c[i] - prev
+                prev = c[i]
+                v = (v << 1) ^ (v >> 31)
+                while v > 0x7F:
+                    z[o] = v & 0x7F | 0x80
+                    v >>= 7
+                    o += 1
+                z[o] = v
+                o += 1
+        yield struct.pack(CapFormat.BLOCK + 'I', n, CapFormat.ZZV, b.t0, o)
+        yield memoryview(z)[:o]
+
+
+class ImuLogger:
+    """ double buffered logger -- samples fill one ImuBuffer while a writer coroutine encodes the other into
+    chunk sized writes to f. When both buffers are full the sample is dropped and counted """
+
+    def __init__(self, f, fmt=None, size=256, chunk=4096):
+        """ log to the open binary file f in fmt -- CsvFormat by default, or CapFormat """
+
+        self.f = f
+        self.fmt = fmt or CsvFormat()
+        self.bufs = [ImuBuffer(size), ImuBuffer(size)]
+        self.fill = 0
+        self.pending = None
+        self.closing = False
+        self.ready = asyncio.Event()
+        self.out = bytearray(chunk)
+        self.used = 0
+        self.samples = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.nbytes = 0
+        self.max_ms = 0
+        self._put(self.fmt.header())
+
+    def append(self, ts, accl, gyro, temp):
+        """ sample source callback, returns False when the sample is dropped """
+
+        if self.bufs[self.fill].full and not self._swap():
+            self.dropped += 1
+            return False
+        self.bufs[self.fill].append(ts, accl, gyro, temp)
+        self.samples += 1
+        if self.bufs[self.fill].full:
+            self._swap()
+        return True
+
+    def _swap(self):
+        """ hand the fill buffer to the writer, fails while the writer is still busy with the other one """
+
+        if self.pending is not None:
+            return False
+        self.pending = self.fill
+        self.fill ^= 1
+        self.bufs[self.fill].clear()
+        self.ready.set()
+        return True
+
+    def _put(self, data):
+        """ copy data into the chunk, writing every chunk that fills, returns True if any were written """
+
+        wrote = False
+        mv = memoryview(data)
+        while len(mv):
+            k = min(len(mv), len(self.out) - self.used)
+            self.out[self.used:self.used + k] = mv[:k]
+            self.used += k
+            mv = mv[k:]
+            if self.used == len(self.out):
+                self.f.write(self.out)
+                self.nbytes += self.used
+                self.used = 0
+                wrote = True
+        return wrote
+
+    async def _flush(self, b):
+        """ encode a full buffer, yielding to the sampler after each chunk written """
+
+        t = time.ticks_ms()
+        for data in self.fmt.block(b):
+            if self._put(data):
+                await asyncio.sleep(0)
+        self.flushes += 1
+        self.max_ms = max(self.max_ms, time.ticks_diff(time.ticks_ms(), t))
+
+    async def writer(self):
+        """ coroutine flushing full buffers until close() """
+
+        while not self.closing or self.pending is not None:
+            if self.pending is None:
+                await self.ready.wait()
+                self.ready.clear()
+                continue
+            try:
+                await self._flush(self.bufs[self.pending])
+            finally:
+                self.pending = None
+        if self.used:
+            self.f.write(memoryview(self.out)[:self.used])
+            self.nbytes += self.used
+            self.used = 0
+
+    async def close(self, task):
+        """ hand over the partly filled buffer and wait for the writer task to finish, re-raises the error that
+        ended the writer early, e.g. an OSError of a failed SDCard write """
+
+        while self.pending is not None and not task.done():
+            await asyncio.sleep(0)
+        if not task.done():
+            if len(self.bufs[self.fill]):
+                self._swap()
+            self.closing = True
+            self.ready.set()
+        await task
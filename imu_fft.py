@@ -0,0 +1,164 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import math
+from array import array
+
+
+class Spectrum:
+    """ fixed-point real FFT of n (power of two) samples -- the n real samples are packed as n/2 complex points,
+    transformed in place by a radix-2 FFT with Q14 twiddles and split into n/2 bins. Inputs are shifted up to use
+    13 bits and every stage halves the values so they stay small ints, tables and work arrays are allocated once,
+    mag holds squared bin magnitudes """
+
+    Q = 14
+    CLIP = 8191
+
+    def __init__(self, n=256):
+        """ precompute the twiddle and bit reversal tables for an n point transform """
+
+        if n < 4 or n & (n - 1):
+            raise ValueError("n must be a power of two >= 4")
+        m = n // 2
+        self.n = n
+        self.cos = array('h', [int(round(math.cos(2 * math.pi * k / n) * (1 << Spectrum.Q))) for k in range(m)])
+        self.nsin = array('h', [int(round(-math.sin(2 * math.pi * k / n) * (1 << Spectrum.Q))) for k in range(m)])
+        self.rev = array('H', bytearray(2 * m))
+        for k in range(m):
+            r = 0
+            b = 1
+            while b < m:
+                r = r << 1 | (1 if k & b else 0)
+                b <<= 1
+            self.rev[k] = r
+        self.re = array('i', bytearray(4 * m))
+        self.im = array('i', bytearray(4 * m))
+        self.mag = array('i', bytearray(4 * m))
+        self.x = array('h', bytearray(2 * n))
+        self.scale = m
+
+    def run(self, x=None):
+        """ transform n samples of x (self.x by default) with the mean removed, returns mag where bin k of
+        n/2 is at k * rate / n Hz and sqrt(mag[k]) * scale is the |X[k]| of the unscaled transform """
+
+        x = self.x if x is None else x
+        n = self.n
+        m = n >> 1
+        re = self.re
+        im = self.im
+        rev = self.rev
+        lim = Spectrum.CLIP
+        q = Spectrum.Q
+
+        mean = 0
+        for i in range(n):
+            mean += x[i]
+        mean //= n
+        amp = 1
+        for i in range(n):
+            v = x[i] - mean
+            if v > amp:
+                amp = v
+            elif -v > amp:
+                amp = -v
+        shift = 0
+        while amp << (shift + 1) <= lim:
+            shift += 1
+        for k in range(m):
+            j = rev[k]
+            v = (x[2 * k] - mean) << shift
+            re[j] = lim if v > lim else -lim if v < -lim else v
+            v = (x[2 * k + 1] - mean) << shift
+            im[j] = lim if v > lim else -lim if v < -lim else v
+        self.scale = m / (1 << shift)
+
+        cos = self.cos
+        nsin = self.nsin
+        size = 2
+        while size <= m:
+            half = size >> 1
+            step = n // size
+            for k in range(half):
+                wr = cos[k * step]
+                wi = nsin[k * step]
+                for a in range(k, m, size):
+                    b = a + half
+                    br = re[b]
+                    bi = im[b]
+                    tr = (wr * br - wi * bi) >> q
+                    ti = (wr * bi + wi * br) >> q
+                    ar = re[a]
+                    ai = im[a]
+                    re[b] = (ar - tr) >> 1
+                    im[b] = (ai - ti) >> 1
+                    re[a] = (ar + tr) >> 1
+                    im[a] = (ai + ti) >> 1
+            size <<= 1
+
+        # split the n/2 point complex transform Z into the n point real transform X, X[k] = E[k] + W^k O[k]
+        mag = self.mag
+        for k in range(m):
+            k2 = (m - k) & (m - 1)
+            zr = re[k]
+            zi = im[k]
+            cr = re[k2]
+            ci = im[k2]
+            er = (zr + cr) >> 1
+            ei = (zi - ci) >> 1
+            orr = (zi + ci) >> 1
+            oi = (cr - zr) >> 1
+            wr = cos[k]
+            wi = nsin[k]
+            xr = er + ((wr * orr - wi * oi) >> q)
+            xi = ei + ((wr * oi + wi * orr) >> q)
+            mag[k] = xr * xr + xi * xi
+        return mag
+
+    def peak(self):
+        """ returns the bin of the largest magnitude above DC """
+
+        mag = self.mag
+        k = 1
+        for i in range(2, len(mag)):
+            if mag[i] > mag[k]:
+                k = i
+        return k
+
+    def bands(self, amp):
+        """ fold the bins into len(amp) equal bands, each the amplitude in input units of its largest bin, DC left
+        out -- returns the largest band """
+
+        mag = self.mag
+        per = len(mag) // len(amp)
+        k = 2 * self.scale / self.n
+        top = 0
+        for b in range(len(amp)):
+            m = 0
+            for i in range(b * per or 1, b * per + per):
+                if mag[i] > m:
+                    m = mag[i]
+            a = k * m ** 0.5
+            amp[b] = a
+            if a > top:
+                top = a
+        return top
@@ -0,0 +1,145 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import struct
+import sys
+from array import array
+
+from imu_buffer import ImuBuffer, CapFormat
+
+
+def read_cap(fn):
+    """ host side reader of a CapFormat capture, returns meta and a dict of columns as arrays --
+    ts as absolute epoch ms, the others in raw units to be multiplied by meta['scale'] """
+
+    with open(fn, "rb") as f:
+        data = f.read()
+
+    magic, version, size, rate, ncols, codes, *scale = struct.unpack_from(CapFormat.HEAD, data)
+    if magic != CapFormat.MAGIC or version != CapFormat.VERSION:
+        raise ValueError("{} is not an imu capture v{}".format(fn, CapFormat.VERSION))
+    names = ImuBuffer.COLS[:ncols]
+    codes = codes.decode()[:ncols]
+    cols = {k: array('q' if k == 'ts' else c) for k, c in zip(names, codes)}
+    swap = sys.byteorder == 'big'
+
+    o = size
+    bsize = struct.calcsize(CapFormat.BLOCK)
+    while o + bsize <= len(data):
+        n, enc, base = struct.unpack_from(CapFormat.BLOCK, data, o)
+        o += bsize
+        if enc == CapFormat.ZZV:
+            length, = struct.unpack_from('<I', data, o)
+            o += 4
+            if o + length > len(data):
+                raise ValueError("{} is truncated in a packed block".format(fn))
+            unzzv(data, o, n, names, cols, base)
+            o += length
+            continue
+        for k, c in zip(names, codes):
+            if k == 'ts':
+                c = 'H' if enc == CapFormat.TS_DELTA else 'i'
+            a = array(c)
+            nbytes = n * a.itemsize
+            if o + nbytes > len(data):
+                raise ValueError("{} is truncated in column {}".format(fn, k))
+            a.frombytes(data[o:o + nbytes])
+            o += nbytes
+            if swap:
+                a.byteswap()
+            if k == 'ts':
+                t = base
+                for v in a:
+                    t = t + v if enc == CapFormat.TS_DELTA else base + v
+                    cols[k].append(t)
+            else:
+                cols[k].extend(a)
+
+    meta = {'rate': rate, 'n': len(cols['ts']), 'cols': names, 'uom': ImuBuffer.UOM,
+            'scale': dict(zip(names, scale))}
+    return meta, cols
+
+
+def unzzv(data, o, n, names, cols, base):
+    """ decode n samples of each column from zigzag varint deltas at data[o], appending to cols """
+
+    for k in names:
+        col = cols[k]
+        v = 0
+        for i in range(n):
+            z = shift = 0
+            while True:
+                b = data[o]
+                o += 1
+                z |= (b & 0x7F) << shift
+                shift += 7
+                if b < 0x80:
+                    break
+            v += (z >> 1) ^ -(z & 1)
+            col.append(base + v if k == 'ts' else v)
+    return o
+
+
+def scaled(v, scale):
+    """ csv text of a raw value as written on the device -- ints unscaled, tenths etc divided out """
+
+    return str(v) if scale == 1 else str(v / round(1 / scale))
+
+
+def to_csv(fn, out):
+    """ convert a capture to csv in the same layout as Bos.imu_csv """
+
+    meta, cols = read_cap(fn)
+    names = meta['cols']
+    with open(out, "w") as f:
+        f.write("timestamp," + ",".join(names[1:]) + "\n")
+        for i in range(meta['n']):
+            f.write(",".join([str(cols['ts'][i])] + [scaled(cols[k][i], meta['scale'][k])
+                                                     for k in names[1:]]) + "\n")
+    return meta['n']
+
+
+def to_numpy(fn):
+    """ returns meta and a dict of scaled numpy arrays, numpy is only needed here """
+
+    import numpy as np
+
+    meta, cols = read_cap(fn)
+    out = {}
+    for k, v in cols.items():
+        if k == 'ts':
+            out[k] = np.asarray(v, dtype=np.int64)
+        else:
+            out[k] = np.asarray(v, dtype=np.float32) * meta['scale'][k]
+    return meta, out
+
+
+if __name__ == "__main__":
+    """ python imu_read.py capture.imc [out.csv] """
+
+    if len(sys.argv) < 2:
+        print("usage: python imu_read.py capture.imc [out.csv]")
+        sys.exit(1)
+    src = sys.argv[1]
+    dst = sys.argv[2] if len(sys.argv) > 2 else src.rsplit('.', 1)[0] + ".csv"
+    print("* {} samples from {} -> {}".format(to_csv(src, dst), src, dst))
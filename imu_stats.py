@@ -0,0 +1,139 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+from array import array
+
+
+class WindowStats:
+    """ streaming per channel mean, std, min, max, rms and peak over the last size samples, emitted every step
+    samples -- tumbling windows when step == size, sliding when step < size. Each sample is an O(1) update of
+    integer running sums and amortized O(1) monotonic queues for min/max, all state is preallocated """
+
+    CHANNELS = ('accl_x', 'accl_y', 'accl_z', 'gyro_x', 'gyro_y', 'gyro_z', 'temp')
+    FIELDS = ('mean', 'std', 'min', 'max', 'rms', 'peak')
+
+    def __init__(self, size, step=None, on_window=None):
+        """ on_window(self) is called with each window, read it from ts, mean, std, vmin, vmax, rms and peak """
+
+        nch = len(WindowStats.CHANNELS)
+        self.size = size
+        self.step = step or size
+        self.on_window = on_window
+        self.ring = [array('h', bytearray(2 * size)) for _ in range(nch)]
+        self.qmin = [array('i', bytearray(4 * size)) for _ in range(nch)]
+        self.qmax = [array('i', bytearray(4 * size)) for _ in range(nch)]
+        self.hmin = [0] * nch
+        self.tmin = [0] * nch
+        self.hmax = [0] * nch
+        self.tmax = [0] * nch
+        self.sum = [0] * nch
+        self.sumsq = [0] * nch
+        self.n = 0
+        self.windows = 0
+        self.ts = 0
+        self.mean = array('f', [0] * nch)
+        self.std = array('f', [0] * nch)
+        self.rms = array('f', [0] * nch)
+        self.vmin = array('h', [0] * nch)
+        self.vmax = array('h', [0] * nch)
+        self.peak = array('i', [0] * nch)
+
+    def append(self, ts, accl, gyro, temp):
+        """ sample source callback as Bos.imu_stream, temp is kept in tenths of deg F, returns True on a window """
+
+        self.ts = ts
+        return self.add(accl + gyro + (int(temp * 10),))
+
+    def add(self, vals):
+        """ add one sample of all channels, returns True when it completes a window """
+
+        i = self.n
+        size = self.size
+        k = i % size
+        for c, v in enumerate(vals):
+            ring = self.ring[c]
+            if i >= size:
+                old = ring[k]
+                self.sum[c] -= old
+                self.sumsq[c] -= old * old
+            ring[k] = v
+            self.sum[c] += v
+            self.sumsq[c] += v * v
+
+            # monotonic queues of sample numbers, front is the window min/max, the stale front is dropped first
+            q, h, t = self.qmin[c], self.hmin[c], self.tmin[c]
+            if t > h and q[h % size] <= i - size:
+                h += 1
+            while t > h and ring[q[(t - 1) % size] % size] >= v:
+                t -= 1
+            q[t % size] = i
+            t += 1
+            self.hmin[c], self.tmin[c] = h, t
+
+            q, h, t = self.qmax[c], self.hmax[c], self.tmax[c]
+            if t > h and q[h % size] <= i - size:
+                h += 1
+            while t > h and ring[q[(t - 1) % size] % size] <= v:
+                t -= 1
+            q[t % size] = i
+            t += 1
+            self.hmax[c], self.tmax[c] = h, t
+
+        self.n = i + 1
+        if self.n < size or (self.n - size) % self.step:
+            return False
+        self._emit()
+        return True
+
+    def _emit(self):
+        """ compute the window results from the running state """
+
+        size = self.size
+        for c in range(len(self.sum)):
+            s = self.sum[c]
+            mean = s / size
+            var = (self.sumsq[c] - s * mean) / size
+            self.mean[c] = mean
+            self.std[c] = var ** 0.5 if var > 0 else 0
+            self.rms[c] = (self.sumsq[c] / size) ** 0.5
+            self.vmin[c] = self.ring[c][self.qmin[c][self.hmin[c] % size] % size]
+            self.vmax[c] = self.ring[c][self.qmax[c][self.hmax[c] % size] % size]
+            self.peak[c] = max(self.vmax[c], -self.vmin[c])
+        self.windows += 1
+        if self.on_window:
+            self.on_window(self)
+
+    def header(self):
+        """ csv header of the summary records """
+
+        return "timestamp," + ",".join(["{}_{}".format(c, f) for c in WindowStats.CHANNELS
+                                        for f in WindowStats.FIELDS]) + "\n"
+
+    def csv_line(self):
+        """ the last window as a csv record """
+
+        vals = [str(self.ts)]
+        for c in range(len(self.sum)):
+            vals.append("{:.1f},{:.1f},{},{},{:.1f},{}".format(self.mean[c], self.std[c], self.vmin[c],
+                                                                self.vmax[c], self.rms[c], self.peak[c]))
+        return ",".join(vals) + "\n"
@@ -28,8 +28,16 @@ is extensively modified/extended by bachipeachy@gmail.com to add additional feat
 tested exclusively on M5Stack Core 2 Hardware. Software may be adopted for other hardware.
 The enhanced features include:
 1) Support for swipe gestures -- 'LEFT', 'RIGHT', 'UP' and 'DOWN' in addition to
-2) Support for touch gestures -- "TAP" and "HELD" gestures for a single touch opeqrtion
+2) Support for touch gestures -- "TAP", "DOUBLE_TAP" and "HOLD" gestures for a single touch opeqrtion
 3) Support for tunable parameters for various gestures to address granularity and speed of response.
+   Gestures are classified from ticks_ms timestamps of the stroke (class Gesture), so they do not
+   depend on how fast the caller polls. "HOLD" and "DRAG" are emitted while the finger is still down.
+4) Single read touch frames -- status and both point records are decoded from one I2C read
+   into preallocated point slots (tp_n, tp_x, tp_y, tp_id) without allocating per scan
+5) Hit test index -- btn locs are compressed into a grid of distinct edges so that one touch
+   sample resolves to its btn in O(1) via hit(), rebuilt by index_btns() whenever btns change
+6) Optional interrupt mode -- the FT6x36 INT pin queues touch samples into a preallocated ring buffer
+   so that idle loops can block in wait_touch() without any I2C traffic.
 
 Although, the FocalTouch FT-62XX advertizes support for multitouch, it seems, at least on
 M5Stack Core2 test hardware multi-touch (two finger gestures) does not work satisfatorily as a
@@ -39,6 +47,8 @@ The multitouch sensor seems to work correctly for changes in 'y' co-ordinates bu
 
 import math
 import struct
+import time
+from array import array
 
 from micropython import const
 
@@ -50,16 +60,165 @@ _FT6XXX_REG_POINTRATE = const(0x88)
 _FT6XXX_REG_LIBH = const(0xA1)
 _FT6XXX_REG_LIBL = const(0xA2)
 _FT6XXX_REG_CHIPID = const(0xA3)
+_FT6XXX_REG_GMODE = const(0xA4)
 _FT6XXX_REG_FIRMVERS = const(0xA6)
 _FT6XXX_REG_VENDID = const(0xA8)
 _FT6XXX_REG_RELEASE = const(0xAF)
+_FT6XXX_GMODE_TRIGGER = const(0x01)
+_FT6XXX_FRAME_SIZE = const(15)
+_MAX_X = const(320)
+_MAX_Y = const(280)
+_NO_BTN = const(0xFF)
+
+
+class Gesture:
+    """ time based single touch gesture recognizer fed one timestamped sample at a time """
+
+    TAP = "TAP"
+    DOUBLE_TAP = "DOUBLE_TAP"
+    HOLD = "HOLD"
+    DRAG = "DRAG"
+
+    def __init__(self, hold_ms=500, double_ms=300, drag_px=8, delta_x_th=32, delta_y_th=24, debug=False):
+
+        self.hold_ms = hold_ms
+        self.double_ms = double_ms
+        self.drag_px = drag_px
+        self.delta_x_th = delta_x_th
+        self.delta_y_th = delta_y_th
+        self.debug = debug
+
+        # stroke state -- start, current and last reported drag point
+        self.down = False
+        self.held = False
+        self.dragging = False
+        self.t0 = 0
+        self.x0 = 0
+        self.y0 = 0
+        self.x = 0
+        self.y = 0
+        self.lx = 0
+        self.ly = 0
+        self.ms = 0
+        self.speed = 0
+
+        # last tap, a second tap close to it within double_ms is a "DOUBLE_TAP"
+        self.tap_t = None
+        self.tap_x = 0
+        self.tap_y = 0
+
+    def reset(self):
+        """ forget the stroke in progress and the last tap """
+
+        self.down = False
+        self.held = False
+        self.dragging = False
+        self.tap_t = None
+
+    def feed(self, n, x, y, t):
+        """ returns 'TAP', 'DOUBLE_TAP', 'HOLD', 'DRAG', a swipe 'LEFT', 'RIGHT', 'UP', 'DOWN' or None """
+
+        if n:
+            if not self.down:
+                self.down = True
+                self.held = False
+                self.dragging = False
+                self.t0 = t
+                self.x0 = self.lx = self.x = x
+                self.y0 = self.ly = self.y = y
+                self.ms = 0
+                return None
+
+            self.x = x
+            self.y = y
+            self.ms = time.ticks_diff(t, self.t0)
+            if abs(x - self.lx) >= self.drag_px or abs(y - self.ly) >= self.drag_px:
+                self.lx = x
+                self.ly = y
+                self.dragging = True
+                return Gesture.DRAG
+            if not self.dragging and not self.held and self.ms >= self.hold_ms:
+                self.held = True
+                if self.debug:
+                    print("* HOLD -- because {}ms is greater than {}ms".format(self.ms, self.hold_ms))
+                return Gesture.HOLD
+            return None
+
+        if not self.down:
+            return None
+        self.down = False
+        self.ms = time.ticks_diff(t, self.t0)
+        if self.held:
+            return None
+
+        dx = abs(self.x - self.x0)
+        dy = abs(self.y - self.y0)
+        if dx > self.delta_x_th or dy > self.delta_y_th:
+            self.speed = int(math.sqrt(dx * dx + dy * dy) * 1000 / max(self.ms, 1))
+            vector = self._vector(self._angle())
+            if self.debug and vector != "IGNORE":
+                print("* {} swipe @{}px/s -- because dx:{}>{} OR dy:{}>{}".format(
+                    vector, self.speed, dx, self.delta_x_th, dy, self.delta_y_th))
+            return vector
+
+        # a stroke that dragged and ended short of a swipe was a drag, not a tap
+        if self.dragging:
+            return None
+
+        if (self.tap_t is not None and time.ticks_diff(self.t0, self.tap_t) <= self.double_ms
+                and abs(self.x0 - self.tap_x) <= self.delta_x_th and abs(self.y0 - self.tap_y) <= self.delta_y_th):
+            self.tap_t = None
+            if self.debug:
+                print("* DOUBLE_TAP -- second tap within {}ms".format(self.double_ms))
+            return Gesture.DOUBLE_TAP
+
+        self.tap_t = t
+        self.tap_x = self.x0
+        self.tap_y = self.y0
+        if self.debug:
+            print("* TAP -- released after {}ms".format(self.ms))
+        return Gesture.TAP
+
+    def _angle(self):
+        """ returns angle of swipe 0 - 360 range """
+
+        rad = math.atan2(self.y0 - self.y, self.x - self.x0) + 3.14
+        deg = int((rad * 180 / 3.14 + 180) % 360)
+        if self.debug:
+            print("* swipe angle: {}".format(deg))
+        return deg
+
+    @staticmethod
+    def _vector(deg):
+        """
+        returns computed direction of swap
+        acknowledgement: algoithm explained in https://stackoverflow.com/questions/13095494/
+        """
+
+        up = range(45, 135)
+        left = range(135, 225)
+        down = range(225, 315)
+        right1 = range(315, 360)
+        right2 = range(0, 45)
+
+        if deg in up:
+            return "UP"
+        elif deg in left:
+            return "LEFT"
+        elif deg in down:
+            return "DOWN"
+        elif deg in right1 or deg in right2:
+            return "RIGHT"
+        else:
+            return "IGNORE"
 
 
 class FocalTouch:
     """ 'single touch gestures' driver for M5Stack Focaltouch capacitive touch sensor """
 
     def __init__(self, i2c, btns, address=_FT6206_DEFAULT_I2C_ADDR, debug=False,
-                 touched_th=25, held_th=250, delta_x_th=32, delta_y_th=24):
+                 hold_ms=500, double_ms=300, drag_px=8, delta_x_th=32, delta_y_th=24,
+                 irq_pin=None, qsize=32, release_ms=60):
 
         self.i2c = i2c
         if btns is None:
@@ -69,10 +228,7 @@ class FocalTouch:
         self.address = address
         self.debug = debug
 
-        self.touched_th = touched_th
-        self.held_th = held_th
-        self.delta_x_th = delta_x_th
-        self.delta_y_th = delta_y_th
+        self.gesture = Gesture(hold_ms, double_ms, drag_px, delta_x_th, delta_y_th, debug)
 
         chip_data = self._read(_FT6XXX_REG_LIBH, 8)
         lib_ver, chip_id, _, _, firm_id, _, vend_id = struct.unpack(">HBBBBBB", chip_data)
@@ -95,6 +251,187 @@ class FocalTouch:
             print("Thresh %d" % self._read(_FT6XXX_REG_THRESHHOLD, 1)[0])
             print("* touch screen chip type is ", self.chip)
 
+        # reusable frame buffer (regs 0x00-0x0E) and the decoded point slots
+        self._frame = bytearray(_FT6XXX_FRAME_SIZE)
+        self.tp_n = 0
+        self.tp_t = 0
+        self.tp_x = array('H', [0, 0])
+        self.tp_y = array('H', [0, 0])
+        self.tp_id = array('B', [0, 0])
+
+        self.index_btns()
+
+        self.irq_pin = irq_pin
+        self.release_ms = release_ms
+        self.dropped = 0
+        if irq_pin is not None:
+            self._arm_irq(qsize)
+
+    @staticmethod
+    def _edges(spans, limit):
+        """ returns a bytearray mapping each pixel 0..limit to the index of its elementary interval """
+
+        cuts = sorted(set([c for c in spans if 0 < c <= limit]))
+        pix = bytearray(limit + 1)
+        j = 0
+        for p in range(limit + 1):
+            while j < len(cuts) and cuts[j] <= p:
+                j += 1
+            pix[p] = j
+        return pix, len(cuts) + 1
+
+    def index_btns(self):
+        """ build the hit test index over self.btns -- call again whenever btns are added, removed or moved """
+
+        self._hkeys = [k for k in self.btns.keys()]
+        locs = [self.btns[k]['loc'] for k in self._hkeys]
+        if len(locs) >= _NO_BTN:
+            raise ValueError("too many btns to index")
+
+        # btn edges are inclusive (see touch_detected), so each span ends one pixel past x + w
+        self._hx, ncols = self._edges([c for l in locs for c in (l[0], l[0] + l[2] + 1)], _MAX_X)
+        self._hy, nrows = self._edges([c for l in locs for c in (l[1], l[1] + l[3] + 1)], _MAX_Y)
+        self._hcols = ncols
+        self._hcells = bytearray([_NO_BTN] * (ncols * nrows))
+
+        # fill in reverse so that the first btn in dict order wins on shared edges
+        for i in range(len(locs) - 1, -1, -1):
+            l = locs[i]
+            c0 = self._hx[min(l[0], _MAX_X)]
+            c1 = self._hx[min(l[0] + l[2], _MAX_X)]
+            r0 = self._hy[min(l[1], _MAX_Y)]
+            r1 = self._hy[min(l[1] + l[3], _MAX_Y)]
+            for r in range(r0, r1 + 1):
+                for c in range(c0, c1 + 1):
+                    self._hcells[r * ncols + c] = i
+        if self.debug:
+            print("* indexed {} btns into {}x{} cells".format(len(locs), ncols, nrows))
+
+    def hit(self, x, y):
+        """ returns the btn key under x, y or None """
+
+        if x > _MAX_X or y > _MAX_Y:
+            return None
+        i = self._hcells[self._hy[y] * self._hcols + self._hx[x]]
+        if i == _NO_BTN:
+            return None
+        return self._hkeys[i]
+
+    def hit_btn(self):
+        """ returns the btn key under the current touch sample or None when not touched """
+
+        if not self._sample():
+            return None
+        return self.hit(self.tp_x[0], self.tp_y[0])
+
+    def _arm_irq(self, qsize):
+        """ preallocate the sample ring buffer, put the chip in trigger mode and attach the INT handler """
+
+        self._qsize = qsize
+        self._qt = array('i', [0] * qsize)
+        self._qn = array('B', [0] * qsize)
+        self._qx = array('H', [0] * qsize)
+        self._qy = array('H', [0] * qsize)
+        self._qhead = 0
+        self._qtail = 0
+        self._irqbuf = bytearray(7)
+
+        # INT pulses low once per report instead of staying low while touched
+        self._write(_FT6XXX_REG_GMODE, [_FT6XXX_GMODE_TRIGGER])
+        self.irq_pin.irq(trigger=self.irq_pin.IRQ_FALLING, handler=self._isr)
+        if self.debug:
+            print("* touch irq armed on {} with {} sample queue".format(self.irq_pin, qsize))
+
+    def _isr(self, pin):
+        """ soft irq handler -- read status and point 0 into the ring buffer, dropping the oldest when full """
+
+        self.i2c.readfrom_mem_into(self.address, _FT6XXX_REG_DATA, self._irqbuf)
+        buf = self._irqbuf
+        n = buf[2] & 0x0F
+        if n > 2:
+            n = 0
+        i = self._qhead
+        self._qt[i] = time.ticks_ms()
+        self._qn[i] = n
+        self._qx[i] = (buf[3] & 0x0F) << 8 | buf[4]
+        self._qy[i] = (buf[5] & 0x0F) << 8 | buf[6]
+        i = (i + 1) % self._qsize
+        if i == self._qtail:
+            self._qtail = (self._qtail + 1) % self._qsize
+            self.dropped += 1
+        self._qhead = i
+
+    @property
+    def touch_pending(self):
+        """ returns the number of queued INT samples not yet consumed """
+
+        if self.irq_pin is None:
+            return 0
+        return (self._qhead - self._qtail) % self._qsize
+
+    def wait_touch(self, timeout_ms=None):
+        """ block until a touch sample is queued, returns False on timeout -- never blocks without an irq_pin """
+
+        if self.irq_pin is None:
+            return True
+        t0 = time.ticks_ms()
+        while self._qhead == self._qtail:
+            if timeout_ms is not None and time.ticks_diff(time.ticks_ms(), t0) >= timeout_ms:
+                return False
+            time.sleep_ms(1)
+        return True
+
+    def next_sample(self):
+        """ consume the oldest queued sample, returns its touch count or None if the queue is empty """
+
+        if self.irq_pin is None or self._qhead == self._qtail:
+            return None
+        i = self._qtail
+        self.tp_n = self._qn[i]
+        self.tp_t = self._qt[i]
+        self.tp_x[0] = self._qx[i]
+        self.tp_y[0] = self._qy[i]
+        self.tp_id[0] = 0
+        self._qtail = (i + 1) % self._qsize
+        return self.tp_n
+
+    def read_frame(self):
+        """ read status and both point records in one transaction into the point slots, returns touch count """
+
+        self.i2c.readfrom_mem_into(self.address, _FT6XXX_REG_DATA, self._frame)
+        self.tp_t = time.ticks_ms()
+        buf = self._frame
+        n = buf[2] & 0x0F
+        if n > 2:
+            n = 0
+        s = 0
+        while s < n:
+            o = 3 + 6 * s
+            self.tp_x[s] = (buf[o] & 0x0F) << 8 | buf[o + 1]
+            self.tp_y[s] = (buf[o + 2] & 0x0F) << 8 | buf[o + 3]
+            self.tp_id[s] = buf[o + 2] >> 4
+            s += 1
+        self.tp_n = n
+        return n
+
+    def _sample(self):
+        """ refresh the point slots -- a bus read when polling, the consumed INT sample otherwise """
+
+        if self.irq_pin is None:
+            return self.read_frame()
+        return self.tp_n
+
+    def _advance(self):
+        """ step to the next sample of a stroke -- a missing report within release_ms counts as a lift """
+
+        if self.irq_pin is None:
+            return self.read_frame()
+        if self.wait_touch(self.release_ms):
+            return self.next_sample()
+        self.tp_n = 0
+        self.tp_t = time.ticks_ms()
+        return 0
+
     def _read(self, reg, length):
         """ returns an array of 'length' bytes from the 'register' """
 
@@ -110,103 +447,62 @@ class FocalTouch:
         self.i2c.writeto_mem(self.address, reg, bytes(values))
         # print("from _write reg#{} -> {}".format(reg, [i for i in values]))
 
-    def _endpoints(self):
-        """ returns scan cycle count and two end points of a single touch/hold/swipe action """
-
-        e_pts = [None, None]
-        ep = None
-        scans = 0
+    def expire(self):
+        """ INT mode -- a stroke without reports for release_ms has lifted, returns True and sets the point slots
+        to a lift when it has """
 
-        try:
-            while self.touch_count:
-                ep = self.touch_points[0]
-                if scans == 0:
-                    e_pts[0] = ep
-                scans = scans + 1
+        if self.irq_pin is None or not self.gesture.down:
+            return False
+        if time.ticks_diff(time.ticks_ms(), self.tp_t) < self.release_ms:
+            return False
+        self.tp_n = 0
+        self.tp_t = time.ticks_ms()
+        return True
 
-        except IndexError as e:
-            # print("{} -- ignoring '_endpoints' nuisance error".format(e))
-            pass
-
-        if ep is not None:
-            e_pts[1] = ep
-
-        return scans, e_pts
-
-    def _angle(self, e_pts):
-        """ returns angle of swipe 0 - 360 range """
-
-        if e_pts[0]['id'] == e_pts[1]['id'] == 0:
-            x1 = e_pts[0]['x']
-            y1 = e_pts[0]['y']
-            x2 = e_pts[1]['x']
-            y2 = e_pts[1]['y']
-            rad = math.atan2(y1 - y2, x2 - x1) + 3.14
-            deg = int((rad * 180 / 3.14 + 180) % 360)
-            if self.debug:
-                print("* swipe angle: {}".format(deg))
-            return deg
-
-    @staticmethod
-    def _vector(deg):
-        """
-        returns computed direction of swap
-        acknowledgement: algoithm explained in https://stackoverflow.com/questions/13095494/
-        """
-
-        up = range(45, 135)
-        left = range(135, 225)
-        down = range(225, 315)
-        right1 = range(315, 360)
-        right2 = range(0, 45)
+    def poll_gesture(self):
+        """ non blocking -- feed the next sample to the gesture engine and return its event, 'DRAG' included """
 
-        if deg in up:
-            return "UP"
-        elif deg in left:
-            return "LEFT"
-        elif deg in down:
-            return "DOWN"
-        elif deg in right1 or deg in right2:
-            return "RIGHT"
+        if self.irq_pin is None:
+            n = self.read_frame()
         else:
-            return "IGNORE"
+            n = self.next_sample()
+            if n is None:
+                if not self.expire():
+                    return None
+                n = 0
+        return self.gesture.feed(n, self.tp_x[0], self.tp_y[0], self.tp_t)
+
+    def poll_btn(self):
+        """ non blocking btn_gesture -- returns the gestured btn once the engine classifies its stroke """
+
+        ges = self.poll_gesture()
+        if ges is None or ges == Gesture.DRAG or ges == "IGNORE":
+            return None
+        k = self.hit(self.gesture.x0, self.gesture.y0)
+        if k is None:
+            return None
+        btn = {k: {'loc': self.btns[k]['loc'], 'action': ges}}
+        print("# gestured -> {}".format(btn))
+        return btn
 
     def _gesture(self):
-        """ returns gesture action type -- 'TAP', 'HOLD', 'LEFT', 'RIGHT', 'UP', 'DOWN','IGNORE' or 'NONE'  """
-
-        scans, e_pts = self._endpoints()
-
-        if e_pts[0] is not None:
-
-            dx = abs(e_pts[0]['x'] - e_pts[1]['x'])
-            dy = abs(e_pts[0]['y'] - e_pts[1]['y'])
-
-            if dx > self.delta_x_th or dy > self.delta_y_th:
-                deg = self._angle(e_pts)
-                vector = self._vector(deg)
-                if self.debug and vector is not "IGNORE":
-                    print("* {} swipe -- because dx:{}>{} OR dy:{}>{}".format(
-                        vector, dx, self.delta_x_th, dy, self.delta_y_th))
-                return vector
-
-            elif scans > self.held_th:
-                if self.debug:
-                    print("* HOLD -- because {} is greater than {},"
-                          "checking for swipe indicated by dx:{}<{} and dy:{}<{}"
-                          .format(scans, self.held_th, dx, self.delta_x_th, dy, self.delta_y_th))
-                return "HOLD"
-
-            elif scans > self.touched_th:
-                if self.debug:
-                    print("* TAP -- because {} is in between {} and {}".format(
-                        scans, self.touched_th, self.held_th))
-                return "TAP"
+        """ returns gesture action type -- 'TAP', 'DOUBLE_TAP', 'HOLD', 'LEFT', 'RIGHT', 'UP', 'DOWN', 'IGNORE'
+        or None once the finger is lifted without one, 'HOLD' is returned while the finger is still down """
+
+        n = self._sample()
+        while True:
+            ges = self.gesture.feed(n, self.tp_x[0], self.tp_y[0], self.tp_t)
+            if ges is not None and ges != Gesture.DRAG:
+                return ges
+            if not n:
+                return None
+            n = self._advance()
 
     @property
     def touch_count(self):
         """ returns single finger touch =1, two finger touch = 2 and no touch detected = 0  """
 
-        return self._read(_FT6XXX_REG_NUMTOUCHES, 1)[0]
+        return self._sample()
 
     @property
     def touch_points(self):
@@ -215,50 +511,33 @@ class FocalTouch:
         touch coordinates, and 'id' as the touch # for multitouch tracking
         """
 
-        touchpoints = []
-        data = self._read(_FT6XXX_REG_DATA, 32)
-
-        for i in range(2):
-            point_data = data[i * 6 + 3: i * 6 + 9]
-            if all([i == 0xFF for i in point_data]):
-                continue
-            # print([hex(i) for i in point_data])
-            x, y, weight, misc = struct.unpack(">HHBB", point_data)
-            # print(x, y, weight, misc)
-            touch_id = y >> 12
-            x &= 0xFFF
-            y &= 0xFFF
-            point = {"x": x, "y": y, "id": touch_id}
-            touchpoints.append(point)
-        return touchpoints
+        n = self._sample()
+        return [{"x": self.tp_x[i], "y": self.tp_y[i], "id": self.tp_id[i]} for i in range(n)]
         
     def touch_detected(self, loc=(0, 0, 320, 240)):
         """ return True/False/None if a single touch is detected within the specified loc """
 
-        x, y = None, None
-
-        try:
-            x = self.touch_points[0]['x']
-            y = self.touch_points[0]['y']
+        if not self._sample():
+            return None
 
-            if (loc[0] <= x <= loc[0] + loc[2]
-                    and loc[1] <= y <= loc[1] + loc[3]):
-                return True
-            else:
-                return False
-
-        except IndexError as e:
-            # print("{} -- ignoring 'loc_touched' nuisance error".format(e))
-            pass
+        x = self.tp_x[0]
+        y = self.tp_y[0]
+        if (loc[0] <= x <= loc[0] + loc[2]
+                and loc[1] <= y <= loc[1] + loc[3]):
+            return True
+        else:
+            return False
 
     def btn_gesture(self):
         """ returns the touched btn from a dict of btns with gesture 'action' added"""
 
-        for k, v in self.btns.items():
-            if self.touch_detected(v['loc']):
-                ges = self._gesture()
-                if ges is not None and ges is not "IGNORE":
-                    btn = {k: {'loc': v['loc'], 'action': ges}}
-                    print("# gestured -> {}".format(btn))
-                    return btn
+        if self.irq_pin is not None and self.next_sample() is None:
+            return None
+        k = self.hit_btn()
+        if k is not None:
+            ges = self._gesture()
+            if ges is not None and ges != "IGNORE":
+                btn = {k: {'loc': self.btns[k]['loc'], 'action': ges}}
+                print("# gestured -> {}".format(btn))
+                return btn
         return None
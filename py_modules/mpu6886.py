@@ -29,6 +29,7 @@ SOFTWARE.
 import sys
 import ustruct
 import utime
+from array import array
 from micropython import const
 
 
@@ -39,21 +40,58 @@ class MPU6886:
     SELF_TEST_X_ACCEL = const(13)
     SELF_TEST_Y_ACCEL = const(14)
     SELF_TEST_Z_ACCEL = const(15)
+    SMPLRT_DIV = const(25)
+    CONFIG = const(26)
     GYRO_CONFIG = const(27)
     ACCEL_CONFIG = const(28)
+    ACCEL_CONFIG2 = const(29)
+    ACCEL_WOM_X_THR = const(32)
+    ACCEL_WOM_Y_THR = const(33)
+    ACCEL_WOM_Z_THR = const(34)
+    FIFO_EN = const(35)
+    INT_PIN_CFG = const(55)
+    INT_ENABLE = const(56)
+    INT_STATUS = const(58)
     ACCEL_XOUT_H = const(59)
     TEMP_OUT_H = const(65)
     GYRO_XOUT_H = const(67)
     SELF_TEST_X_GYRO = const(80)
     SELF_TEST_Y_GYRO = const(81)
     SELF_TEST_Z_GYRO = const(82)
+    ACCEL_INTEL_CTRL = const(105)
+    USER_CTRL = const(106)
     PWR_MGMT_1 = const(107)
+    FIFO_COUNTH = const(114)
+    FIFO_R_W = const(116)
     WHO_AM_I = const(117)
+
+    # FIFO -- 1KB holding 14 byte packets of accel, temperature and gyro in register order
+    FIFO_SIZE = const(1024)
+    FIFO_PACKET = const(14)
     
     # in use register mask
     GYRO_STANDBY = b'\x10'
     CLKSEL = b'\x01'
     
+    # CONFIG register masks -- stop writing when the FIFO is full so packets stay aligned
+    FIFO_MODE_STOP = 0x40
+
+    # FIFO_EN and USER_CTRL register masks
+    FIFO_ACCEL_GYRO = b'\x18'
+    FIFO_OFF = b'\x00'
+    USER_FIFO_EN = b'\x40'
+    USER_FIFO_RST = b'\x04'
+
+    # INT_ENABLE and INT_STATUS bits
+    INT_WOM = 0xE0
+    INT_FIFO_OFLOW = 0x10
+    INT_DATA_RDY = 0x01
+
+    # INT_PIN_CFG active high push-pull held until INT_STATUS is read, ACCEL_INTEL_CTRL compare to previous sample
+    INT_LATCH = b'\x20'
+    WOM_ON = b'\xc0'
+    OFF = b'\x00'
+
     # GYRO_CONFIG register masks
     FS_250DPS = b'\x00'
     FS_500DPS = b'\x08'
@@ -133,6 +171,20 @@ class MPU6886:
         if self.imuparms['debug']:
             print("* set gyro dial@ {} dps/s".format(self.imuparms['gyro_dial']))
         
+        # reusable buffers for burst reads of accel, temperature and gyro regs 59-72 and bulk FIFO reads
+        self._burst = bytearray(MPU6886.FIFO_PACKET)
+        self._raw = array('h', [0] * 7)
+        self._fifo = bytearray(MPU6886.FIFO_PACKET * 8)
+        self._count = bytearray(2)
+        self.fifo_period = 0
+        self.fifo_overflows = 0
+        self._fifo_ts = 0
+        self._status = bytearray(1)
+        self.int_pin = None
+        self.int_flags = 0
+        self.int_count = 0
+        self.int_ms = 0
+
         # save factoy trim for self test
         self.imuparms['accel_ft'] = self._ft(sensor='accel')
         self.imuparms['gyro_ft'] = self._ft(sensor='gyro')
@@ -153,7 +205,7 @@ class MPU6886:
 
         if val is not None:
             self.i2c.writeto_mem(self.imuparms['address'], r, val)
-        utime.sleep_ms(1)
+            utime.sleep_ms(1)
         byt = self.i2c.readfrom_mem(self.imuparms['address'], r, nbytes)
         if nbytes == 6:
             byt = ustruct.unpack(">hhh", byt)
@@ -194,6 +246,167 @@ class MPU6886:
             print("  gyro -> {} @fs = {} dps".format(gyro, self.imuparms['gyro_dial']))
         return gyro
 
+    def read_raw(self):
+        """ burst read regs 59-72 in one transaction, returns a reused array of raw counts
+        in register order -- accel x, y, z, temperature, gyro x, y, z """
+
+        self.i2c.readfrom_mem_into(self.imuparms['address'], MPU6886.ACCEL_XOUT_H, self._burst)
+        return self._decode(self._burst, 0)
+
+    def _decode(self, buf, o):
+        """ decode the 14 byte packet at buf[o] into the reused raw array """
+
+        raw = self._raw
+        for i in range(7):
+            v = buf[o + 2 * i] << 8 | buf[o + 2 * i + 1]
+            raw[i] = v - 0x10000 if v & 0x8000 else v
+        return raw
+
+    def read_all(self):
+        """ returns accel (mG), gyro (deg/sec) and temperature (deg F) from a single burst read,
+        scaled as the accel, gyro and temperature properties """
+
+        return self.scale(self.read_raw())
+
+    def scale(self, raw):
+        """ returns accel (mG), gyro (deg/sec) and temperature (deg F) scaled from raw counts """
+
+        a = self.imuparms['accel_dial']
+        g = self.imuparms['gyro_dial']
+        accel = (int(a * raw[0] / 32768), int(a * raw[1] / 32768), int(a * raw[2] / 32768))
+        gyro = (int(g * raw[4] / 32768), int(g * raw[5] / 32768), int(g * raw[6] / 32768))
+        t = round(((1.8 * ((raw[3] / MPU6886.TEMP_SO) + MPU6886.TEMP_OFFSET)) + 32), 1)
+        if self.imuparms['debug']:
+            print("  burst -> accl {} mG, gyro {} dps, temp {} F".format(accel, gyro, t))
+        return accel, gyro, t
+
+    def fifo_start(self, rate=100, dlpf=1):
+        """ stream accel, temperature and gyro into the FIFO at rate Hz (4-1000) through DLPF setting dlpf (1-6),
+        returns the actual rate -- the internal 1kHz sample clock is divided by 1 + SMPLRT_DIV """
+
+        div = min(max(1000 // rate - 1, 0), 255)
+        self.fifo_period = 1000 * (1 + div)
+        self.reg(MPU6886.FIFO_EN, MPU6886.FIFO_OFF)
+        self.reg(MPU6886.CONFIG, bytes([MPU6886.FIFO_MODE_STOP | (dlpf & 0x07)]))
+        self.reg(MPU6886.ACCEL_CONFIG2, bytes([dlpf & 0x07]))
+        self.reg(MPU6886.SMPLRT_DIV, bytes([div]))
+        self.reg(MPU6886.USER_CTRL, MPU6886.USER_FIFO_RST)
+        self.reg(MPU6886.USER_CTRL, MPU6886.USER_FIFO_EN)
+        self.reg(MPU6886.FIFO_EN, MPU6886.FIFO_ACCEL_GYRO)
+        self._fifo_ts = utime.ticks_add(utime.ticks_us(), -self.fifo_period)
+        self.fifo_overflows = 0
+        if self.imuparms['debug']:
+            print("* FIFO streaming @ {} Hz, dlpf {}".format(1000 // (1 + div), dlpf))
+        return 1000 // (1 + div)
+
+    def fifo_stop(self):
+        """ stop streaming and disable the FIFO """
+
+        self.reg(MPU6886.FIFO_EN, MPU6886.FIFO_OFF)
+        self.reg(MPU6886.USER_CTRL, MPU6886.USER_FIFO_RST)
+        self.fifo_period = 0
+
+    def fifo_count(self):
+        """ returns number of bytes waiting in the FIFO """
+
+        b = self._count
+        self.i2c.readfrom_mem_into(self.imuparms['address'], MPU6886.FIFO_COUNTH, b)
+        return (b[0] & 0x1F) << 8 | b[1]
+
+    def fifo_read(self):
+        """ generator draining the packets waiting in the FIFO with bulk reads, yields (ts, raw) per sample where
+        ts is a utime.ticks_us() reconstructed from the sample period and raw is the reused raw array.
+        A full FIFO has dropped samples -- it is drained and reset, and fifo_overflows is counted """
+
+        count = self.fifo_count()
+        n = count // MPU6886.FIFO_PACKET
+        if not n:
+            return
+        now = utime.ticks_us()
+        full = count + MPU6886.FIFO_PACKET > MPU6886.FIFO_SIZE
+        if full:
+            # the samples kept are the oldest ones, continue on from the last sample drained
+            self.fifo_overflows += 1
+            ts = utime.ticks_add(self._fifo_ts, self.fifo_period)
+        else:
+            # the newest sample was taken within the last period, count back from now unless that lands within a
+            # period of the sample following the last one drained -- then the stream simply continues from it
+            ts = utime.ticks_add(now, -(n - 1) * self.fifo_period)
+            if utime.ticks_diff(ts, self._fifo_ts) < 2 * self.fifo_period:
+                ts = utime.ticks_add(self._fifo_ts, self.fifo_period)
+
+        mv = memoryview(self._fifo)
+        chunk = len(self._fifo) // MPU6886.FIFO_PACKET
+        while n:
+            k = min(n, chunk)
+            self.i2c.readfrom_mem_into(self.imuparms['address'], MPU6886.FIFO_R_W, mv[:k * MPU6886.FIFO_PACKET])
+            for i in range(k):
+                self._fifo_ts = ts
+                yield ts, self._decode(self._fifo, i * MPU6886.FIFO_PACKET)
+                ts = utime.ticks_add(ts, self.fifo_period)
+            n -= k
+
+        if full:
+            self.reg(MPU6886.USER_CTRL, MPU6886.USER_FIFO_RST)
+            self.reg(MPU6886.USER_CTRL, MPU6886.USER_FIFO_EN)
+
+    def int_enable(self, data_ready=False, wom_mg=None, pin=None):
+        """ raise INT on data ready and/or wake on motion when any axis changes by wom_mg (4-1020 mG) between
+        samples, latched until INT_STATUS is read. With pin (the GPIO wired to INT) a soft irq collects the flags,
+        otherwise int_poll reads INT_STATUS """
+
+        en = 0
+        if data_ready:
+            en |= MPU6886.INT_DATA_RDY
+        if wom_mg is not None:
+            thr = bytes([min(max(wom_mg // 4, 1), 255)])
+            self.reg(MPU6886.ACCEL_WOM_X_THR, thr)
+            self.reg(MPU6886.ACCEL_WOM_Y_THR, thr)
+            self.reg(MPU6886.ACCEL_WOM_Z_THR, thr)
+            self.reg(MPU6886.ACCEL_INTEL_CTRL, MPU6886.WOM_ON)
+            en |= MPU6886.INT_WOM
+        self.reg(MPU6886.INT_PIN_CFG, MPU6886.INT_LATCH)
+        self.reg(MPU6886.INT_ENABLE, bytes([en]))
+        self.reg(MPU6886.INT_STATUS)
+        self.int_flags = 0
+        self.int_count = 0
+        self.int_pin = pin
+        if pin is not None:
+            pin.irq(trigger=pin.IRQ_RISING, handler=self._isr)
+        if self.imuparms['debug']:
+            print("* imu INT enabled {:#04x} wom {} mG on {}".format(en, wom_mg, pin))
+
+    def int_disable(self):
+        """ stop raising INT and detach the irq handler """
+
+        self.reg(MPU6886.INT_ENABLE, MPU6886.OFF)
+        self.reg(MPU6886.ACCEL_INTEL_CTRL, MPU6886.OFF)
+        if self.int_pin is not None:
+            self.int_pin.irq(handler=None)
+            self.int_pin = None
+
+    def _isr(self, pin):
+        """ soft irq handler -- read INT_STATUS, which releases INT, and keep its flags """
+
+        self.i2c.readfrom_mem_into(self.imuparms['address'], MPU6886.INT_STATUS, self._status)
+        self.int_flags |= self._status[0]
+        self.int_count += 1
+        self.int_ms = utime.ticks_ms()
+
+    def int_poll(self, mask=0xFF):
+        """ returns and clears the flags in mask raised since the last call, reading INT_STATUS
+        only when no INT pin is attached """
+
+        if self.int_pin is None:
+            self.i2c.readfrom_mem_into(self.imuparms['address'], MPU6886.INT_STATUS, self._status)
+            if self._status[0]:
+                self.int_flags |= self._status[0]
+                self.int_count += 1
+                self.int_ms = utime.ticks_ms()
+        f = self.int_flags & mask
+        self.int_flags &= ~mask
+        return f
+
     def _ft(self, sensor):
         """ returns factory trim values as a 3-int tuple for self test in UOM og mg or dps """
         dial = None
@@ -28,6 +28,7 @@ as a learning excercise.
 """
 
 import time
+from array import array
 
 from machine import SoftSPI, Pin
 from micropython import const
@@ -38,22 +39,34 @@ _CMD_TIMEOUT = const(1000)
 _TOKEN_DATA = const(0xFE)
 _TOKEN_CMD25 = const(0xFC)
 _TOKEN_STOP_TRAN = const(0xFD)
+_INIT_BAUDRATE = const(500000)
 
 
 class SDCard:
 
-    def __init__(self, spi=SoftSPI(sck=Pin(18), mosi=Pin(23), miso=Pin(38)), cs=Pin(4), debug=False):
+    crc_table = None
+
+    def __init__(self, spi=None, cs=None, debug=False, max_baudrate=None):
         """
         get ready to read/write, the default Pins are set up for M5Stack Core2 hardware
+        max_baudrate -- negotiate the fastest clock up to it after each init, otherwise stay at 500 kHz
         """
-        self.spi = spi
-        self.cs = cs
+        self.spi = SoftSPI(sck=Pin(18), mosi=Pin(23), miso=Pin(38)) if spi is None else spi
+        self.cs = Pin(4) if cs is None else cs
         self.cs.init(self.cs.OUT, value=0)
         self.debug = debug
         if self.debug:
             print("{}{} {}, cs={} state={}".format(SDCard, SDCard.__init__, self.spi, self.cs, self.cs.value()))
         self.sectors = None
         self.cdv = None
+        self.baudrate = None
+        self.pre_erase = True
+        self.max_baudrate = max_baudrate
+        # reused by every command and block, block transfers do no heap allocation
+        self.cmdbuf = bytearray(6)
+        self.tokenbuf = bytearray(1)
+        self.crcbuf = bytearray(2)
+        self.blockbuf = bytearray(512)
         self.init_card()
 
     def init_card(self):
@@ -66,6 +79,8 @@ class SDCard:
         self.get_intf_cond()
         self.sectors = self.get_card_data()
         self.set_blksz()
+        if self.max_baudrate:
+            self.negotiate(self.max_baudrate)
         print("* card initializing complete ..")
 
     def clock_card(self):
@@ -147,16 +162,70 @@ class SDCard:
             print("{} got cmd16 response = {}, blksz=512".format(SDCard.set_blksz, res))
         if res != 0:
             raise OSError("can't set 512 block size")
-        self.set_baudrate(500000)
+        self.set_baudrate(_INIT_BAUDRATE)
 
     def set_baudrate(self, baudrate):
         """
         slowdown baudrate to 100-400khz range during initialization and speedup at the end
         """
-        self.spi.init(baudrate)
+        self.spi.init(baudrate=baudrate)
+        self.baudrate = baudrate
         if self.debug:
             print("{} {}".format(SDCard.set_baudrate, self.spi))
 
+    def negotiate(self, top, block=0, reads=4):
+        """
+        raise the clock from 500 kHz by doubling up to top while reads of block match the 500 kHz read and its CRC16,
+        settle on the last rate that passed and return it
+        """
+        ref = bytearray(512)
+        buf = self.blockbuf
+        self.set_baudrate(_INIT_BAUDRATE)
+        self.readblocks(block, ref)
+        # cards send a valid CRC16 with each block, skip the check if this one does not
+        use_crc = self.crc16(ref) == (self.crcbuf[0] << 8 | self.crcbuf[1])
+        good = _INIT_BAUDRATE
+        rate = good
+        while rate < top:
+            rate = min(rate * 2, top)
+            self.set_baudrate(rate)
+            try:
+                for i in range(reads):
+                    self.readblocks(block, buf)
+                    if buf != ref or (use_crc and self.crc16(buf) != (self.crcbuf[0] << 8 | self.crcbuf[1])):
+                        raise OSError(5)  # EIO
+            except OSError:
+                break
+            good = rate
+        self.set_baudrate(good)
+        if good != rate:
+            # the failed rate may have left a transfer hanging, make sure the card answers at the settled one
+            try:
+                self.readblocks(block, buf)
+            except OSError:
+                self.cs(1)
+                self.spi.write(b"\xff")
+        print("* sdcard clock {} kHz{}".format(good // 1000, " (crc checked)" if use_crc else ""))
+        return good
+
+    def crc16(self, buf):
+        """
+        CRC16-CCITT of a data block as sent after it by the card
+        """
+        table = SDCard.crc_table
+        if table is None:
+            table = array('H', bytearray(512))
+            for i in range(256):
+                c = i << 8
+                for _ in range(8):
+                    c = ((c << 1) ^ 0x1021) if c & 0x8000 else c << 1
+                table[i] = c & 0xFFFF
+            SDCard.crc_table = table
+        crc = 0
+        for b in buf:
+            crc = ((crc << 8) & 0xFF00) ^ table[(crc >> 8) ^ b]
+        return crc
+
     def readblocks(self, block_num, buf):
         """
         cmd17 read one block
@@ -187,11 +256,13 @@ class SDCard:
                 # release the card
                 self.cs(1)
                 raise OSError(5)  # EIO
+            # receive each block into blockbuf and copy it in place, a slice store allocates nothing
             offset = 0
             mv = memoryview(buf)
+            blockbuf = self.blockbuf
             while nblocks:
-                # receive the data and release card
-                self.read(mv[offset: offset + 512])
+                self.read(blockbuf)
+                mv[offset: offset + 512] = blockbuf
                 offset += 512
                 nblocks -= 1
             if self.debug:
@@ -220,6 +291,12 @@ class SDCard:
             # send the data
             self.write(_TOKEN_DATA, buf)
         else:
+            # ACMD23: pre-erase the blocks about to be written, a card that refuses it still takes the CMD25
+            if self.pre_erase:
+                self.send_cmd(55, 0, 0)
+                self.get_response()
+                self.send_cmd(23, nblocks, 0)
+                self.get_response()
             # CMD25: set write address for first block
             self.send_cmd(25, block_num * self.cdv, 0)
             res = self.get_response(rel_card=False)
@@ -241,12 +318,12 @@ class SDCard:
         write cmd after setting cs pin low
         """
         self.cs(0)
-        buf = bytearray(6)
+        buf = self.cmdbuf
         buf[0] = 0x40 | cmd
-        buf[1] = arg >> 24
-        buf[2] = arg >> 16
-        buf[3] = arg >> 8
-        buf[4] = arg
+        buf[1] = (arg >> 24) & 0xFF
+        buf[2] = (arg >> 16) & 0xFF
+        buf[3] = (arg >> 8) & 0xFF
+        buf[4] = arg & 0xFF
         buf[5] = crc
         self.spi.write(buf)
         return buf
@@ -255,7 +332,7 @@ class SDCard:
         """
         readinto tokenbuf, get response immediately after send_cmd while writing 0xFF
         """
-        tokenbuf = bytearray(1)
+        tokenbuf = self.tokenbuf
         if skip1:
             self.spi.readinto(tokenbuf, 0xFF)
         # wait for the response (response[7] == 0)
@@ -336,13 +413,9 @@ class SDCard:
 
     def read(self, buf):
         """
-        readinto tokenbuf byte at a time not exceeding max blocksize 512 bytes
+        readinto tokenbuf byte at a time until the start token, then the data not exceeding max blocksize 512 bytes
         """
-        dummybuf = bytearray(512)
-        tokenbuf = bytearray(1)
-        for i in range(512):
-            dummybuf[i] = 0xFF
-        dummybuf_memoryview = memoryview(dummybuf)
+        tokenbuf = self.tokenbuf
 
         self.cs(0)
         # read until start byte (0xff)
@@ -356,15 +429,9 @@ class SDCard:
             self.cs(1)
             raise OSError("timeout waiting for response - check power to MCU")
 
-        # read data
-        mv = dummybuf_memoryview
-        if len(buf) != len(mv):
-            mv = mv[: len(buf)]
-        self.spi.write_readinto(mv, buf)
-
-        # read checksum
-        self.spi.write(b"\xff")
-        self.spi.write(b"\xff")
+        # read data clocking out 0xFF, then the checksum
+        self.spi.readinto(buf, 0xFF)
+        self.spi.readinto(self.crcbuf, 0xFF)
 
         self.cs(1)
         self.spi.write(b"\xff")
@@ -374,11 +441,14 @@ class SDCard:
         write token
         """
         self.cs(0)
-        self.spi.read(1, token)
+        tokenbuf = self.tokenbuf
+        tokenbuf[0] = token
+        self.spi.write(tokenbuf)
         self.spi.write(b"\xff")
         # wait for write to finish
-        while self.spi.read(1, 0xFF)[0] == 0x00:
-            pass
+        self.spi.readinto(tokenbuf, 0xFF)
+        while tokenbuf[0] == 0x00:
+            self.spi.readinto(tokenbuf, 0xFF)
 
         self.cs(1)
         self.spi.write(b"\xff")
@@ -389,20 +459,23 @@ class SDCard:
         """
         self.cs(0)
         # send: start of block, data, checksum
-        self.spi.read(1, token)
+        tokenbuf = self.tokenbuf
+        tokenbuf[0] = token
+        self.spi.write(tokenbuf)
         self.spi.write(buf)
-        self.spi.write(b"\xff")
-        self.spi.write(b"\xff")
+        self.spi.write(b"\xff\xff")
 
-        # check the response
-        if (self.spi.read(1, 0xFF)[0] & 0x1F) != 0x05:
+        # check the response, the card rejected the block unless it is data accepted
+        self.spi.readinto(tokenbuf, 0xFF)
+        if (tokenbuf[0] & 0x1F) != 0x05:
             self.cs(1)
             self.spi.write(b"\xff")
-            return
+            raise OSError(5)  # EIO
 
         # wait for write to finish
-        while self.spi.read(1, 0xFF)[0] == 0:
-            pass
+        self.spi.readinto(tokenbuf, 0xFF)
+        while tokenbuf[0] == 0:
+            self.spi.readinto(tokenbuf, 0xFF)
 
         self.cs(1)
         self.spi.write(b"\xff")
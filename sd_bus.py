@@ -0,0 +1,406 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+import time
+from array import array
+
+
+class SpiArbiter:
+    """ hands the SPI2 pins between clients that take turns, the display by default -- each client has its own
+    chip select and baudrate and either shares the hardware SPI or has its own spi object (SoftSPI on the same pins).
+    When the bus changes hands the previous owner is deselected first, then a shared spi only changes baudrate
+    while another spi object is re-initialized to take over the pins """
+
+    def __init__(self, name, spi, cs=None, baudrate=None):
+        """ name is the default owner, it gets the bus back on release() """
+
+        self.clients = {}
+        self.default = name
+        self.owner = name
+        self.switches = 0
+        self.add(name, spi, cs, baudrate)
+
+    def add(self, name, spi, cs=None, baudrate=None):
+        """ register or update a client, baudrate None re-inits the spi with its own settings """
+
+        self.clients[name] = (spi, cs, baudrate)
+
+    def remove(self, name):
+        """ forget a client, the bus goes back to the default owner if name holds it """
+
+        if self.owner == name:
+            self.release()
+        self.clients.pop(name, None)
+
+    def acquire(self, name):
+        """ route the bus to name, returns its spi """
+
+        spi, cs, baudrate = self.clients[name]
+        if name != self.owner:
+            old = self.clients.get(self.owner)
+            if old and old[1] is not None:
+                old[1](1)
+            if old is None or old[0] is not spi or baudrate is None:
+                spi.deinit()
+            if baudrate is None:
+                spi.init()
+            else:
+                spi.init(baudrate=baudrate)
+            self.owner = name
+            self.switches += 1
+        return spi
+
+    def release(self):
+        """ hand the bus back to the default owner """
+
+        self.acquire(self.default)
+
+
+class SharedSD:
+    """ block device of an initialized SDCard on an arbitrated bus -- each block transfer takes the bus and gives it
+    back to the display, so the card stays mounted between saves. After an error the card is re-initialized
+    and the transfer retried once """
+
+    def __init__(self, card, bus, name='sd'):
+        """ card is an SDCard already initialized while name held the bus """
+
+        self.card = card
+        self.bus = bus
+        self.name = name
+        self.stale = False
+        self.errors = 0
+        self.inits = 0
+        bus.add(name, card.spi, card.cs, card.baudrate)
+
+    def reinit(self):
+        """ re-run the card init sequence, the bus must be held -- a negotiated clock is capped below the one that
+        failed """
+
+        self.stale = True
+        if self.card.max_baudrate and self.card.baudrate:
+            self.card.max_baudrate = max(self.card.baudrate // 2, 500000)
+        self.card.init_card()
+        self.bus.add(self.name, self.card.spi, self.card.cs, self.card.baudrate)
+        self.inits += 1
+        self.stale = False
+
+    def _run(self, fn, block_num, buf):
+        """ fn(block_num, buf) with the bus held """
+
+        self.bus.acquire(self.name)
+        try:
+            if self.stale:
+                self.reinit()
+            try:
+                fn(block_num, buf)
+            except OSError as e:
+                self.errors += 1
+                print("* sdcard error {} at block {}, re-initializing ..".format(e, block_num))
+                self.reinit()
+                fn(block_num, buf)
+        finally:
+            self.bus.release()
+
+    def readblocks(self, block_num, buf):
+        self._run(self.card.readblocks, block_num, buf)
+
+    def writeblocks(self, block_num, buf):
+        self._run(self.card.writeblocks, block_num, buf)
+
+    def ioctl(self, op, arg=None):
+        return self.card.ioctl(op, arg)
+
+
+class SectorCache:
+    """ block device wrapper keeping the last used single blocks, e.g. FAT and directory sectors, in a fixed LRU
+    cache -- works over SDCard, SharedSD or flashbdev.bdev. Multi-block transfers go to the device and keep cached
+    copies coherent. write_back holds written blocks until eviction, sync (ioctl 3) or flush(), otherwise writes
+    go through at once """
+
+    def __init__(self, bdev, blocks=16, write_back=False):
+        """ blocks is the cache size in device blocks, ioctl 5 or 512 bytes each """
+
+        self.bdev = bdev
+        self.bsize = bdev.ioctl(5, 0) or 512
+        self.write_back = write_back
+        self.data = bytearray(blocks * self.bsize)
+        self.tag = array('i', [-1] * blocks)
+        self.used = array('I', bytearray(4 * blocks))
+        self.dirty = bytearray(blocks)
+        self.slot = {}
+        self.clock = 0
+        self.hits = 0
+        self.misses = 0
+        self.reads = 0
+        self.writes = 0
+
+    def _view(self, i):
+        """ memoryview of slot i """
+
+        return memoryview(self.data)[i * self.bsize:(i + 1) * self.bsize]
+
+    def _touch(self, i):
+        self.clock += 1
+        self.used[i] = self.clock
+
+    def _write(self, block_num, buf):
+        self.writes += 1
+        self.bdev.writeblocks(block_num, buf)
+
+    def _evict(self):
+        """ returns a free slot, writing back the least recently used one if it is dirty """
+
+        used = self.used
+        i = 0
+        for j in range(1, len(used)):
+            if used[j] < used[i]:
+                i = j
+        n = self.tag[i]
+        if n >= 0:
+            if self.dirty[i]:
+                self._write(n, self._view(i))
+                self.dirty[i] = 0
+            del self.slot[n]
+            self.tag[i] = -1
+        return i
+
+    def _fill(self, block_num):
+        """ returns the slot of block_num, reading it on a miss """
+
+        i = self.slot.get(block_num)
+        if i is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            i = self._evict()
+            self.reads += 1
+            self.bdev.readblocks(block_num, self._view(i))
+            self.tag[i] = block_num
+            self.slot[block_num] = i
+        self._touch(i)
+        return i
+
+    def readblocks(self, block_num, buf, offset=0):
+        bsize = self.bsize
+        if offset or len(buf) <= bsize:
+            i = self._fill(block_num)
+            buf[:] = self._view(i)[offset:offset + len(buf)]
+            return
+        self.reads += 1
+        self.bdev.readblocks(block_num, buf)
+        mv = memoryview(buf)
+        for k in range(len(buf) // bsize):
+            i = self.slot.get(block_num + k)
+            if i is not None and self.dirty[i]:
+                mv[k * bsize:(k + 1) * bsize] = self._view(i)
+
+    def writeblocks(self, block_num, buf, offset=None):
+        bsize = self.bsize
+        if offset is not None:
+            # extended interface (littlefs on flash), program the device and drop the stale copy
+            self._drop(block_num)
+            self.writes += 1
+            self.bdev.writeblocks(block_num, buf, offset)
+            return
+        if len(buf) == bsize:
+            i = self.slot.get(block_num)
+            if i is None:
+                i = self._evict()
+                self.tag[i] = block_num
+                self.slot[block_num] = i
+            self._view(i)[:] = buf
+            self._touch(i)
+            if self.write_back:
+                self.dirty[i] = 1
+            else:
+                self.dirty[i] = 0
+                self._write(block_num, buf)
+            return
+        mv = memoryview(buf)
+        for k in range(len(buf) // bsize):
+            i = self.slot.get(block_num + k)
+            if i is not None:
+                self._view(i)[:] = mv[k * bsize:(k + 1) * bsize]
+                self.dirty[i] = 0
+        self._write(block_num, buf)
+
+    def _drop(self, block_num):
+        """ forget a cached block, writing it back first if dirty """
+
+        i = self.slot.pop(block_num, None)
+        if i is not None:
+            if self.dirty[i]:
+                self._write(block_num, self._view(i))
+                self.dirty[i] = 0
+            self.tag[i] = -1
+            self.used[i] = 0
+
+    def flush(self):
+        """ write back dirty blocks in block order """
+
+        for n in sorted(self.slot):
+            i = self.slot[n]
+            if self.dirty[i]:
+                self._write(n, self._view(i))
+                self.dirty[i] = 0
+
+    def ioctl(self, op, arg=None):
+        if op in (2, 3):
+            self.flush()
+        elif op == 6:
+            self._drop(arg)
+        return self.bdev.ioctl(op, arg)
+
+
+class WriteBehind:
+    """ block device wrapper holding written blocks in RAM and writing them out sorted, adjacent blocks coalesced into
+    one multi-block (CMD25) transfer -- a block following a held block is placed in the next slot when it is free,
+    so sequential appends stay contiguous and go out without copying. Held blocks are written when the slots are
+    full, the oldest is age_ms old at the next access or poll() or on sync (ioctl 3) and flush() """
+
+    def __init__(self, bdev, blocks=32, age_ms=1000):
+        """ blocks is the capacity in device blocks of ioctl 5 or 512 bytes """
+
+        self.bdev = bdev
+        self.bsize = bdev.ioctl(5, 0) or 512
+        self.age_ms = age_ms
+        self.data = bytearray(blocks * self.bsize)
+        self.tag = array('i', [-1] * blocks)
+        self.slot = {}
+        self.next = 0
+        self.since = None
+        self.flushes = 0
+        self.writes = 0
+        self.blocks = 0
+
+    def _view(self, i, n=1):
+        """ memoryview of n slots from i """
+
+        return memoryview(self.data)[i * self.bsize:(i + n) * self.bsize]
+
+    def _free(self, block_num):
+        """ returns a free slot for block_num, the one after its predecessor if possible """
+
+        tag = self.tag
+        i = self.slot.get(block_num - 1)
+        if i is not None and i + 1 < len(tag) and tag[i + 1] < 0:
+            return i + 1
+        for k in range(len(tag)):
+            i = (self.next + k) % len(tag)
+            if tag[i] < 0:
+                return i
+        return None
+
+    def _hold(self, block_num, buf):
+        """ copy one block into its slot, flushing first if all slots are taken """
+
+        i = self.slot.get(block_num)
+        if i is None:
+            i = self._free(block_num)
+            if i is None:
+                self.flush()
+                i = self._free(block_num)
+            self.tag[i] = block_num
+            self.slot[block_num] = i
+            self.next = i + 1
+        self._view(i)[:] = buf
+        if self.since is None:
+            self.since = time.ticks_ms()
+
+    def poll(self):
+        """ flush once the oldest held block is age_ms old -- call it periodically, reads and writes only check on
+        access, so an idle device would otherwise hold its blocks until the next one """
+
+        if self.since is not None and time.ticks_diff(time.ticks_ms(), self.since) >= self.age_ms:
+            self.flush()
+
+    def flush(self):
+        """ write held blocks in block order, one transfer per run of adjacent blocks in adjacent slots """
+
+        nums = sorted(self.slot)
+        k = 0
+        while k < len(nums):
+            n = nums[k]
+            i = self.slot[n]
+            j = 1
+            while k + j < len(nums) and nums[k + j] == n + j and self.slot[n + j] == i + j:
+                j += 1
+            self.bdev.writeblocks(n, self._view(i, j))
+            self.writes += 1
+            self.blocks += j
+            k += j
+        for n in nums:
+            self.tag[self.slot[n]] = -1
+        self.slot = {}
+        self.next = 0
+        self.since = None
+        if nums:
+            self.flushes += 1
+
+    def readblocks(self, block_num, buf, offset=0):
+        bsize = self.bsize
+        if offset or len(buf) <= bsize:
+            # a single block or part of one comes straight from its slot when held
+            i = self.slot.get(block_num)
+            if i is not None:
+                buf[:] = self._view(i)[offset:offset + len(buf)]
+            elif offset:
+                self.bdev.readblocks(block_num, buf, offset)
+            else:
+                self.bdev.readblocks(block_num, buf)
+            self.poll()
+            return
+        self.bdev.readblocks(block_num, buf)
+        if self.slot:
+            mv = memoryview(buf)
+            for k in range(len(buf) // bsize):
+                i = self.slot.get(block_num + k)
+                if i is not None:
+                    mv[k * bsize:(k + 1) * bsize] = self._view(i)
+        self.poll()
+
+    def writeblocks(self, block_num, buf, offset=None):
+        bsize = self.bsize
+        nblocks = len(buf) // bsize
+        if offset is not None or nblocks > len(self.tag):
+            # partial programs and transfers larger than the slots go straight out after what is held
+            self.flush()
+            if offset is None:
+                self.bdev.writeblocks(block_num, buf)
+            else:
+                self.bdev.writeblocks(block_num, buf, offset)
+            self.writes += 1
+            return
+        mv = memoryview(buf)
+        for k in range(nblocks):
+            self._hold(block_num + k, mv[k * bsize:(k + 1) * bsize])
+        self.poll()
+
+    def ioctl(self, op, arg=None):
+        if op in (2, 3):
+            self.flush()
+        elif op == 6:
+            i = self.slot.pop(arg, None)
+            if i is not None:
+                self.tag[i] = -1
+        return self.bdev.ioctl(op, arg)
@@ -0,0 +1,127 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host benchmark of capture size -- a 200 Hz trace with a 12 Hz wobble, sensor noise and a 90 s pause logged as
+csv, as CapFormat columns and as packed zigzag varint (ZZV) blocks, in bytes per sample. ZZV spends at least a byte
+per channel, so for comparison each block is also sized as if every column were bit packed at the width of its
+largest zigzag delta after the first value, and the host time to pack a 256 sample block is shown.
+
+    python tests/bench_cap_pack.py
+"""
+import asyncio
+import io
+import math
+import random
+import struct
+import time
+
+import conftest  # noqa: F401
+from imu_buffer import CapFormat, CsvFormat, ImuBuffer, ImuLogger
+
+N = 5000
+SIZE = 256
+FORMATS = (
+    ("csv", lambda: CsvFormat()),
+    ("cap", lambda: CapFormat(200)),
+    ("zzv", lambda: CapFormat(200, pack=True)),
+)
+
+
+def trace(n, seed=1):
+    """ samples of a device on a vibrating mount -- accl in mG, gyro in deg/s, temp slowly rising """
+
+    r = random.Random(seed)
+    t = 1792315322778
+    for i in range(n):
+        t += 5 if i != 700 else 90000
+        ph = i * 2 * math.pi * 12 / 200
+        accl = (int(30 * math.sin(ph) + r.gauss(0, 4)), int(r.gauss(-12, 4)), int(1000 + r.gauss(0, 5)))
+        gyro = (int(r.gauss(0, 1.2)), int(3 * math.cos(ph) + r.gauss(0, 1)), int(r.gauss(0, 1)))
+        yield t, accl, gyro, round(77.0 + i / 2000, 1)
+
+
+def log(fmt, n=N):
+    """ returns the bytes ImuLogger writes for n samples of trace in fmt """
+
+    async def main():
+        f = io.BytesIO()
+        lg = ImuLogger(f, fmt, size=SIZE)
+        w = asyncio.create_task(lg.writer())
+        for s in trace(n):
+            lg.append(*s)
+            await asyncio.sleep(0)
+        await lg.close(w)
+        return f.getvalue()
+
+    return asyncio.run(main())
+
+
+def bitpacked(n=N):
+    """ bytes of the trace with each block column stored as its first value, a width byte and the zigzag deltas
+    that follow at that width """
+
+    total = struct.calcsize(CapFormat.HEAD)
+    b = ImuBuffer(SIZE)
+    src = trace(n)
+    while True:
+        b.clear()
+        for s in src:
+            b.append(*s)
+            if b.full:
+                break
+        if not len(b):
+            return total
+        total += struct.calcsize(CapFormat.BLOCK + 'I')
+        for c in b.cols:
+            width = 0
+            for i in range(1, len(b)):
+                v = c[i] - c[i - 1]
+                width = max(width, ((v << 1) ^ (v >> 31)).bit_length())
+            total += c.itemsize + 1 + (width * (len(b) - 1) + 7) // 8
+
+
+def pack_ms():
+    """ host ms to pack one full block """
+
+    b = ImuBuffer(SIZE)
+    for s in trace(SIZE):
+        b.append(*s)
+    f = CapFormat(pack=True)
+    t = time.perf_counter()
+    for _ in range(20):
+        for _ in f.block(b):
+            pass
+    return (time.perf_counter() - t) / 20 * 1000
+
+
+def main():
+    size = {label: len(log(fmt())) for label, fmt in FORMATS}
+    size["bit width"] = bitpacked()
+    for label, nbytes in size.items():
+        print("bp> {:10s} {:7d} bytes {:5.1f} B/sample {:4.1f}x smaller than cap".format(
+            label, nbytes, nbytes / N, size["cap"] / nbytes))
+    print("bp> zzv pack {:.2f} ms per {} sample block on host".format(pack_ms(), SIZE))
+
+
+if __name__ == "__main__":
+    main()
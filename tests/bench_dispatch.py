@@ -0,0 +1,87 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" microbenchmark of one task-btn dispatch in run_tsk -- the old per-touch string building, getattr and range()
+test against the handler tables install_app() fills. Runs on the M5 next to apps.py or on the host with
+python tests/bench_dispatch.py """
+import time
+
+try:
+    import conftest  # host only -- puts the fakes on the path, time then runs on the host clock
+    import vclock
+    vclock.REAL[0] = True
+except ImportError:
+    pass
+
+from apps import Apps
+
+N = 2000
+
+
+def getattr_dispatch(bos, uid, uidt, y):
+    """ the pre-table run_tsk lookups for one touch """
+
+    hit = None
+    if y in range(bos.loc_w[1], bos.loc_w[1] + bos.loc_w[3]):
+        hit = getattr(bos, 'app_' + uid[-1])
+    elif uidt in ('btn_5', 'btn_6', 'btn_7', 'btn_8'):
+        hit = getattr(bos, 'tsk_' + uid[-1] + uidt[-1])
+    return hit
+
+
+def table_dispatch(bos, uid, uidt, y):
+    """ the run_tsk lookups against self.apps, counting the app entry read that run_tsk does once per loop """
+
+    hit = None
+    app = bos.apps[uid]
+    w0 = bos.loc_w[1]
+    w1 = bos.loc_w[1] + bos.loc_w[3]
+    if w0 <= y < w1:
+        hit = app['app']
+    elif uidt in app['tsk']:
+        hit = app['tsk'][uidt]
+    return hit
+
+
+def run(fn, bos, n):
+    """ us per dispatch, alternating a btn_w touch and a task btn """
+
+    t0 = time.ticks_us()
+    for _ in range(n):
+        fn(bos, 'btn_1', None, 100)
+        fn(bos, 'btn_1', 'btn_6', 10)
+    return time.ticks_diff(time.ticks_us(), t0) / (2 * n)
+
+
+def main(n=N):
+    bos = Apps()
+    bos.install_app(('btn_1', 'WiFi'), btn_5='Wifi', btn_6='Scan', btn_7='Clk', btn_8='Wipe')
+    assert getattr_dispatch(bos, 'btn_1', 'btn_6', 10) == table_dispatch(bos, 'btn_1', 'btn_6', 10)
+    assert getattr_dispatch(bos, 'btn_1', None, 100) == table_dispatch(bos, 'btn_1', None, 100)
+    for fn in (getattr_dispatch, table_dispatch):
+        run(fn, bos, n // 10)
+        print("bd> {:17s} {:.2f} us per touch".format(fn.__name__, run(fn, bos, n)))
+
+
+if __name__ == "__main__":
+    main()
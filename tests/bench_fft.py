@@ -0,0 +1,85 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host benchmark of one imu_spectrum frame -- the 256 point Spectrum.run of accl_z samples, Spectrum.bands folding
+the 128 bins into 64 bars and the bar heights scaled to the peak, as imu_app does each frame before draw_bars. Runs
+on the M5 next to imu_fft.py or on the host with python tests/bench_fft.py """
+import math
+import random
+import time
+from array import array
+
+try:
+    import conftest  # noqa: F401 -- host only, puts the fakes on the path, time then runs on the host clock
+    import vclock
+    vclock.REAL[0] = True
+except ImportError:
+    pass
+
+from imu_fft import Spectrum
+
+N = 256
+BARS = 64
+HEIGHT = 120
+FRAMES = 50
+
+
+def load(s, seed=5):
+    """ 1 g with a 60 Hz, 40 mG vibration and noise at 500 Hz """
+
+    r = random.Random(seed)
+    for t in range(s.n):
+        s.x[t] = int(1000 + 40 * math.sin(2 * math.pi * 60 * t / 500) + r.gauss(0, 3))
+
+
+def frame(s, amp, hts):
+    s.run()
+    top = max(s.bands(amp), 5)
+    for b in range(len(amp)):
+        hts[b] = int(HEIGHT * amp[b] / top)
+
+
+def timed(fn, frames=FRAMES):
+    """ ms per call of fn """
+
+    t0 = time.ticks_us()
+    for _ in range(frames):
+        fn()
+    return time.ticks_diff(time.ticks_us(), t0) / frames / 1000
+
+
+def main():
+    s = Spectrum(N)
+    amp = array('f', [0] * BARS)
+    hts = array('H', bytearray(2 * BARS))
+    load(s)
+    frame(s, amp, hts)
+    peak = max(range(BARS), key=lambda b: hts[b])
+    print("bf> peak bar {} of {}, {:.1f} mG".format(peak, BARS, amp[peak]))
+    print("bf> run          {:6.2f} ms per {} points".format(timed(s.run), N))
+    print("bf> bands        {:6.2f} ms per {} bars".format(timed(lambda: s.bands(amp)), BARS))
+    print("bf> run+bars     {:6.2f} ms per frame".format(timed(lambda: frame(s, amp, hts))))
+
+
+if __name__ == "__main__":
+    main()
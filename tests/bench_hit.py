@@ -0,0 +1,96 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host benchmark of FocalTouch.hit against a linear scan of the btn locs, as touch_detected is used per btn, over
+randomized layouts of 1 to 30 btns -- btns may overlap and reach past the 320x280 touch area. Also times
+index_btns, which has to run again whenever btns change.
+
+    python tests/bench_hit.py
+"""
+import random
+import time
+
+import conftest  # noqa: F401
+from fakei2c import FakeTouchBus
+from focaltouch import FocalTouch
+
+MAX_X = 320
+MAX_Y = 280
+
+
+def layouts(trials, seed=1):
+    """ yields random btn dicts in the Bos shape, keyed b0.. in insertion order """
+
+    r = random.Random(seed)
+    for _ in range(trials):
+        btns = {}
+        for i in range(r.randint(1, 30)):
+            btns['b{}'.format(i)] = {'loc': (r.randint(0, 300), r.randint(0, 270), r.randint(1, 120),
+                                             r.randint(1, 80))}
+        yield btns
+
+
+def brute(btns, x, y):
+    """ the first btn in dict order whose inclusive loc holds x, y, None off the touch area """
+
+    if x > MAX_X or y > MAX_Y:
+        return None
+    for k, v in btns.items():
+        l = v['loc']
+        if l[0] <= x <= l[0] + l[2] and l[1] <= y <= l[1] + l[3]:
+            return k
+    return None
+
+
+def points(n, seed=2):
+    r = random.Random(seed)
+    return [(r.randint(0, MAX_X + 5), r.randint(0, MAX_Y + 5)) for _ in range(n)]
+
+
+def main(trials=50, n=2000):
+    bus = FakeTouchBus()
+    pts = points(n)
+    t_hit = t_brute = t_index = 0
+    nbtns = 0
+    for btns in layouts(trials):
+        ft = FocalTouch(bus, btns)
+        t0 = time.perf_counter()
+        ft.index_btns()
+        t_index += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = [ft.hit(x, y) for x, y in pts]
+        t_hit += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        exp = [brute(btns, x, y) for x, y in pts]
+        t_brute += time.perf_counter() - t0
+        assert got == exp
+        nbtns += len(btns)
+    lookups = trials * n
+    print("bh> {} layouts of {:.1f} btns on average, {} lookups each".format(trials, nbtns / trials, n))
+    print("bh> hit          {:6.2f} us per lookup".format(t_hit / lookups * 1e6))
+    print("bh> linear scan  {:6.2f} us per lookup".format(t_brute / lookups * 1e6))
+    print("bh> index_btns   {:6.0f} us per layout".format(t_index / trials * 1e6))
+
+
+if __name__ == "__main__":
+    main()
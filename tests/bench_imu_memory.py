@@ -0,0 +1,102 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host memory benchmark of an IMU capture -- the list of per-sample dicts read_imu used to return against ImuBuffer,
+as bytes per sample held by tracemalloc, and the peak while each is written out as json the way imu_json does. Each
+sample gets fresh accel and gyro tuples as from read_all. btn_os_test.imu_memory_test is the device counterpart on
+gc.mem_free.
+
+    python tests/bench_imu_memory.py
+"""
+import json
+import random
+import tracemalloc
+
+import conftest  # noqa: F401
+from imu_buffer import ImuBuffer
+
+SIZES = (100, 1000, 10000)
+T0 = 1792315186614
+
+
+def samples(n, seed=1):
+    r = random.Random(seed)
+    for i in range(n):
+        yield (T0 + 5 * i, (r.randint(-50, 50), r.randint(-50, 50), 1000 + r.randint(-50, 50)),
+               (r.randint(-3, 3), r.randint(-3, 3), r.randint(-3, 3)), round(77 + r.random(), 1))
+
+
+def dicts(n):
+    return [{'ts': {'val': ts, 'uom': 'ms'}, 'accl': {'val': accl, 'uom': 'mG'}, 'gyro': {'val': gyro, 'uom': 'deg/s'},
+             'temp': {'val': temp, 'uom': 'F'}} for ts, accl, gyro, temp in samples(n)]
+
+
+def buffer(n):
+    b = ImuBuffer(n)
+    for s in samples(n):
+        b.append(*s)
+    return b
+
+
+class Sink:
+    """ a file that keeps only the byte count """
+
+    def __init__(self):
+        self.n = 0
+
+    def write(self, s):
+        self.n += len(s)
+
+
+def dump_dicts(imu, f):
+    json.dump(imu, f)
+
+
+def dump_buffer(imu, f):
+    imu.dump_json(f)
+
+
+def measure(build, dump, n):
+    """ returns bytes per sample held and the peak bytes above that while dumping, and the json size """
+
+    tracemalloc.start()
+    imu = build(n)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    f = Sink()
+    dump(imu, f)
+    peak = tracemalloc.get_traced_memory()[1] - held
+    tracemalloc.stop()
+    return held / n, peak, f.n
+
+
+def main():
+    for n in SIZES:
+        for label, build, dump in (("dicts", dicts, dump_dicts), ("ImuBuffer", buffer, dump_buffer)):
+            per, peak, size = measure(build, dump, n)
+            print("bu> {:6d} samples {:9s} {:7.1f} B per sample, json dump peak {:8d} B for {:8d} B of json".format(
+                n, label, per, peak, size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host benchmark of one IMU sample on the FakeIMU -- the accel, gyro and temperature properties read separately,
+read_all's single burst and read_raw's counts alone, in I2C transactions and host us per sample. On the M5 each
+transaction at 400 kHz costs the bus time of its address, register and data bytes on top of the Python work.
+
+    python tests/bench_imu_read.py
+"""
+import time
+
+import conftest  # noqa: F401
+import vclock
+from fakei2c import FakeI2C, FakeIMU
+from mpu6886 import MPU6886
+
+N = 5000
+READS = (
+    ("properties", lambda m: (m.accel, m.gyro, m.temperature)),
+    ("read_all", lambda m: m.read_all()),
+    ("read_raw", lambda m: m.read_raw()),
+)
+
+
+def bus_bytes(fn, m, imu):
+    """ bytes on the wire for one sample -- address and register, then address and the data per transaction """
+
+    log = []
+    read = imu.read
+
+    def counted(reg, n):
+        log.append(n)
+        return read(reg, n)
+
+    imu.read = counted
+    fn(m)
+    imu.read = read
+    return sum(3 + n for n in log)
+
+
+def run(fn, m, n=N):
+    """ returns transactions and us per sample """
+
+    imu = m.i2c.imu
+    txn = imu.txn
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn(m)
+    us = (time.perf_counter() - t0) * 1000000 / n
+    return (imu.txn - txn) / n, us
+
+
+def main():
+    vclock.REAL[0] = True
+    m = MPU6886(FakeI2C(imu=FakeIMU()))
+    for label, fn in READS:
+        txn, us = run(fn, m)
+        nbytes = bus_bytes(fn, m, m.i2c.imu)
+        print("bi> {:10s} {:.0f} txn {:3d} bus bytes {:5.2f} us per sample on host, {:4.0f} us on a 400 kHz bus".format(
+            label, txn, nbytes, us, nbytes * 9 * 1000000 / 400000))
+
+
+if __name__ == "__main__":
+    main()
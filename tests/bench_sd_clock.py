@@ -0,0 +1,85 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host harness for SDCard clock negotiation on the fakesd card -- cards that flip bits above their max clock and
+lose the data token above twice that, with and without a valid CRC. Reports the settled clock and the bus
+throughput of 1 MB read and written in 4KB transfers at it. Bus time only, the ESP32 GPIO matrix is not modelled.
+
+    python tests/bench_sd_clock.py
+"""
+import random
+
+import conftest  # noqa: F401
+from fakesd import Card, CsPin, FakeSPI, Mux
+from sdcard import SDCard
+
+CASES = (
+    ("no negotiation", None, {}),
+    ("unlimited card, top 20 MHz", 20000000, {}),
+    ("card max 8 MHz (bit errors)", 20000000, {'max_baud': 8000000}),
+    ("card max 5 MHz (lost tokens)", 40000000, {'max_baud': 5000000}),
+    ("no crc, max 8 MHz", 20000000, {'max_baud': 8000000, 'no_crc': True}),
+)
+
+
+def make(top, no_crc=False, **kw):
+    """ returns card, spi and an SDCard initialized with max_baudrate top, block i filled with i & 0xFF and block 0,
+    the negotiation reference, random """
+
+    Mux.reset()
+    card = Card(sectors=8192, **kw)
+    card.no_crc = no_crc
+    for i in range(card.sectors):
+        card.data[i * 512:(i + 1) * 512] = bytes([i & 0xFF]) * 512
+    r = random.Random(0)
+    card.data[0:512] = bytes(r.getrandbits(8) for _ in range(512))
+    cs = CsPin(card)
+    spi = FakeSPI(card, cs)
+    spi.init(100000)
+    return card, spi, SDCard(spi, cs, max_baudrate=top)
+
+
+def throughput(card, sd, kb=1024):
+    """ bus KB/s reading then writing kb in 4KB transfers """
+
+    card.bus_us = 0
+    buf = bytearray(8 * 512)
+    for b in range(100, 100 + kb * 2, 8):
+        sd.readblocks(b, buf)
+    rd = kb / (card.bus_us / 1e6)
+    card.bus_us = 0
+    buf = bytearray(range(256)) * 16
+    for b in range(3000, 3000 + kb * 2, 8):
+        sd.writeblocks(b, buf)
+    return rd, kb / (card.bus_us / 1e6)
+
+
+def main():
+    for label, top, kw in CASES:
+        card, spi, sd = make(top, **kw)
+        rd, wr = throughput(card, sd)
+        print("bc> {:30s} {:6d} kHz  bus read {:.0f} KB/s write {:.0f} KB/s".format(label, sd.baudrate // 1000, rd, wr))
+
+
+if __name__ == "__main__":
+    main()
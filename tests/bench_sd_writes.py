@@ -0,0 +1,87 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host benchmark of SD commands for a log written in 4KB appends -- the SDCard alone, behind WriteBehind and behind
+SectorCache over WriteBehind, on the fakesd card. Each append is a single block, as the FAT driver writes its partial
+sector, then seven more, and every 32KB the FAT sector is rewritten. The card image is checked afterwards.
+
+    python tests/bench_sd_writes.py
+"""
+import random
+
+import conftest  # noqa: F401
+from fakesd import Card, CsPin, FakeSPI, Mux
+from sd_bus import SectorCache, WriteBehind
+from sdcard import SDCard
+
+STACKS = (
+    ("SDCard", lambda d: d),
+    ("WriteBehind 32", lambda d: WriteBehind(d, 32)),
+    ("SectorCache+WriteBehind", lambda d: SectorCache(WriteBehind(d, 32), 16)),
+)
+
+
+def run(wrap, kb=1024):
+    """ returns the commands the card saw by name and the bus ms for kb of appends through wrap(SDCard) """
+
+    Mux.reset()
+    card = Card(sectors=8192, busy=40)
+    cs = CsPin(card)
+    spi = FakeSPI(card, cs)
+    spi.init(100000)
+    sd = SDCard(spi, cs)
+    spi.init(4000000)
+    base = dict(card.cmds)
+    card.bus_us = 0
+    dev = wrap(sd)
+    ref = {}
+    r = random.Random(3)
+    s = 1000
+    for chunk in range(kb // 4):
+        a = bytearray(r.getrandbits(8) for _ in range(512))
+        dev.writeblocks(s, a)
+        ref[s] = a
+        b = bytearray(r.getrandbits(8) for _ in range(3584))
+        dev.writeblocks(s + 1, b)
+        for k in range(7):
+            ref[s + 1 + k] = b[k * 512:(k + 1) * 512]
+        s += 8
+        if chunk % 8 == 7:
+            f = bytearray(r.getrandbits(8) for _ in range(512))
+            dev.writeblocks(32, f)
+            ref[32] = f
+    dev.ioctl(3, 0)
+    for n, v in ref.items():
+        assert card.data[n * 512:(n + 1) * 512] == v, n
+    cmds = {k: v - base.get(k, 0) for k, v in card.cmds.items() if v - base.get(k, 0)}
+    return cmds, card.bus_us / 1000
+
+
+def main():
+    for label, wrap in STACKS:
+        cmds, ms = run(wrap)
+        print("bw> {:24s} {:5d} cmds {} bus {:.0f} ms".format(label, sum(cmds.values()), cmds, ms))
+
+
+if __name__ == "__main__":
+    main()
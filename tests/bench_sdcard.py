@@ -0,0 +1,120 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host benchmark of SDCard block reads on the fakesd card -- heap allocations by the driver (bytearray,
+memoryview and spi.read results), spi calls and driver lines executed while reading 1 MB in 4KB readblocks calls.
+Pass another sdcard.py to compare, e.g. the driver before preallocated buffers:
+
+    git show 7a3974e^:py_modules/sdcard.py > /tmp/sdcard_old.py
+    python tests/bench_sdcard.py /tmp/sdcard_old.py
+"""
+import importlib.util
+import os
+import sys
+
+import conftest
+from fakesd import Card, CsPin, FakeSPI
+
+DRIVER = os.path.join(conftest.ROOT, 'py_modules', 'sdcard.py')
+
+
+def load(path, counts):
+    """ import the driver at path with counting bytearray and memoryview -- item stores truncate to 8 bits as on
+    MicroPython, the pre-022 driver relies on it """
+
+    class CountingBytearray(bytearray):
+        def __init__(self, *a):
+            counts['alloc'] += 1
+            bytearray.__init__(self, *a)
+
+        def __setitem__(self, i, v):
+            if isinstance(i, int):
+                v &= 0xFF
+            bytearray.__setitem__(self, i, v)
+
+    def counting_memoryview(b):
+        counts['alloc'] += 1
+        return memoryview(b)
+
+    spec = importlib.util.spec_from_file_location('sdcard_bench', path)
+    mod = importlib.util.module_from_spec(spec)
+    mod.bytearray = CountingBytearray
+    mod.memoryview = counting_memoryview
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class CountingSPI(FakeSPI):
+    counts = None
+
+    def read(self, n, write=0xFF):
+        self.counts['alloc'] += 1
+        return FakeSPI.read(self, n, write)
+
+
+def measure(path=DRIVER, blocks=2048, chunk=4096):
+    """ returns allocs, spi calls and driver lines for reading blocks (1 MB) in chunk byte readblocks calls """
+
+    path = os.path.abspath(path)
+    counts = {'alloc': 0}
+    mod = load(path, counts)
+    card = Card(sectors=8192)
+    for i in range(card.sectors):
+        card.data[i * 512:i * 512 + 4] = i.to_bytes(4, 'big')
+    cs = CsPin(card)
+    spi = CountingSPI(card, cs)
+    spi.counts = counts
+    spi.init(100000)
+    sd = mod.SDCard(spi, cs)
+    buf = bytearray(chunk)
+    nblk = chunk // 512
+    lines = [0]
+
+    def trace(frame, event, arg):
+        if frame.f_code.co_filename == path:
+            if event == 'line':
+                lines[0] += 1
+            return trace
+        return None
+
+    counts['alloc'] = 0
+    spi.calls = 0
+    sys.settrace(trace)
+    try:
+        for blk in range(0, blocks, nblk):
+            sd.readblocks(blk, buf)
+            assert buf[512:516] == (blk + 1).to_bytes(4, 'big')
+    finally:
+        sys.settrace(None)
+    return {'calls': blocks // nblk, 'allocs': counts['alloc'], 'spi': spi.calls, 'lines': lines[0]}
+
+
+def main(paths):
+    for path in paths or [DRIVER]:
+        r = measure(path)
+        print("bs> {} -- {} readblocks: {} allocs, {} spi calls, {} driver lines".format(
+            path, r['calls'], r['allocs'], r['spi'], r['lines']))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
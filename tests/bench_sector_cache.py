@@ -0,0 +1,122 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host benchmark of device transfers for metadata heavy logging -- imu_csv like saves of a 64KB file in 4KB appends,
+each append rereading and rewriting its FAT sector, the directory sectors read on open, stat and listdir and the dir
+entry rewritten on close. Run raw on a file backed block device and behind a 16 block SectorCache, write-through and
+write-back.
+
+    python tests/bench_sector_cache.py
+"""
+import os
+import tempfile
+
+import conftest  # noqa: F401
+from sd_bus import SectorCache
+
+STACKS = (
+    ("raw", lambda d: d),
+    ("SectorCache wt", lambda d: SectorCache(d, 16)),
+    ("SectorCache wb", lambda d: SectorCache(d, 16, True)),
+)
+
+
+class FileDev:
+    """ block device on a host file counting device transfers in ops, ext adds the offset interface and erase
+    (ioctl 6) of flashbdev, bsize other than 512 is reported by ioctl 5 """
+
+    def __init__(self, fn, bsize=512, n=4096, ext=False):
+        self.f = open(fn, 'w+b')
+        self.f.truncate(bsize * n)
+        self.bsize = bsize
+        self.n = n
+        self.ext = ext
+        self.ops = 0
+
+    def readblocks(self, n, buf, offset=0):
+        self.ops += 1
+        self.f.seek(n * self.bsize + offset)
+        buf[:] = self.f.read(len(buf))
+
+    def writeblocks(self, n, buf, offset=None):
+        assert offset is None or self.ext
+        self.ops += 1
+        self.f.seek(n * self.bsize + (offset or 0))
+        self.f.write(bytes(buf))
+
+    def ioctl(self, op, arg):
+        if op == 4:
+            return self.n
+        if op == 5:
+            return self.bsize if self.bsize != 512 else None
+        if op == 6 and self.ext:
+            self.f.seek(arg * self.bsize)
+            self.f.write(b'\xff' * self.bsize)
+            return 0
+
+    def image(self):
+        self.f.seek(0)
+        return self.f.read()
+
+    def close(self):
+        self.f.close()
+
+
+def workload(dev, saves=20):
+    """ saves files through dev, FAT at block 32, directory at 100-103, data from 2000 """
+
+    data = 2000
+    for save in range(saves):
+        for n in (100, 101, 102):  # open, dir lookup
+            dev.readblocks(n, bytearray(512))
+        for k in range(16):  # 64KB in 4KB appends, the FAT chain grows each time
+            dev.readblocks(32, bytearray(512))
+            dev.writeblocks(32, bytearray(512))
+            dev.writeblocks(data, bytearray(4096))
+            data += 8
+        dev.readblocks(101, bytearray(512))  # close, dir entry
+        dev.writeblocks(101, bytearray(512))
+        dev.ioctl(3, 0)
+        for n in (100, 101):  # uos.stat
+            dev.readblocks(n, bytearray(512))
+        for n in (100, 101, 102, 103):  # listdir
+            dev.readblocks(n, bytearray(512))
+
+
+def run(wrap, path):
+    """ returns the device transfers of workload through wrap(FileDev) """
+
+    dev = FileDev(path)
+    workload(wrap(dev))
+    dev.close()
+    return dev.ops
+
+
+def main():
+    with tempfile.TemporaryDirectory() as d:
+        for label, wrap in STACKS:
+            print("bm> {:16s} {:5d} device transfers".format(label, run(wrap, os.path.join(d, 'bm.img'))))
+
+
+if __name__ == "__main__":
+    main()
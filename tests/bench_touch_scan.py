@@ -0,0 +1,132 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host benchmark of the per-scan touch work in Bos.run_tsk -- the old touch_points list of point dicts compared
+with the previous scan against reading tp_n, tp_x[0] and tp_y[0] from the point slots and comparing scalars. A finger
+is dragged across btn_w, each scan counts the I2C transactions on the FakeTouchBus, the peak bytes allocated by
+tracemalloc and the host time of the scan and its frame set up, polled and with the INT pin.
+
+    python tests/bench_touch_scan.py
+"""
+import time
+import tracemalloc
+
+import conftest  # noqa: F401
+import vclock
+from fakei2c import FakeTouchBus
+from focaltouch import FocalTouch
+from machine import Pin
+
+N = 2000
+BTNS = {'btn_5': {'loc': (0, 0, 80, 40)}, 'btn_w': {'loc': (0, 40, 320, 160)}}
+
+
+class PointList:
+    """ the scan as run_tsk did it through touch_points """
+
+    def __init__(self, touch):
+        self.touch = touch
+        self.prev = None
+        self.changes = 0
+
+    def scan(self):
+        touch = self.touch
+        if touch.irq_pin is not None and touch.next_sample() is None:
+            return
+        tp = touch.touch_points
+        touch.gesture.feed(touch.tp_n, touch.tp_x[0], touch.tp_y[0], touch.tp_t)
+        if self.prev != tp:
+            x = tp[0]['x'] if tp else None
+            self.changes += x is not None
+        self.prev = tp
+
+
+class Slots:
+    """ the scan as run_tsk does it now, straight from the point slots """
+
+    def __init__(self, touch):
+        self.touch = touch
+        self.pn = self.px = self.py = None
+        self.changes = 0
+
+    def scan(self):
+        touch = self.touch
+        if touch.irq_pin is None:
+            touch.read_frame()
+        elif touch.next_sample() is None:
+            return
+        n = touch.tp_n
+        tx = touch.tp_x[0]
+        ty = touch.tp_y[0]
+        touch.gesture.feed(n, tx, ty, touch.tp_t)
+        if n != self.pn or (n and (tx != self.px or ty != self.py)):
+            self.changes += n > 0
+        self.pn, self.px, self.py = n, tx, ty
+
+
+def drag(kind, irq, n, traced):
+    """ n scans of a finger moving a pixel per frame, returns the scanner, the I2C transactions the scans made and
+    their summed peak bytes """
+
+    bus = FakeTouchBus()
+    pin = Pin(39, Pin.IN) if irq else None
+    s = kind(FocalTouch(bus, BTNS, irq_pin=pin))
+    peak = txn = 0
+    for i in range(n):
+        bus.set(1, 10 + i % 300, 100 + i % 2)
+        if pin is not None:
+            pin.fire()
+        t = bus.txn
+        if traced:
+            tracemalloc.start()
+            s.scan()
+            peak += tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        else:
+            s.scan()
+        txn += bus.txn - t
+    return s, txn, peak
+
+
+def run(kind, irq, n=N):
+    """ returns I2C transactions, peak bytes and us per scan and the moves seen for n scans of a drag -- with the INT
+    pin the frame is read by the irq, not the scan """
+
+    s, txn, peak = drag(kind, irq, n, True)
+    t0 = time.perf_counter()
+    drag(kind, irq, n, False)
+    us = (time.perf_counter() - t0) * 1000000
+    return txn / n, peak / n, us / n, s.changes
+
+
+def main():
+    vclock.REAL[0] = True
+    for irq in (False, True):
+        for kind in (PointList, Slots):
+            txn, peak, us, changes = run(kind, irq)
+            print("bt> {:6s} {:9s} {:.1f} txn {:6.1f} B peak {:5.2f} us per scan, {} moves".format(
+                "int" if irq else "polled", kind.__name__, txn, peak, us, changes))
+
+
+if __name__ == "__main__":
+    main()
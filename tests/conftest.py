@@ -0,0 +1,53 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" host test setup -- MicroPython stand-ins from tests/fakes shadow the firmware modules, time runs on a virtual
+clock unless a test asks for real time """
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path[:0] = [os.path.join(HERE, 'fakes'), HERE, os.path.join(ROOT, 'py_modules'), ROOT]
+
+import pytest  # noqa: E402
+
+import vclock  # noqa: E402
+
+
+@pytest.fixture
+def clock():
+    """ virtual clock from 0 ms, advanced only by sleep_ms/sleep_us and by the test """
+
+    vclock.reset()
+    yield vclock
+    vclock.reset()
+
+
+@pytest.fixture
+def realtime():
+    """ ticks and sleeps follow the host clock, for tests that run the asyncio scheduler """
+
+    vclock.REAL[0] = True
+    yield vclock
+    vclock.reset()
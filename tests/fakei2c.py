@@ -0,0 +1,186 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" register models of the Core2 internal I2C bus -- the FT6x36 touch controller at 0x38 and the MPU6886 at 0x68 """
+import struct
+import time
+
+TOUCH_ADDR = 0x38
+
+
+class FakeTouchBus:
+    """ FT6x36 registers, set() loads the point count and first point the next frame read returns """
+
+    def __init__(self):
+        self.regs = bytearray(256)
+        self.regs[0xA1:0xA9] = bytes([0x30, 0x03, 0x64, 0, 0, 0x02, 0, 0x11])
+        self.txn = 0
+        self.set(0)
+
+    def set(self, n, x=0, y=0):
+        r = self.regs
+        r[2] = n
+        r[3] = (x >> 8) & 0x0F
+        r[4] = x & 0xFF
+        r[5] = (y >> 8) & 0x0F
+        r[6] = y & 0xFF
+        if n < 1:
+            r[3:9] = b'\xff' * 6
+        if n < 2:
+            r[9:15] = b'\xff' * 6
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        self.txn += 1
+        buf[:] = self.regs[reg:reg + len(buf)]
+
+    def readfrom_mem(self, addr, reg, n):
+        self.txn += 1
+        return bytes(self.regs[reg:reg + n])
+
+    def writeto_mem(self, addr, reg, val):
+        self.txn += 1
+        self.regs[reg:reg + len(val)] = val
+
+
+class FakeIMU:
+    """ MPU6886 registers holding one fixed sample -- interrupts raised with interrupt() latch in INT_STATUS until it
+    is read """
+
+    INT_ENABLE = 56
+    INT_STATUS = 58
+
+    def __init__(self):
+        self.regs = bytearray(128)
+        self.regs[117] = 0x19
+        self.txn = 0
+        self.set(100, -200, 16384, 50, -50, 25, 0)
+
+    def set(self, ax, ay, az, gx, gy, gz, t):
+        self.regs[59:73] = struct.pack('>hhhhhhh', ax, ay, az, t, gx, gy, gz)
+
+    def interrupt(self, flags, pin=None):
+        """ latch the flags enabled in INT_ENABLE and raise INT on pin, returns the flags latched """
+
+        flags &= self.regs[self.INT_ENABLE]
+        if flags:
+            self.regs[self.INT_STATUS] |= flags
+            if pin is not None:
+                pin.fire()
+        return flags
+
+    def read(self, reg, n):
+        self.txn += 1
+        d = bytes(self.regs[reg:reg + n])
+        if reg <= self.INT_STATUS < reg + n:
+            self.regs[self.INT_STATUS] = 0
+        return d
+
+    def write(self, reg, val):
+        self.txn += 1
+        self.regs[reg:reg + len(val)] = val
+
+
+class FifoIMU(FakeIMU):
+    """ MPU6886 with its 1KB FIFO filled at the rate set by SMPLRT_DIV from the 1 kHz internal clock -- packets are
+    generated from ticks_us whenever a register is accessed, stop when full as in FIFO_MODE_STOP, and carry their
+    sequence number from 1 in accl_x so tests can see which samples were kept """
+
+    SMPLRT_DIV = 25
+    FIFO_EN = 35
+    USER_CTRL = 106
+    FIFO_COUNTH = 114
+    FIFO_R_W = 116
+    SIZE = 1024
+
+    def __init__(self):
+        super().__init__()
+        self.fifo = bytearray()
+        self.t0 = None
+        self.made = 0
+
+    def sample(self, k):
+        """ packet k in register order, accel, temperature and gyro """
+
+        return struct.pack('>hhhhhhh', k, 0, 0, 0, 0, 0, 0)
+
+    def fill(self):
+        if not (self.regs[self.USER_CTRL] & 0x40 and self.regs[self.FIFO_EN] & 0x18):
+            return
+        period = 1000 * (1 + self.regs[self.SMPLRT_DIV])
+        now = time.ticks_us()
+        if self.t0 is None:
+            self.t0 = now
+        total = time.ticks_diff(now, self.t0) // period
+        while self.made < total:
+            self.made += 1
+            if len(self.fifo) + 14 <= self.SIZE:
+                self.fifo += self.sample(self.made)
+
+    def read(self, reg, n):
+        self.fill()
+        if reg == self.FIFO_COUNTH:
+            self.txn += 1
+            c = len(self.fifo)
+            return bytes([c >> 8, c & 0xFF])
+        if reg == self.FIFO_R_W:
+            self.txn += 1
+            d = bytes(self.fifo[:n])
+            del self.fifo[:n]
+            return d
+        return super().read(reg, n)
+
+    def write(self, reg, val):
+        self.fill()
+        super().write(reg, val)
+        if reg == self.USER_CTRL and val[0] & 0x04:
+            # FIFO reset, the bit clears itself
+            self.fifo = bytearray()
+            self.regs[reg] &= ~0x04 & 0xFF
+
+
+class FakeI2C:
+    """ SoftI2C routing the touch address to FakeTouchBus and everything else to the imu model, imu_type picks the
+    model Bos gets """
+
+    imu_type = FakeIMU
+
+    def __init__(self, imu=None, **kw):
+        self.touch = FakeTouchBus()
+        self.imu = imu or self.imu_type()
+
+    def readfrom_mem_into(self, addr, reg, buf):
+        if addr == TOUCH_ADDR:
+            self.touch.readfrom_mem_into(addr, reg, buf)
+        else:
+            buf[:] = self.imu.read(reg, len(buf))
+
+    def readfrom_mem(self, addr, reg, n):
+        if addr == TOUCH_ADDR:
+            return self.touch.readfrom_mem(addr, reg, n)
+        return self.imu.read(reg, n)
+
+    def writeto_mem(self, addr, reg, val):
+        if addr == TOUCH_ADDR:
+            self.touch.writeto_mem(addr, reg, val)
+        else:
+            self.imu.write(reg, val)
@@ -0,0 +1,16 @@
+""" axp202c stand-in, the power chip accepts everything """
+AXP192_LDO2 = 2
+
+
+class PMU:
+    def __init__(self, **kw):
+        pass
+
+    def enablePower(self, ch):
+        pass
+
+    def setDC3Voltage(self, mv):
+        pass
+
+    def shutdown(self):
+        pass
@@ -0,0 +1,9 @@
+""" esp32 stand-in """
+
+
+def raw_temperature():
+    return 120.0
+
+
+def hall_sensor():
+    return 10
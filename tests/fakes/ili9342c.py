@@ -0,0 +1,43 @@
+""" ili9342c stand-in recording draw calls and the pixels they cover """
+BLACK = 0x0000
+BLUE = 0x001F
+RED = 0xF800
+GREEN = 0x07E0
+CYAN = 0x07FF
+MAGENTA = 0xF81F
+YELLOW = 0xFFE0
+WHITE = 0xFFFF
+
+
+class ILI9342C:
+    def __init__(self, *a, **kw):
+        self.ops = []
+        self.pixels = 0
+
+    def init(self):
+        pass
+
+    def _op(self, name, px, *a):
+        self.ops.append((name,) + a)
+        self.pixels += px
+
+    def fill(self, c):
+        self._op('fill', 320 * 240, c)
+
+    def fill_rect(self, x, y, w, h, c):
+        self._op('fill_rect', w * h, x, y, w, h, c)
+
+    def rect(self, x, y, w, h, c):
+        self._op('rect', 2 * (w + h), x, y, w, h, c)
+
+    def hline(self, x, y, w, c):
+        self._op('hline', w, x, y, w, c)
+
+    def vline(self, x, y, h, c):
+        self._op('vline', h, x, y, h, c)
+
+    def pixel(self, x, y, c):
+        self._op('pixel', 1, x, y, c)
+
+    def text(self, font, s, x, y, fg, bg):
+        self._op('text', len(str(s)) * font.WIDTH * font.HEIGHT, str(s), x, y, fg, bg)
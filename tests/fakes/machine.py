@@ -0,0 +1,62 @@
+""" machine stand-in -- pins record their value and irq handler, SoftI2C is the FakeI2C sensor bus """
+from fakei2c import FakeI2C as SoftI2C  # noqa: F401
+
+
+class Pin:
+    IN = 1
+    OUT = 2
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, n, mode=None, value=None):
+        self.n = n
+        self.v = value or 0
+        self.handler = None
+
+    def init(self, mode=None, value=None):
+        if value is not None:
+            self.v = value
+
+    def irq(self, handler=None, trigger=None, **kw):
+        self.handler = handler
+
+    def fire(self):
+        """ raise the interrupt as the device would """
+
+        if self.handler is not None:
+            self.handler(self)
+
+    def value(self, v=None):
+        if v is None:
+            return self.v
+        self.v = v
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+
+class SPI:
+    def __init__(self, *a, **kw):
+        pass
+
+    def init(self, *a, **kw):
+        pass
+
+    def deinit(self):
+        pass
+
+
+class SoftSPI(SPI):
+    pass
+
+
+def soft_reset():
+    pass
+
+
+def reset():
+    pass
+
+
+def idle():
+    pass
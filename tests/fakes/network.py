@@ -0,0 +1,30 @@
+""" network stand-in, WLAN connects after a number of isconnected() polls """
+STA_IF = 0
+
+
+class WLAN:
+    connected = False
+    polls = 0
+    after = 30
+
+    def __init__(self, iface):
+        pass
+
+    def active(self, a=None):
+        return True
+
+    def isconnected(self):
+        WLAN.polls += 1
+        return WLAN.connected or WLAN.polls > WLAN.after
+
+    def connect(self, essid, pwd):
+        WLAN.polls = 0
+
+    def disconnect(self):
+        WLAN.connected = False
+
+    def ifconfig(self):
+        return ('10.0.0.2' if self.isconnected() else '0.0.0.0',)
+
+    def scan(self):
+        return [(b'net', b'', 1, -60, 3, 0)]
@@ -0,0 +1,2 @@
+""" no uasyncio on the host, modules fall back to asyncio """
+raise ImportError('uasyncio')
@@ -0,0 +1,35 @@
+""" uos stand-in, nothing is mounted """
+import os
+
+
+def listdir(path='.'):
+    return []
+
+
+def stat(path):
+    return os.stat(path)
+
+
+def remove(path):
+    os.remove(path)
+
+
+def rmdir(path):
+    os.rmdir(path)
+
+
+def rename(a, b):
+    os.rename(a, b)
+
+
+def mount(*a):
+    pass
+
+
+def umount(*a):
+    pass
+
+
+class VfsFat:
+    def __init__(self, bdev):
+        self.bdev = bdev
@@ -0,0 +1,3 @@
+""" utime stand-in, the virtual clock functions patched into time """
+from time import *  # noqa: F401,F403
+from time import ticks_ms, ticks_us, ticks_add, ticks_diff, sleep_ms, sleep_us  # noqa: F401
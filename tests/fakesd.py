@@ -0,0 +1,325 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" byte-level model of an SDHC card in SPI mode on the pins the Core2 display shares -- CMD0/8/58/55/ACMD41/9/16,
+single and multi-block reads and writes with CRC16 data tokens, ACMD23 and CMD12. Spi objects only reach the card
+while the Mux routes the pins to them and its chip select is low. Mux.log records every routing change, spi init
+with its baudrate and chip select edge in order, Card counts commands, bytes and the bus time they took """
+
+
+class Mux:
+    """ which spi object the shared pins are routed to, and the event log of the bus """
+
+    owner = None
+    log = []
+
+    @classmethod
+    def reset(cls):
+        cls.owner = None
+        cls.log = []
+
+
+def crc16(data):
+    """ CRC16-CCITT of a data block, bitwise as the card computes it """
+
+    c = 0
+    for b in data:
+        c ^= b << 8
+        for _ in range(8):
+            c = ((c << 1) ^ 0x1021) if c & 0x8000 else c << 1
+            c &= 0xFFFF
+    return c
+
+
+class Card:
+    """ the card -- max_baud corrupts reads clocked faster (a bad token beyond twice that), flip_every corrupts
+    every n-th block read, no_crc sends zero CRCs and acmd41_tries sets how long init stays idle """
+
+    def __init__(self, sectors=8192, busy=4, acmd41_tries=3, max_baud=None, flip_every=0):
+        self.data = bytearray(512 * sectors)
+        self.sectors = sectors
+        self.busy = busy
+        self.acmd41_tries = acmd41_tries
+        self.max_baud = max_baud
+        self.flip_every = flip_every
+        self.no_crc = False
+        self.reset()
+        self.cmds = {}
+        self.bytes = 0
+        self.bus_us = 0.0
+        self.blocks_rd = 0
+        self.blocks_wr = 0
+        self.cs_edges = 0
+
+    def reset(self):
+        """ power cycle, the card needs init again """
+
+        self.q = bytearray()
+        self.qi = 0
+        self.cmd = bytearray()
+        self.state = 'cmd'
+        self.app = False
+        self.ready = False
+        self.tries = 0
+        self.rd_next = None
+        self.wr_addr = None
+        self.wbuf = bytearray()
+        self.busy_left = 0
+        self.blocks_out = 0
+
+    def push(self, b):
+        self.q.extend(b)
+
+    def block(self, addr, baud):
+        """ a data token, block addr and its CRC as clocked out at baud """
+
+        d = bytearray(self.data[addr * 512:addr * 512 + 512])
+        c = crc16(d)
+        self.blocks_out += 1
+        tok = 0xFE
+        if self.max_baud and baud > self.max_baud:
+            d[7] ^= 0x10
+            if baud > 2 * self.max_baud:
+                tok = 0x7E
+        if self.no_crc:
+            c = 0
+        if self.flip_every and self.blocks_out % self.flip_every == 0:
+            d[100] ^= 0x01
+        self.blocks_rd += 1
+        return b'\xff' + bytes([tok]) + d + bytes([c >> 8, c & 0xFF])
+
+    def xfer(self, b, baud):
+        """ exchange one byte with chip select low """
+
+        self.bytes += 1
+        self.bus_us += 8e6 / baud
+        if self.qi < len(self.q):
+            out = self.q[self.qi]
+            self.qi += 1
+            if self.qi == len(self.q):
+                self.q = bytearray()
+                self.qi = 0
+        elif self.busy_left:
+            self.busy_left -= 1
+            out = 0
+        elif self.state == 'rdmulti':
+            self.push(self.block(self.rd_next, baud))
+            self.rd_next += 1
+            out = self.q[0]
+            self.qi = 1
+        else:
+            out = 0xFF
+        self.take(b, baud)
+        return out
+
+    def take(self, b, baud):
+        """ the byte the host sent -- data packets while writing, else the next command byte """
+
+        if self.state in ('w24', 'w25'):
+            if not self.wbuf:
+                if b == 0xFF:
+                    return
+                if b == 0xFD and self.state == 'w25':
+                    self.state = 'cmd'
+                    self.busy_left = self.busy
+                    return
+                if b in (0xFE, 0xFC):
+                    self.wbuf.append(b)
+                    return
+                if b & 0xC0 != 0x40:
+                    return
+                self.state = 'cmd'
+            else:
+                self.wbuf.append(b)
+                if len(self.wbuf) == 515:
+                    self.data[self.wr_addr * 512:self.wr_addr * 512 + 512] = self.wbuf[1:513]
+                    self.blocks_wr += 1
+                    self.wr_addr += 1
+                    self.wbuf = bytearray()
+                    self.q = bytearray(b'\xe5')  # data response xxx0 0101, accepted
+                    self.qi = 0
+                    self.busy_left = self.busy
+                    if self.state == 'w24':
+                        self.state = 'cmd'
+                return
+        if not self.cmd and b & 0xC0 != 0x40:
+            return
+        self.cmd.append(b)
+        if len(self.cmd) < 6:
+            return
+        c = self.cmd[0] & 0x3F
+        arg = int.from_bytes(self.cmd[1:5], 'big')
+        self.cmd = bytearray()
+        self.command(c, arg, baud)
+
+    def command(self, c, arg, baud):
+        key = ('A' if self.app else '') + str(c)
+        self.cmds[key] = self.cmds.get(key, 0) + 1
+        app = self.app
+        self.app = False
+        self.q = bytearray()
+        self.qi = 0
+        r1 = 0 if self.ready else 1
+        if c in (17, 18, 24, 25) and not self.ready:
+            self.push(b'\xff\x01')
+        elif c == 0:
+            self.reset()
+            self.push(b'\xff\x01')
+        elif c == 8:
+            self.push(b'\xff\x01\x00\x00\x01\xaa')
+        elif c == 58:
+            self.push(bytes([0xFF, r1, 0xC0, 0xFF, 0x80, 0x00]))
+        elif c == 55:
+            self.app = True
+            self.push(bytes([0xFF, r1]))
+        elif c == 41 and app:
+            self.tries += 1
+            if self.tries >= self.acmd41_tries:
+                self.ready = True
+            self.push(bytes([0xFF, 0 if self.ready else 1]))
+        elif c == 23 and app:
+            self.push(b'\xff\x00')
+        elif c == 9:
+            csd = bytearray(16)
+            csd[0] = 0x40
+            size = self.sectors // 1024 - 1
+            csd[8] = size >> 8
+            csd[9] = size & 0xFF
+            cr = crc16(csd)
+            self.push(b'\xff\x00\xff\xfe' + csd + bytes([cr >> 8, cr & 0xFF]))
+        elif c == 16:
+            self.push(b'\xff\x00')
+        elif c == 13:
+            self.push(b'\xff\x00\x00')
+        elif c == 17:
+            self.push(b'\xff\x00')
+            self.push(self.block(arg, baud))
+        elif c == 18:
+            self.push(b'\xff\x00')
+            self.state = 'rdmulti'
+            self.rd_next = arg
+        elif c == 12:
+            self.state = 'cmd'
+            self.push(b'\xff\xff\x00')
+            self.busy_left = 0
+        elif c in (24, 25):
+            self.push(b'\xff\x00')
+            self.state = 'w24' if c == 24 else 'w25'
+            self.wr_addr = arg
+            self.wbuf = bytearray()
+        else:
+            self.push(b'\xff\x04')
+
+
+class CsPin:
+    """ chip select, edges go to the Mux log """
+
+    OUT = 2
+
+    def __init__(self, card=None, name='cs'):
+        self.card = card
+        self.name = name
+        self.v = 1
+
+    def init(self, mode=None, value=None):
+        if value is not None:
+            self.value(value)
+
+    def value(self, v=None):
+        if v is None:
+            return self.v
+        if v != self.v:
+            Mux.log.append((self.name, v))
+            if self.card:
+                self.card.cs_edges += 1
+        self.v = v
+
+    def __call__(self, v=None):
+        return self.value(v)
+
+
+class FakeSPI:
+    """ an spi on the shared pins, SoftSPI or the hardware SPI2 -- bytes reach the card only while routed here with
+    the card selected, bytes sent while routed elsewhere count as lost """
+
+    def __init__(self, card, cs, name='soft', baudrate=100000):
+        self.card = card
+        self.cs = cs
+        self.name = name
+        self.baudrate = baudrate
+        self.inits = 0
+        self.lost = 0
+        self.calls = 0
+
+    def init(self, baudrate=None, **kw):
+        if baudrate:
+            self.baudrate = baudrate
+        self.inits += 1
+        if Mux.owner is not self:
+            Mux.log.append(('mux', self.name))
+        Mux.owner = self
+        Mux.log.append(('init', self.name, self.baudrate))
+
+    def deinit(self):
+        Mux.log.append(('deinit', self.name))
+        if Mux.owner is self:
+            Mux.owner = None
+
+    def _x(self, b):
+        if Mux.owner is not self:
+            self.lost += 1
+            return 0xFF
+        if self.cs.v:
+            self.card.bus_us += 8e6 / self.baudrate
+            return 0xFF
+        return self.card.xfer(b, self.baudrate)
+
+    def write(self, buf):
+        self.calls += 1
+        for b in buf:
+            self._x(b)
+
+    def readinto(self, buf, write=0xFF):
+        self.calls += 1
+        for i in range(len(buf)):
+            buf[i] = self._x(write)
+
+    def read(self, n, write=0xFF):
+        buf = bytearray(n)
+        self.readinto(buf, write)
+        return bytes(buf)
+
+    def write_readinto(self, out, buf):
+        self.calls += 1
+        for i in range(len(out)):
+            buf[i] = self._x(out[i])
+
+
+class HwSPI(FakeSPI):
+    """ the display's SPI2, a draw while the pins are routed to another spi is lost """
+
+    def draw(self):
+        if Mux.owner is not self:
+            self.lost += 1
+        else:
+            Mux.log.append(('draw', self.name, self.baudrate))
@@ -0,0 +1,314 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" scheduler tests -- a finger on the fake touch bus drives Bos.app_loop through opening an app, starting an async
+task and QUIT cancelling it, with the FT6x36 interrupt raised as the controller would every 16 ms. draw_line is
+checked against pen stamped Bresenham on the recording display """
+import asyncio
+import random
+
+import network
+import pytest
+
+from apps import Apps
+
+FRAME = 0.016
+
+
+@pytest.fixture
+def ap(realtime):
+    network.WLAN.connected = False
+    network.WLAN.after = 1000000
+    ap = Apps()
+    ap.m5parms['essid'] = 'TBD'
+    ap.m5parms['pwd'] = 'xxxx'
+    ap.install_app(('btn_1', 'WiFi'), btn_5='Wifi', btn_6='Scan', btn_7='Clk', btn_8='Wipe')
+    ap.install_app(('btn_3', 'DoDl'), btn_5='CLR', btn_6='Pen', btn_7='TBD', btn_8='Wipe')
+    ap.home_screen()
+    yield ap
+    network.WLAN.after = 30
+
+
+async def finger(ap, x, y, ms, dx=0, lift=True):
+    """ hold a finger at x, y for ms, moving dx per frame, and report the lift unless lift is False """
+
+    bus = ap.i2c.touch
+    t = 0
+    while t < ms:
+        bus.set(1, x, y)
+        ap.touch.irq_pin.fire()
+        await asyncio.sleep(FRAME)
+        x += dx
+        t += FRAME * 1000
+    if lift:
+        bus.set(0)
+        ap.touch.irq_pin.fire()
+    await asyncio.sleep(0.2)
+
+
+def run(ap, script):
+    async def main():
+        loop = asyncio.create_task(ap.app_loop())
+        await asyncio.sleep(0.1)
+        try:
+            await script()
+            assert not loop.done()
+        finally:
+            loop.cancel()
+
+    asyncio.run(main())
+
+
+def test_quit_cancels_running_task(ap):
+    seen = {}
+
+    async def script():
+        await finger(ap, 10, 210, 60)  # TAP btn_1 opens the wifi app
+        seen['app'] = ap.ctx['app']
+        await finger(ap, 10, 10, 60)  # btn_5 starts the connect coroutine
+        seen['task'] = ap.ctx['task']
+        seen['running'] = not seen['task'].done()
+        await finger(ap, 10, 210, 60)  # QUIT while it still waits for the access point
+
+    run(ap, script)
+    assert seen['app'] == 'btn_1'
+    assert seen['running']
+    assert seen['task'].cancelled()
+    assert ap.ctx['task'] is None
+    assert ap.ctx['app'] is None
+
+
+def test_hold_open_without_lift_report(ap):
+    """ a controller that drops the lift frame -- the app opened by HOLD still sees two separate strokes """
+
+    lines = []
+    ap.draw_line = lambda *a, **kw: lines.append(a[:4])
+
+    async def script():
+        await finger(ap, 170, 210, 600, lift=False)  # HOLD btn_3 opens dodl
+        assert ap.ctx['app'] == 'btn_3'
+        ap.ctx['pen'] = 1
+        await finger(ap, 100, 100, 48, dx=5, lift=False)
+        await finger(ap, 200, 150, 48, dx=5, lift=False)
+        await finger(ap, 170, 210, 60)  # QUIT
+
+    run(ap, script)
+    assert lines
+    assert all(y0 == y1 for x0, y0, x1, y1 in lines)
+    assert {y0 for x0, y0, x1, y1 in lines} == {100, 150}
+    assert ap.ctx['app'] is None
+
+
+def test_blocking_wrapper_inside_task(ap, capsys):
+    """ a sync task calling read_imu is told to await aread_imu, one returning the coroutine gets it scheduled """
+
+    ap.m5parms['imu_size'] = 4
+    ap.m5parms['imu_wait'] = 10
+    got = []
+
+    async def sample():
+        got.append(await ap.aread_imu())
+
+    ap.register_app('btn_4', ap.tbtn4, btn_5=lambda uid, uidt: got.append(ap.read_imu()),
+                    btn_6=lambda uid, uidt: sample())
+
+    async def script():
+        await finger(ap, 250, 210, 60)  # TAP btn_4
+        assert ap.ctx['app'] == 'btn_4'
+        await finger(ap, 10, 10, 60)  # btn_5 calls the blocking wrapper
+        assert not got
+        await finger(ap, 90, 10, 60)  # btn_6 hands its coroutine to the scheduler
+        await asyncio.sleep(0.2)
+        await finger(ap, 250, 210, 60)  # QUIT
+
+    run(ap, script)
+    assert "called from a running task, await aread_imu() instead" in capsys.readouterr().out
+    assert len(got) == 1 and len(got[0]) == 4
+
+
+def bresenham(x0, y0, x1, y1):
+    """ the points of the line a pixel at a time, with draw_line's error term """
+
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    x, y = x0, y0
+    pts = [(x, y)]
+    err = max(dx, dy) // 2
+    for _ in range(max(dx, dy)):
+        if dx >= dy:
+            x += sx
+            err -= dy
+            if err < 0:
+                y += sy
+                err += dx
+        else:
+            y += sy
+            err -= dx
+            if err < 0:
+                x += sx
+                err += dy
+        pts.append((x, y))
+    return pts
+
+
+def stamp(pts, pen):
+    return {(x + i, y + j) for x, y in pts for i in range(pen) for j in range(pen)}
+
+
+def covered(ops):
+    return {(x + i, y + j) for op, x, y, w, h, c in ops for i in range(w) for j in range(h)}
+
+
+@pytest.fixture
+def canvas():
+    ap = Apps()
+    ap.tft.ops.clear()
+    return ap
+
+
+@pytest.mark.parametrize('pen', [1, 2, 3, 5, 9])
+def test_draw_line_matches_stamped_bresenham(canvas, pen):
+    """ the runs cover exactly the pen squares stamped at every Bresenham point, one fill_rect per minor step """
+
+    r = random.Random(pen)
+    for _ in range(300):
+        x0, y0, x1, y1 = [r.randint(0, 60) for _ in range(4)]
+        canvas.tft.ops.clear()
+        n = canvas.draw_line(x0, y0, x1, y1, pen)
+        pts = bresenham(x0, y0, x1, y1)
+        assert all(abs(b[0] - a[0]) <= 1 and abs(b[1] - a[1]) <= 1 for a, b in zip(pts, pts[1:]))
+        px = covered(canvas.tft.ops)
+        assert px == stamp(pts, pen)
+        assert stamp([(x0, y0), (x1, y1)], pen) <= px
+        assert n == len(canvas.tft.ops) == min(abs(x1 - x0), abs(y1 - y0)) + 1
+        assert {op[0] for op in canvas.tft.ops} == {'fill_rect'}
+
+
+def test_draw_line_rects_per_pen(canvas):
+    """ a shallow 40 px stroke is 6 rects whatever the pen, where stamping pushes pen * pen px per point """
+
+    for pen in (1, 3, 9):
+        canvas.tft.ops.clear()
+        assert canvas.draw_line(100, 100, 140, 105, pen) == 6
+        # each run overlaps the next by its pen - 1 px tail, against 41 stamps of pen * pen
+        assert sum(w * h for op, x, y, w, h, c in canvas.tft.ops) == pen * (41 + 6 * (pen - 1)) <= 41 * pen * pen
+
+
+def test_draw_line_clipped(canvas):
+    loc = canvas.loc_w
+    canvas.draw_line(10, loc[1] + loc[3] - 3, 60, loc[1] + loc[3] + 20, 9, clip=loc)
+    px = covered(canvas.tft.ops)
+    assert px and max(y for x, y in px) == loc[1] + loc[3] - 1
+    canvas.tft.ops.clear()
+    assert canvas.draw_line(10, 0, 60, 5, 3, clip=loc) == 0
+    assert canvas.tft.ops == []
+
+
+@pytest.fixture
+def bos():
+    network.WLAN.connected = False
+    return Apps()
+
+
+def test_boot_creates_display_only(bos):
+    assert sorted(bos._dev) == ['axp', 'spi2', 'tft']
+    report = bos.boot_report()
+    assert sorted(report) == ['axp', 'init', 'spi2', 'tft']
+    s = bos.sensor
+    assert bos.sensor is s and 'sensor' in bos.boot_report()
+    assert bos.release('sensor') and not bos.release('sensor')
+    assert bos.sensor is not s
+
+
+def test_release_spi2_takes_its_users(bos):
+    """ the display, the bus arbiter and the card mounted through it are released before spi2 is deinit """
+
+    order = []
+    spi = bos.spi2
+    spi.deinit = lambda: order.append('spi2')
+    bus = bos.device('bus')
+    bos._dev['sd'] = 'vfs'
+    bos._free['sd'] = lambda d: order.append('sd')
+    tft = bos.tft
+    assert bos.release('spi2')
+    assert order == ['sd', 'spi2']
+    assert not {'spi2', 'bus', 'tft', 'sd'} & set(bos._dev)
+    assert bos.tft is not tft and bos.device('bus') is not bus
+    assert bos.spi2 is not spi
+
+
+def test_release_bus_keeps_spi2(bos):
+    spi = bos.spi2
+    bos.device('bus')
+    bos._dev['sd'] = 'vfs'
+    bos._free['sd'] = lambda d: None
+    assert bos.release('bus')
+    assert 'sd' not in bos._dev and bos.spi2 is spi and 'tft' in bos._dev
+
+
+def test_disconnect_wifi_without_wlan(bos, capsys):
+    assert bos.disconnect_wifi() == '0.0.0.0'
+    assert 'wifi' not in bos._dev
+    assert "* wifi not active" in capsys.readouterr().out
+    assert not bos.is_wifi_connected()
+    assert 'wifi' in bos._dev
+    assert bos.disconnect_wifi() == '0.0.0.0'
+    assert 'wifi' not in bos._dev
+
+
+def pushed(ap, fn):
+    """ pixels the display received and painted_px counted while fn ran """
+
+    px = ap.tft.pixels
+    painted = ap.painted_px
+    fn()
+    return ap.tft.pixels - px, ap.painted_px - painted
+
+
+def test_transition_pixels(bos):
+    """ home -> app pushes 74224 px, down from 130848 before paint kept a display list, and the 51200 px btn_w wipe
+    is most of it -- every round trip costs the same """
+
+    bos.install_app(('btn_1', 'WiFi'), btn_5='Wifi', btn_6='Scan', btn_7='Clk', btn_8='Wipe')
+    bos.home_screen()
+    tap = {'btn_1': {'action': 'TAP'}}
+    assert bos.loc_w[2] * bos.loc_w[3] == 51200
+    for _ in range(2):
+        assert pushed(bos, lambda: bos.app_btn(tap)) == (74224, 74224)
+        # the splash is written with tft directly, painted_px counts the btns only
+        assert pushed(bos, lambda: bos.app_btn(tap)) == (82048, 75008)
+
+
+def test_noop_edit_pushes_nothing(bos):
+    bos.home_screen()
+    assert pushed(bos, lambda: bos.edit('btn_1', lbl=bos.btns['btn_1']['lbl'])) == (0, 0)
+    assert pushed(bos, lambda: bos.paint('btn_2', bos.btns['btn_2'])) == (0, 0)
+    lbl = bos.btns['btn_1']['lbl']
+    font = bos.btns['btn_1']['font']
+    # a new label of the same length redraws only the text
+    assert pushed(bos, lambda: bos.edit('btn_1', lbl='X' * len(lbl))) == (len(lbl) * font.WIDTH * font.HEIGHT,) * 2
+    full = pushed(bos, lambda: bos.edit('btn_1'))
+    loc = bos.btns['btn_1']['loc']
+    assert full[0] > loc[2] * loc[3]
@@ -0,0 +1,198 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" gesture replay -- the strokes in fixtures/strokes.json are (ticks_ms, points, x, y) samples at the FT6x36 report
+rate of about 16 ms with a pixel of jitter, the last sample of each is the lift. They are fed to Gesture directly and
+through FocalTouch's INT queue on the virtual clock. The btn hit index is checked against a linear scan """
+import json
+import math
+import os
+import random
+import time
+
+import pytest
+from machine import Pin
+
+from bench_hit import MAX_X, MAX_Y, brute, layouts
+from fakei2c import FakeTouchBus
+from focaltouch import FocalTouch, Gesture
+
+with open(os.path.join(os.path.dirname(__file__), 'fixtures', 'strokes.json')) as f:
+    STROKES = json.load(f)
+
+# events other than DRAG each stroke must produce, in order
+EXPECT = {
+    'tap': ['TAP'],
+    'double_tap': ['TAP', 'DOUBLE_TAP'],
+    'hold': ['HOLD'],
+    'drag': [],
+    'drag_back': [],
+    'swipe_right': ['RIGHT'],
+    'swipe_left': ['LEFT'],
+    'swipe_up': ['UP'],
+    'swipe_down': ['DOWN'],
+}
+
+
+def replay(g, samples):
+    return [e for e in (g.feed(n, x, y, t) for t, n, x, y in samples) if e is not None]
+
+
+def swipe_speed(samples):
+    """ px/s from the first to the last touch point over the time to the lift """
+
+    down = [s for s in samples if s[1]]
+    dx = down[-1][2] - down[0][2]
+    dy = down[-1][3] - down[0][3]
+    return math.sqrt(dx * dx + dy * dy) * 1000 / (samples[-1][0] - down[0][0])
+
+
+@pytest.mark.parametrize('name', sorted(EXPECT))
+def test_replay(name, clock):
+    g = Gesture()
+    events = replay(g, STROKES[name])
+    assert [e for e in events if e != Gesture.DRAG] == EXPECT[name]
+    if name.startswith('swipe'):
+        assert events.count(Gesture.DRAG) >= 3
+        assert g.speed == pytest.approx(swipe_speed(STROKES[name]), abs=1)
+    elif name.startswith('drag'):
+        # the finger moved, it reports DRAG and never HOLD, and the release short of a swipe is no TAP
+        assert events.count(Gesture.DRAG) >= 3
+        assert g.ms > g.hold_ms if name == 'drag' else g.ms < g.hold_ms
+    else:
+        assert Gesture.DRAG not in events
+
+
+def test_swipe_speeds_rank(clock):
+    """ the fixtures are swiped at different rates, speed follows distance over duration """
+
+    speeds = {}
+    for name in ('swipe_right', 'swipe_left', 'swipe_up', 'swipe_down'):
+        g = Gesture()
+        replay(g, STROKES[name])
+        speeds[name] = g.speed
+    assert speeds['swipe_right'] > speeds['swipe_up'] > speeds['swipe_left'] > speeds['swipe_down'] > 500
+
+
+def test_tap_after_double_ms_is_single(clock):
+    g = Gesture()
+    first = STROKES['tap']
+    again = [[t + 1000, n, x, y] for t, n, x, y in first]
+    assert replay(g, first) == ['TAP']
+    assert replay(g, again) == ['TAP']
+
+
+def test_tap_after_drag_is_single(clock):
+    """ a drag leaves no tap behind for the next one to pair with """
+
+    g = Gesture()
+    replay(g, STROKES['drag_back'])
+    end, x, y = STROKES['drag_back'][-2][0], STROKES['drag_back'][0][2], STROKES['drag_back'][0][3]
+    tap = [[end + 100 + t - STROKES['tap'][0][0], n, x, y] for t, n, _, _ in STROKES['tap']]
+    assert replay(g, tap) == ['TAP']
+
+
+def feed_irq(clock, samples, lift=True):
+    """ FocalTouch in INT mode, each sample raised on the virtual clock at its timestamp """
+
+    bus = FakeTouchBus()
+    pin = Pin(39)
+    ft = FocalTouch(bus, {'screen': {'loc': (0, 0, 320, 240)}}, irq_pin=pin)
+    events = []
+    if not lift:
+        samples = samples[:-1]
+    for t, n, x, y in samples:
+        clock.advance(t - time.ticks_ms())
+        bus.set(n, x, y)
+        pin.fire()
+        e = ft.poll_gesture()
+        while e is not None:
+            events.append(e)
+            e = ft.poll_gesture()
+    if not lift:
+        clock.advance(ft.release_ms)
+        e = ft.poll_gesture()
+        if e is not None:
+            events.append(e)
+    return ft, events
+
+
+@pytest.mark.parametrize('name', sorted(EXPECT))
+def test_replay_through_int_queue(name, clock):
+    g = Gesture()
+    direct = replay(g, STROKES[name])
+    ft, events = feed_irq(clock, STROKES[name])
+    assert events == direct
+    assert ft.gesture.speed == g.speed
+    assert ft.dropped == 0
+
+
+@pytest.mark.parametrize('name', ['tap', 'swipe_left', 'swipe_down'])
+def test_missing_lift_expires(name, clock):
+    """ a controller that drops the lift frame -- release_ms without a report ends the stroke the same way """
+
+    ft, events = feed_irq(clock, STROKES[name], lift=False)
+    assert [e for e in events if e != Gesture.DRAG] == EXPECT[name]
+    assert not ft.gesture.down
+
+
+def test_hit_matches_linear_scan():
+    """ random overlapping layouts, probed at random points and at every btn corner and one pixel outside it """
+
+    bus = FakeTouchBus()
+    r = random.Random(3)
+    for btns in layouts(100):
+        ft = FocalTouch(bus, btns)
+        probes = [(r.randint(0, MAX_X + 5), r.randint(0, MAX_Y + 5)) for _ in range(200)]
+        for v in btns.values():
+            x, y, w, h = v['loc']
+            probes += [(x + dx, y + dy) for dx in (-1, 0, w, w + 1) for dy in (-1, 0, h, h + 1)]
+        probes += [(0, 0), (MAX_X, MAX_Y), (MAX_X + 1, 0), (0, MAX_Y + 1)]
+        for x, y in probes:
+            if x >= 0 and y >= 0:
+                assert ft.hit(x, y) == brute(btns, x, y), (x, y)
+
+
+def test_index_btns_after_change():
+    bus = FakeTouchBus()
+    btns = {'a': {'loc': (0, 0, 80, 40)}, 'b': {'loc': (40, 20, 80, 40)}}
+    ft = FocalTouch(bus, btns)
+    assert ft.hit(60, 30) == 'a'  # overlap goes to the first btn in dict order
+    assert ft.hit(100, 50) == 'b'
+    btns['b']['loc'] = (200, 200, 10, 10)
+    btns['c'] = {'loc': (100, 40, 20, 20)}
+    assert ft.hit(100, 50) == 'b'  # stale until reindexed
+    ft.index_btns()
+    assert ft.hit(100, 50) == 'c'
+    assert ft.hit(210, 210) == 'b' and ft.hit(211, 211) is None
+    del btns['a']
+    ft.index_btns()
+    assert ft.hit(10, 10) is None
+
+
+def test_index_btns_limit():
+    ft = FocalTouch(FakeTouchBus(), {'b{}'.format(i): {'loc': (i, 0, 1, 1)} for i in range(254)})
+    assert ft.hit(253, 0) == 'b252'
+    ft.btns['b254'] = {'loc': (0, 0, 1, 1)}
+    with pytest.raises(ValueError):
+        ft.index_btns()
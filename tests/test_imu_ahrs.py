@@ -0,0 +1,130 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" Attitude on synthetic motion -- raw MPU6886 counts for known roll, pitch and yaw traces with gyro bias, gyro noise
+and accel vibration, the estimates checked against the true angles """
+import math
+import random
+
+import pytest
+
+from imu_ahrs import Attitude
+
+RATE = 200
+DT = 1 / RATE
+G = 16384  # counts per g at +-2g
+GK = 32768 / 250  # counts per deg/s at +-250 deg/s
+BIAS = (26, -13, 20)
+
+
+def trace(sec, yaw_rate=10, bias=BIAS, seed=2):
+    """ yields t, roll, pitch and the raw sample of a +-60 deg 0.5 Hz roll, +-20 deg 0.2 Hz pitch and a steady
+    yaw_rate turn, accel with 50 mG vibration and gyro with 60 count noise on top of bias """
+
+    rnd = random.Random(seed)
+    for i in range(int(sec * RATE)):
+        t = i * DT
+        w1 = 2 * math.pi * 0.5
+        w2 = 2 * math.pi * 0.2
+        roll = 60 * math.sin(w1 * t)
+        pitch = 20 * math.sin(w2 * t)
+        r = math.radians(roll)
+        p = math.radians(pitch)
+        acc = (-math.sin(p), math.sin(r) * math.cos(p), math.cos(r) * math.cos(p))
+        raw = [int(G * (a + rnd.gauss(0, 0.05))) for a in acc] + [0]
+        rates = (60 * w1 * math.cos(w1 * t), 20 * w2 * math.cos(w2 * t), yaw_rate)
+        raw += [int(v * GK + b + rnd.gauss(0, 60)) for v, b in zip(rates, bias)]
+        yield t, roll, pitch, raw
+
+
+def wrap(a):
+    return (a + 180) % 360 - 180
+
+
+def run(att, sec=20, settle=2, **kw):
+    """ returns the max roll/pitch error of att after settle seconds """
+
+    err = 0
+    for t, roll, pitch, raw in trace(sec, **kw):
+        att.update(raw, DT)
+        if t > settle:
+            err = max(err, abs(att.roll - roll), abs(att.pitch - pitch))
+    return err
+
+
+def test_tracks_roll_and_pitch():
+    """ the filter stays within a degree where accel tilt alone is off by several """
+
+    a = Attitude()
+    a.level([0, 0, 0, 0] + list(BIAS))
+    assert run(a) < 1.5
+    assert run(Attitude(alpha=0)) > 5
+
+
+def test_first_update_takes_accel_tilt():
+    a = Attitude()
+    r = math.radians(30)
+    a.update([0, int(G * math.sin(r)), int(G * math.cos(r)), 0, 5000, 5000, 0], DT)
+    assert a.roll == pytest.approx(30, abs=0.01)
+    assert a.pitch == pytest.approx(0, abs=0.01)
+
+
+def test_yaw_integrates_and_drifts_with_bias():
+    """ leveled yaw follows a 10 deg/s turn, unleveled it drifts by the gyro z bias times the time """
+
+    sec = 20
+    a = Attitude()
+    a.level([0, 0, 0, 0] + list(BIAS))
+    b = Attitude()
+    run(a, sec)
+    run(b, sec)
+    assert wrap(a.yaw - wrap(10 * sec)) == pytest.approx(0, abs=0.5)
+    drift = BIAS[2] / GK * sec
+    assert wrap(b.yaw - a.yaw) == pytest.approx(drift, abs=0.5)
+    assert -180 <= a.yaw < 180 and -180 <= b.yaw < 180
+
+
+@pytest.mark.parametrize('rate', [10, -10])
+def test_roll_wraps_at_180(rate):
+    """ rolling through +-180 deg keeps the estimate on the true angle instead of blending across the seam """
+
+    a = Attitude()
+    start = 170 if rate > 0 else -170
+    err = 0
+    for i in range(400):
+        ang = start + rate * i * DT
+        r = math.radians(ang)
+        a.update([0, int(G * math.sin(r)), int(G * math.cos(r)), 0, int(rate * GK), 0, 0], DT)
+        err = max(err, abs(wrap(a.roll - wrap(ang))))
+        assert -180 <= a.roll <= 180
+    assert err < 0.1
+    assert a.roll == pytest.approx(wrap(start + rate * 399 * DT), abs=0.1)
+
+
+def test_reset_restarts_from_accel():
+    a = Attitude()
+    run(a, 1)
+    a.reset()
+    assert (a.roll, a.pitch, a.yaw, a.n) == (0.0, 0.0, 0.0, 0)
+    a.update([0, 0, G, 0, 0, 0, 0], DT)
+    assert a.roll == pytest.approx(0) and a.n == 1
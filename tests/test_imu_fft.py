@@ -0,0 +1,124 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" Spectrum against a reference DFT in floating point -- bins are compared as |X[k]| = sqrt(mag[k]) * scale """
+import cmath
+import math
+import random
+from array import array
+
+import pytest
+
+from imu_fft import Spectrum
+
+
+def dft(x):
+    """ |X[k]| for k < n/2 of x with its mean removed """
+
+    n = len(x)
+    m = sum(x) / n
+    x = [v - m for v in x]
+    return [abs(sum(x[t] * cmath.exp(-2j * math.pi * k * t / n) for t in range(n))) for k in range(n // 2)]
+
+
+def bins(s, x):
+    for i, v in enumerate(x):
+        s.x[i] = v
+    return [math.sqrt(v) * s.scale for v in s.run()]
+
+
+@pytest.mark.parametrize('n', [8, 64, 256])
+@pytest.mark.parametrize('amp', [800, 20, 3])
+def test_matches_reference(n, amp):
+    """ two tones and noise at amplitudes from near full scale down to a few LSB of the int16 input """
+
+    rnd = random.Random(n * 1000 + amp)
+    rate = 500
+    f1 = rnd.uniform(5, 200)
+    f2 = rnd.uniform(5, 200)
+    x = [int(1000 + amp * math.sin(2 * math.pi * f1 * t / rate) + 0.4 * amp * math.cos(2 * math.pi * f2 * t / rate + 1)
+             + rnd.gauss(0, amp / 40)) for t in range(n)]
+    s = Spectrum(n)
+    got = bins(s, x)
+    ref = dft(x)
+    err = max(abs(a - b) for a, b in zip(got[1:], ref[1:])) / max(ref)
+    assert err < 0.005
+    assert s.peak() == max(range(1, n // 2), key=lambda k: ref[k])
+
+
+@pytest.mark.parametrize('k', [1, 5, 37, 127])
+def test_pure_tone_bin(k):
+    """ a sine on bin k puts all its energy there, |X[k]| = amp * n / 2 """
+
+    n = 256
+    amp = 1200
+    x = [int(round(amp * math.sin(2 * math.pi * k * t / n))) for t in range(n)]
+    s = Spectrum(n)
+    got = bins(s, x)
+    assert s.peak() == k
+    assert got[k] == pytest.approx(amp * n / 2, rel=0.01)
+    assert max(v for i, v in enumerate(got) if i != k) < 0.005 * got[k]
+
+
+def test_mean_removed():
+    """ a gravity sized offset leaves DC empty and every other bin as without it """
+
+    n = 64
+    x = [int(round(300 * math.sin(2 * math.pi * 9 * t / n) + 100 * math.cos(2 * math.pi * 20 * t / n)))
+         for t in range(n)]
+    s = Spectrum(n)
+    plain = bins(s, x)
+    shifted = bins(s, [v + 16384 for v in x])
+    assert shifted[0] < 0.001 * max(shifted)
+    assert shifted == pytest.approx(plain, abs=0.001 * max(plain))
+
+
+def test_constant_input_is_flat():
+    s = Spectrum(16)
+    assert max(bins(s, [16384] * 16)) == 0
+
+
+def test_size_must_be_power_of_two():
+    with pytest.raises(ValueError):
+        Spectrum(100)
+    with pytest.raises(ValueError):
+        Spectrum(2)
+
+
+@pytest.mark.parametrize('nbands', [64, 16, 128])
+def test_bands_are_bin_maxima(nbands):
+    """ each band is the amplitude of its largest bin, the DC bin is left out of the first """
+
+    n = 256
+    rnd = random.Random(nbands)
+    x = [int(16000 + 200 * math.sin(2 * math.pi * 40 * t / n) + rnd.gauss(0, 30)) for t in range(n)]
+    s = Spectrum(n)
+    got = bins(s, x)
+    amp = array('f', [0] * nbands)
+    top = s.bands(amp)
+    per = n // 2 // nbands
+    exp = [max(got[max(b * per, 1):b * per + per], default=0) * 2 / n for b in range(nbands)]
+    assert list(amp) == pytest.approx(exp, rel=1e-5)
+    assert top == pytest.approx(max(exp), rel=1e-5)
+    assert top == pytest.approx(200, rel=0.02)
+    assert max(range(nbands), key=lambda b: amp[b]) == 40 // per
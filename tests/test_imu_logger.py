@@ -0,0 +1,154 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" ImuLogger -- the double-buffered writer against in-memory files with a write latency on the virtual clock. Like
+MicroPython file writes, a slow write blocks the event loop, so only the MPU6886 FIFO keeps sampling through it """
+import asyncio
+import io
+import time
+
+import pytest
+
+import btn_os
+from fakei2c import FakeI2C, FifoIMU
+from imu_buffer import ImuLogger
+
+
+class SlowFile(io.BytesIO):
+    """ a file whose every write blocks for lat_ms """
+
+    def __init__(self, lat_ms=0):
+        super().__init__()
+        self.lat_ms = lat_ms
+        self.sizes = []
+
+    def write(self, b):
+        self.sizes.append(len(b))
+        time.sleep_ms(self.lat_ms)
+        return super().write(b)
+
+    def close(self):
+        pass
+
+
+class BadFile(io.BytesIO):
+    def write(self, b):
+        raise OSError(5)
+
+
+def lines(f):
+    return f.getvalue().decode().splitlines()[1:]
+
+
+async def produce(log, n, burst=8):
+    w = asyncio.create_task(log.writer())
+    for i in range(n):
+        log.append(1000 + i, (i, 2, 3), (4, 5, 6), 77.0)
+        if i % burst == burst - 1:
+            await asyncio.sleep(0)
+    await log.close(w)
+
+
+def test_whole_chunks_in_order(clock):
+    f = SlowFile()
+    log = ImuLogger(f, size=64, chunk=512)
+    asyncio.run(produce(log, 1000))
+    ts = [int(line.split(',')[0]) for line in lines(f)]
+    assert ts == list(range(1000, 2000))
+    assert log.samples == 1000 and log.dropped == 0
+    assert set(f.sizes[:-1]) == {512}
+    assert log.nbytes == len(f.getvalue())
+
+
+def test_drops_counted_when_both_buffers_full(clock):
+    """ a producer that never yields while the writer holds a buffer -- the rest is dropped, not lost silently """
+
+    f = SlowFile()
+    log = ImuLogger(f, size=32, chunk=256)
+    asyncio.run(produce(log, 2000, burst=200))
+    assert log.dropped > 0
+    assert log.samples + log.dropped == 2000
+    assert len(lines(f)) == log.samples
+
+
+def test_writer_error_reaches_close(clock):
+    async def main():
+        log = ImuLogger(BadFile(), size=8, chunk=64)
+        w = asyncio.create_task(log.writer())
+        for i in range(40):
+            log.append(i, (1, 2, 3), (4, 5, 6), 70.0)
+            await asyncio.sleep(0)
+        await asyncio.wait_for(log.close(w), 2)
+
+    with pytest.raises(OSError):
+        asyncio.run(main())
+
+
+@pytest.fixture
+def bos(clock, monkeypatch, tmp_path):
+    """ Bos logging to tmp_path through SlowFile, the FifoIMU at 500 Hz and asyncio.sleep on the virtual clock """
+
+    monkeypatch.setattr(FakeI2C, 'imu_type', FifoIMU)
+    sleep = asyncio.sleep
+
+    async def vsleep(s):
+        time.sleep_ms(int(s * 1000))
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', vsleep)
+    bos = btn_os.Bos()
+    bos.mount_sd = lambda: None
+    bos.m5parms['mdir'] = str(tmp_path)
+    bos.m5parms['imu_rate'] = 500
+    bos.m5parms['imu_size'] = 2000
+    files = []
+
+    def slow_open(fn, mode='r'):
+        files.append(SlowFile(bos.lat_ms))
+        return files[-1]
+
+    monkeypatch.setattr(btn_os, 'open', slow_open, raising=False)
+    monkeypatch.setattr(btn_os.uos, 'stat', lambda fn: (0,) * 10)
+    bos.files = files
+    return bos
+
+
+@pytest.mark.parametrize('lat_ms', [0, 40, 100])
+def test_fifo_rides_out_write_latency(bos, lat_ms):
+    """ 4KB writes blocking up to 100 ms -- the 73 packet FIFO holds 146 ms at 500 Hz, nothing is lost """
+
+    bos.lat_ms = lat_ms
+    bos.imu_csv()
+    ts = [int(line.split(',')[0]) for line in lines(bos.files[0])]
+    assert len(ts) == 2000
+    assert {b - a for a, b in zip(ts, ts[1:])} == {2}
+    assert bos.sensor.fifo_overflows == 0
+
+
+def test_write_longer_than_fifo_overflows(bos):
+    bos.lat_ms = 200
+    bos.imu_csv()
+    ts = [int(line.split(',')[0]) for line in lines(bos.files[0])]
+    assert len(ts) == 2000
+    assert bos.sensor.fifo_overflows > 0
+    assert max(b - a for a, b in zip(ts, ts[1:])) > 2
@@ -0,0 +1,171 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" CapFormat captures written by ImuLogger and read back by imu_read.py -- columns and csv against the CsvFormat
+log of the same samples, ts blocks falling back from uint16 deltas to int32 offsets, packed zigzag varint blocks and
+damaged files """
+import asyncio
+import io
+import struct
+
+import pytest
+
+import imu_read
+from bench_cap_pack import log, trace
+from imu_buffer import CapFormat, CsvFormat, ImuBuffer, ImuLogger
+
+T0 = 1792315322778
+
+
+def samples(n, gaps=()):
+    """ n samples 5 ms apart from T0, each index in gaps pushing every later ts out by 70 s """
+
+    late = 0
+    for i in range(n):
+        if i in gaps:
+            late += 70000
+        yield T0 + i * 5 + late, (i, -i, 16000 + i % 3), (-250, i % 7, 3 - i), 77.1 + i % 3 - (i % 5) * 20
+
+
+def capture(fmt, data, size=64):
+    """ returns the bytes ImuLogger writes in fmt for the samples in data """
+
+    async def main():
+        f = io.BytesIO()
+        log = ImuLogger(f, fmt, size=size, chunk=512)
+        w = asyncio.create_task(log.writer())
+        for s in data:
+            log.append(*s)
+            await asyncio.sleep(0)
+        await log.close(w)
+        return f.getvalue()
+
+    return asyncio.run(main())
+
+
+def blocks(cap):
+    """ (count, ts encoding) of each block in a capture """
+
+    size = struct.unpack_from(CapFormat.HEAD, cap)[2]
+    o = size
+    out = []
+    while o < len(cap):
+        n, enc, base = struct.unpack_from(CapFormat.BLOCK, cap, o)
+        out.append((n, enc))
+        o += struct.calcsize(CapFormat.BLOCK)
+        o += struct.unpack_from('<I', cap, o)[0] + 4 if enc == CapFormat.ZZV else n * (4 if enc == 0 else 2) + n * 14
+    assert o == len(cap)
+    return out
+
+
+def write(tmp_path, data, name='a.imc'):
+    p = tmp_path / name
+    p.write_bytes(data)
+    return str(p)
+
+
+@pytest.mark.parametrize('gaps', [(), (150,), (64, 200)], ids=['steady', 'gap', 'gap_at_block'])
+def test_round_trip_matches_csv_log(clock, tmp_path, gaps):
+    data = list(samples(300, gaps))
+    cap = capture(CapFormat(200), data)
+    p = write(tmp_path, cap)
+    meta, cols = imu_read.read_cap(p)
+    assert meta['n'] == 300 and meta['rate'] == 200
+    assert list(cols['ts']) == [s[0] for s in data]
+    assert list(cols['accl_z']) == [s[1][2] for s in data]
+    assert list(cols['gyro_z']) == [s[2][2] for s in data]
+    assert list(cols['temp']) == [round(s[3] * 10) for s in data]
+    out = str(tmp_path / 'a.csv')
+    assert imu_read.to_csv(p, out) == 300
+    with open(out) as f:
+        assert f.read() == capture(CsvFormat(), data).decode()
+
+
+def test_gap_over_uint16_falls_back_to_offsets(clock):
+    """ only the block holding a gap longer than 65535 ms stores int32 offsets, the 4 byte ts costs 2 bytes a
+    sample more """
+
+    steady = capture(CapFormat(200), list(samples(300)))
+    cap = capture(CapFormat(200), list(samples(300, (150,))))
+    assert blocks(steady) == [(64, CapFormat.TS_DELTA)] * 4 + [(44, CapFormat.TS_DELTA)]
+    assert blocks(cap) == [(64, CapFormat.TS_DELTA)] * 2 + [(64, CapFormat.TS_OFFSET)] + \
+        [(64, CapFormat.TS_DELTA), (44, CapFormat.TS_DELTA)]
+    assert len(cap) - len(steady) == 64 * 2
+
+
+def test_offsets_when_not_delta(clock, tmp_path):
+    data = list(samples(100, (30,)))
+    cap = capture(CapFormat(delta=False), data)
+    assert {enc for n, enc in blocks(cap)} == {CapFormat.TS_OFFSET}
+    meta, cols = imu_read.read_cap(write(tmp_path, cap))
+    assert meta['rate'] == 0
+    assert list(cols['ts']) == [s[0] for s in data]
+
+
+def test_damaged_files_raise(clock, tmp_path):
+    cap = capture(CapFormat(200), list(samples(100)))
+    with pytest.raises(ValueError):
+        imu_read.read_cap(write(tmp_path, cap[:-10]))
+    with pytest.raises(ValueError):
+        imu_read.read_cap(write(tmp_path, b'JUNK' + cap[4:]))
+
+
+def test_packed_round_trip(clock, tmp_path):
+    """ the bench_cap_pack trace with its 90 s pause reads back the same packed as unpacked, at half the size """
+
+    n = 1000
+    zzv = log(CapFormat(200, pack=True), n)
+    cap = log(CapFormat(200), n)
+    assert {enc for k, enc in blocks(zzv)} == {CapFormat.ZZV}
+    p = write(tmp_path, zzv, 'z.imc')
+    meta, cols = imu_read.read_cap(p)
+    assert meta['n'] == n
+    assert cols == imu_read.read_cap(write(tmp_path, cap))[1]
+    assert list(cols['ts']) == [s[0] for s in trace(n)]
+    out = str(tmp_path / 'z.csv')
+    imu_read.to_csv(p, out)
+    with open(out) as f:
+        assert f.read() == log(CsvFormat(), n).decode()
+    assert len(zzv) < len(cap) / 1.9
+
+
+def test_unzzv_extremes():
+    """ full scale swings need 3 byte varints, the decoder ends exactly at the block length """
+
+    vals = [0, -1, 1, 63, -64, 64, 32767, -32768, 32767, -32768, 0]
+    b = ImuBuffer(len(vals))
+    for i, v in enumerate(vals):
+        b.append(T0 + i * 70000, (v, -v - 1 if v > -32768 else 0, 0), (v // 2, 0, -v // 3), v / 10)
+    head, body = CapFormat(pack=True)._packed(b)
+    n, enc, base, length = struct.unpack(CapFormat.BLOCK + 'I', head)
+    assert (n, enc, base, length) == (len(vals), CapFormat.ZZV, T0, len(body))
+    cols = {k: [] for k in ImuBuffer.COLS}
+    assert imu_read.unzzv(bytes(body), 0, n, ImuBuffer.COLS, cols, base) == length
+    for k, c in zip(ImuBuffer.COLS, b.cols):
+        assert cols[k] == ([base + v for v in c] if k == 'ts' else list(c))
+
+
+def test_truncated_packed_block_raises(clock, tmp_path):
+    zzv = capture(CapFormat(200, pack=True), list(samples(100)))
+    with pytest.raises(ValueError):
+        imu_read.read_cap(write(tmp_path, zzv[:-1]))
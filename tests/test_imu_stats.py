@@ -0,0 +1,109 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" WindowStats against brute-force statistics of every emitted window -- tumbling and sliding windows, size 1 and
+monotonic runs that keep the min/max queues full or empty """
+import random
+
+import pytest
+
+from imu_stats import WindowStats
+
+NCH = len(WindowStats.CHANNELS)
+
+
+def ref(win):
+    """ mean, std, min, max, rms and peak per channel of the samples in win """
+
+    out = []
+    for c in range(NCH):
+        v = [s[c] for s in win]
+        n = len(v)
+        m = sum(v) / n
+        std = (sum((x - m) ** 2 for x in v) / n) ** 0.5
+        out.append((m, std, min(v), max(v), (sum(x * x for x in v) / n) ** 0.5, max(max(v), -min(v))))
+    return out
+
+
+def run(data, size, step):
+    got = []
+    w = WindowStats(size, step, on_window=lambda s: got.append(
+        [(s.mean[c], s.std[c], s.vmin[c], s.vmax[c], s.rms[c], s.peak[c]) for c in range(NCH)]))
+    emitted = [w.add(d) for d in data]
+    exp = [ref(data[e - size:e]) for e in range(size, len(data) + 1) if (e - size) % step == 0]
+    assert emitted.count(True) == len(exp) == w.windows
+    assert len(got) == len(exp)
+    for g, e in zip(got, exp):
+        for gc, ec in zip(g, e):
+            assert gc[2:4] == ec[2:4] and gc[5] == ec[5]
+            assert gc[0] == pytest.approx(ec[0], rel=1e-5, abs=1e-3)
+            assert gc[1] == pytest.approx(ec[1], rel=1e-3, abs=0.05)
+            assert gc[4] == pytest.approx(ec[4], rel=1e-5, abs=1e-3)
+    return got
+
+
+def noise(n, seed=3):
+    r = random.Random(seed)
+    return [tuple(r.randint(-32768, 32767) for c in range(6)) + (r.randint(700, 800),) for _ in range(n)]
+
+
+def ramps(n):
+    """ channels rising, falling, sawtooth, constant and alternating so the queues run full, empty and in ties """
+
+    return [(i - n // 2, n // 2 - i, i % 37 - 18, 500, (-1) ** i * i, -(i % 5), 770) for i in range(n)]
+
+
+@pytest.mark.parametrize('size, step', [(64, 64), (50, 50), (64, 16), (50, 7), (100, 1), (1, 1)])
+@pytest.mark.parametrize('data', [noise(1500), ramps(1500)], ids=['noise', 'ramps'])
+def test_matches_brute_force(data, size, step):
+    run(data, size, step)
+
+
+def test_size_one_is_the_sample():
+    data = noise(50)
+    got = run(data, 1, 1)
+    for g, d in zip(got, data):
+        assert [c[2] for c in g] == list(d)
+        assert all(c[1] == 0 for c in g)
+
+
+def test_no_window_before_size():
+    w = WindowStats(8, 4)
+    assert not any(w.add(d) for d in noise(7))
+    assert w.add(noise(1)[0]) and w.windows == 1
+    assert [w.add(d) for d in noise(4)] == [False, False, False, True]
+
+
+def test_append_and_csv_line():
+    w = WindowStats(4)
+    for i in range(4):
+        w.append(1000 + i, (i, 0, 1000), (0, -i, 0), 77.0 + i / 10)
+    assert w.ts == 1003
+    head = w.header().rstrip().split(',')
+    line = w.csv_line().rstrip().split(',')
+    assert len(head) == len(line) == 1 + NCH * len(WindowStats.FIELDS)
+    rec = dict(zip(head, line))
+    assert rec['timestamp'] == '1003'
+    assert rec['accl_x_mean'] == '1.5' and rec['accl_x_max'] == '3'
+    assert rec['gyro_y_min'] == '-3' and rec['gyro_y_peak'] == '3'
+    assert rec['temp_mean'] == '771.5'
@@ -0,0 +1,271 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" MPU6886 FIFO streaming on the FifoIMU model -- bulk drains, timestamps rebuilt from the sample period, overflow
+and the FIFO path of Bos.read_imu, INT_STATUS flags polled or collected by the irq, all on the virtual clock, and
+read_all against the accel, gyro and temperature properties """
+import asyncio
+import random
+import time
+
+import pytest
+
+import vclock
+from fakei2c import FakeI2C, FakeIMU, FifoIMU
+from machine import Pin
+from mpu6886 import MPU6886
+
+
+@pytest.fixture
+def fifo(clock):
+    i2c = FakeI2C(imu=FifoIMU())
+    m = MPU6886(i2c)
+    return i2c.imu, m
+
+
+def drain(m):
+    return [(ts, raw[0]) for ts, raw in m.fifo_read()]
+
+
+def test_bulk_drain_timestamps(fifo):
+    imu, m = fifo
+    assert m.fifo_start(200) == 200
+    assert m.fifo_period == 5000
+    time.sleep_ms(52)
+    txn = imu.txn
+    out = drain(m)
+    # the count read and two bulk reads of 8 and 2 packets, not a read per sample
+    assert imu.txn - txn == 3
+    assert [k for ts, k in out] == list(range(1, 11))
+    assert {b[0] - a[0] for a, b in zip(out, out[1:])} == {5000}
+    assert time.ticks_diff(out[-1][0], time.ticks_us()) == 0
+    assert not drain(m)
+
+
+def test_timestamps_continue_across_drains(fifo):
+    imu, m = fifo
+    m.fifo_start(100)
+    out = []
+    for _ in range(5):
+        time.sleep_ms(33)
+        out += drain(m)
+    assert [k for ts, k in out] == list(range(1, len(out) + 1))
+    assert {b[0] - a[0] for a, b in zip(out, out[1:])} == {10000}
+
+
+def test_overflow_keeps_oldest_and_resets(fifo):
+    imu, m = fifo
+    m.fifo_start(200)
+    time.sleep_ms(52)
+    first = drain(m)
+    time.sleep_ms(1000)
+    out = drain(m)
+    # stop-when-full kept the 73 packets after the last drained one, their times continue on from it
+    assert m.fifo_overflows == 1
+    assert len(out) == MPU6886.FIFO_SIZE // MPU6886.FIFO_PACKET
+    assert out[0][1] == first[-1][1] + 1
+    assert out[0][0] - first[-1][0] == 5000
+    # the reset FIFO fills again from now
+    time.sleep_ms(20)
+    after = drain(m)
+    assert len(after) == 4
+    assert after[0][1] > out[-1][1] + 1
+    m.fifo_stop()
+    assert m.fifo_period == 0
+
+
+def test_rate_is_divided_from_1khz(fifo):
+    imu, m = fifo
+    assert m.fifo_start(300) == 333
+    assert imu.regs[FifoIMU.SMPLRT_DIV] == 2
+    assert m.fifo_start(1) == 3
+    assert m.fifo_start(2000) == 1000
+
+
+def test_read_imu_from_fifo(clock, monkeypatch):
+    """ Bos.read_imu with imu_rate set, asyncio.sleep moving the virtual clock """
+
+    monkeypatch.setattr(FakeI2C, 'imu_type', FifoIMU)
+    sleep = asyncio.sleep
+
+    async def vsleep(s):
+        time.sleep_ms(int(s * 1000))
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', vsleep)
+    from btn_os import Bos
+    bos = Bos()
+    imu = bos.i2c.imu
+    bos.sensor  # created on first use, its init traffic is not counted
+    bos.m5parms['imu_size'] = 500
+    bos.m5parms['imu_rate'] = 500
+    txn = imu.txn
+    buf = bos.read_imu()
+    fifo_txn = imu.txn - txn
+    assert len(buf) == 500
+    assert {buf.row(i + 1)[0] - buf.row(i)[0] for i in range(499)} == {2}
+    assert bos.sensor.fifo_overflows == 0
+    # 10 packets per fifo_ms drain in a count read and two bulk reads, against a burst read per polled sample
+    bos.m5parms['imu_rate'] = 0
+    bos.m5parms['imu_wait'] = 2
+    txn = imu.txn
+    assert len(bos.read_imu()) == 500
+    assert imu.txn - txn >= 500
+    assert fifo_txn < 500 * 4 // 10
+
+
+@pytest.fixture
+def intr(clock):
+    i2c = FakeI2C(imu=FakeIMU())
+    m = MPU6886(i2c)
+    return i2c.imu, m
+
+
+def test_int_enable_registers(intr):
+    imu, m = intr
+    m.int_enable(data_ready=True, wom_mg=100)
+    assert imu.regs[32:35] == bytes([25, 25, 25])
+    assert imu.regs[105] == 0xC0
+    assert imu.regs[55] == 0x20
+    assert imu.regs[56] == MPU6886.INT_WOM | MPU6886.INT_DATA_RDY
+    m.int_disable()
+    assert imu.regs[56] == 0 and imu.regs[105] == 0
+
+
+def test_int_poll_reads_status_and_keeps_unmasked_flags(intr):
+    imu, m = intr
+    m.int_enable(wom_mg=100)
+    assert imu.interrupt(MPU6886.INT_DATA_RDY) == 0  # not enabled, never latched
+    txn = imu.txn
+    assert m.int_poll() == 0
+    assert imu.txn - txn == 1
+    m.int_enable(data_ready=True, wom_mg=100)
+    imu.interrupt(0x40 | MPU6886.INT_DATA_RDY)
+    assert m.int_poll(MPU6886.INT_WOM) == 0x40
+    assert imu.regs[58] == 0  # the read released INT
+    # data ready was read with it and waits in int_flags for its own mask
+    assert m.int_poll(MPU6886.INT_DATA_RDY) == MPU6886.INT_DATA_RDY
+    assert m.int_poll() == 0
+    assert m.int_count == 1
+
+
+def test_irq_collects_flags_without_polling_traffic(intr):
+    imu, m = intr
+    pin = Pin(36, Pin.IN)
+    m.int_enable(wom_mg=200, pin=pin)
+    assert pin.handler == m._isr
+    txn = imu.txn
+    assert m.int_poll() == 0
+    assert imu.txn == txn
+    imu.interrupt(0x20, pin)
+    imu.interrupt(0x80, pin)
+    assert imu.txn - txn == 2  # one INT_STATUS read in each irq
+    assert m.int_count == 2
+    assert m.int_poll(MPU6886.INT_WOM) == 0xA0
+    assert imu.txn - txn == 2
+    m.int_disable()
+    assert pin.handler is None and m.int_pin is None
+
+
+@pytest.fixture
+def bos(clock, monkeypatch):
+    """ Bos on the FakeIMU with asyncio.sleep moving the virtual clock """
+
+    sleep = asyncio.sleep
+
+    async def vsleep(s):
+        time.sleep_ms(int(s * 1000))
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', vsleep)
+    from btn_os import Bos
+    bos = Bos()
+    bos.sensor  # created on first use
+    return bos
+
+
+def at(*events):
+    """ run fn once the virtual clock passes ms for each (ms, fn) as the sensor would, from a clock hook """
+
+    t0 = time.ticks_ms()
+    todo = sorted(events, key=lambda e: e[0])
+
+    def hook():
+        while todo and time.ticks_diff(time.ticks_ms(), t0) >= todo[0][0]:
+            todo.pop(0)[1]()
+
+    vclock.hooks.append(hook)
+
+
+def test_imu_event_polled_mask_and_timeout(bos):
+    imu = bos.i2c.imu
+    bos.sensor.int_enable(data_ready=True, wom_mg=100)
+    # data ready every 20 ms does not end a wait for motion, which comes at 95 ms
+    at(*[(20 * k, lambda: imu.interrupt(MPU6886.INT_DATA_RDY)) for k in range(1, 5)], (95, lambda: imu.interrupt(0x40)))
+    t0 = time.ticks_ms()
+    assert asyncio.run(bos.imu_event(MPU6886.INT_WOM, 1000)) == 0x40
+    assert 95 <= time.ticks_diff(time.ticks_ms(), t0) <= 95 + bos.imu_int_ms
+    assert bos.sensor.int_poll(MPU6886.INT_DATA_RDY) == MPU6886.INT_DATA_RDY
+
+    t0 = time.ticks_ms()
+    assert asyncio.run(bos.imu_event(MPU6886.INT_WOM, 100)) == 0
+    assert 100 <= time.ticks_diff(time.ticks_ms(), t0) <= 100 + bos.imu_int_ms
+
+
+def test_imu_event_on_pin_costs_no_polls(bos):
+    imu = bos.i2c.imu
+    pin = Pin(36, Pin.IN)
+    bos.sensor.int_enable(wom_mg=200, pin=pin)
+
+    at((30, lambda: imu.interrupt(0x40, pin)))
+    txn = imu.txn
+    assert asyncio.run(bos.imu_event(MPU6886.INT_WOM, 1000)) == 0x40
+    assert imu.txn - txn == 1  # the irq's INT_STATUS read, none while waiting
+
+
+def test_on_motion_timeout_disarms(bos):
+    imu = bos.i2c.imu
+    pin = Pin(36, Pin.IN)
+    bos.imu_int_pin = pin
+    assert asyncio.run(bos.aimu_on_motion(150, 50)) is None
+    assert imu.regs[56] == 0 and pin.handler is None
+    assert imu.regs[32] == 150 // 4
+
+
+@pytest.mark.parametrize('accel_fs, gyro_fs', [(MPU6886.FS_2G, MPU6886.FS_250DPS), (MPU6886.FS_8G, MPU6886.FS_500DPS),
+                                               (MPU6886.FS_16G, MPU6886.FS_2000DPS)])
+def test_read_all_matches_properties(clock, accel_fs, gyro_fs):
+    """ one burst read scales to what three separate register reads return, across the int16 range """
+
+    i2c = FakeI2C(imu=FakeIMU())
+    m = MPU6886(i2c, accel_fs=accel_fs, gyro_fs=gyro_fs)
+    r = random.Random(9)
+    for k in range(200):
+        vals = [r.randint(-32768, 32767) for _ in range(7)] if k > 1 else [(-32768, 32767)[k]] * 7
+        i2c.imu.set(*vals)
+        txn = i2c.imu.txn
+        got = m.read_all()
+        assert i2c.imu.txn - txn == 1
+        assert got == (m.accel, m.gyro, m.temperature)
+        assert i2c.imu.txn - txn == 4
+        assert list(m.read_raw()) == vals[:3] + vals[6:] + vals[3:6]
@@ -0,0 +1,110 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" SampleClock on the virtual microsecond clock -- asyncio.sleep wakes LATE_US after its deadline and each sample
+takes work_us, as a polled read and a log write would """
+import asyncio
+import time
+
+import pytest
+
+from imu_buffer import SampleClock
+
+LATE_US = 137
+
+
+@pytest.fixture
+def vsleep(clock, monkeypatch):
+    sleep = asyncio.sleep
+
+    async def late_sleep(s):
+        if s:
+            clock.advance(us=int(s * 1000000) + LATE_US)
+        await sleep(0)
+
+    monkeypatch.setattr(asyncio, 'sleep', late_sleep)
+    return clock
+
+
+def run(period_ms, work_us, n=50):
+    """ returns the clock and (ticks_us, skipped) of each sample """
+
+    async def main():
+        c = SampleClock(period_ms)
+        out = []
+        for i in range(n):
+            skip = await c.tick()
+            out.append((time.ticks_us(), skip))
+            time.sleep_us(work_us(i))
+        return c, out
+
+    return asyncio.run(main())
+
+
+def test_period_holds_under_work(vsleep):
+    c, out = run(10, lambda i: 3000)
+    # deadlines are absolute, 3 ms of work per sample does not stretch the 10 ms period, wake-up latency does
+    # not accumulate
+    assert out[-1][0] - out[0][0] == 49 * 10000 + LATE_US
+    assert c.skipped == 0
+    assert c.jmax == LATE_US
+    assert c.jmin == 0
+
+
+def test_sleep_after_work_drifts(vsleep):
+    """ the old imu_wait pacing for comparison -- the period becomes wait plus work """
+
+    async def main():
+        t = []
+        for i in range(50):
+            t.append(time.ticks_us())
+            time.sleep_us(3000)
+            await asyncio.sleep(0.010)
+        return t
+
+    t = asyncio.run(main())
+    assert t[-1] - t[0] == 49 * (13000 + LATE_US)
+
+
+def test_overrun_skips_missed_deadlines(vsleep):
+    c, out = run(10, lambda i: 25000 if i == 20 else 2000)
+    # one sample 25 ms late of work misses a deadline, the schedule resumes on the 10 ms grid without a burst
+    assert c.skipped == 1
+    assert [k for k, (t, skip) in enumerate(out) if skip] == [21]
+    assert out[-1][0] - out[0][0] == 50 * 10000 + LATE_US
+    assert all((t - out[0][0]) % 10000 <= 5000 + LATE_US for t, skip in out)
+    assert c.jmax == 5000 + LATE_US
+
+
+def test_period_zero_is_due_every_tick(vsleep):
+    c, out = run(0, lambda i: 20000, n=3)
+    assert c.stats() == "period 0 us, jitter min/mean/max 0/0/0 us, 0 skipped"
+    assert [t for t, skip in out] == [0, 20000, 40000]
+
+
+def test_reset_restarts_stats(vsleep):
+    c, out = run(10, lambda i: 25000 if i == 2 else 0, n=5)
+    assert c.skipped and c.n == 5
+    c.reset()
+    assert (c.n, c.skipped, c.jmax, c.jmean) == (0, 0, 0, 0)
+    assert c.due == time.ticks_us()
@@ -0,0 +1,168 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" SpiArbiter and SharedSD on the fake SPI2 -- the display and the card share the pins, Mux.log records routing,
+spi init baudrates and chip select edges in order, so the handover between owners is pinned down """
+import pytest
+
+from fakesd import Card, CsPin, FakeSPI, HwSPI, Mux
+from sd_bus import SharedSD, SpiArbiter
+from sdcard import SDCard
+
+TFT_BAUD = 500000
+SD_BAUD = 20000000
+
+
+@pytest.fixture
+def bus():
+    """ card on SPI2 as Bos.mount_sd sets it up with sd_hw True """
+
+    Mux.reset()
+    card = Card()
+    cs = CsPin(card, 'sd_cs')
+    hw = HwSPI(card, cs, 'hw', TFT_BAUD)
+    hw.init()
+    arb = SpiArbiter('tft', hw, None, TFT_BAUD)
+    arb.add('sd', hw, cs, 100000)
+    arb.acquire('sd')
+    try:
+        sd = SDCard(hw, cs, max_baudrate=SD_BAUD)
+    finally:
+        arb.release()
+    Mux.log = []
+    card.bus_us = 0.0
+    return card, cs, hw, arb, sd
+
+
+def windows(log):
+    """ (spi, baudrate) the pins were set to at each chip select low edge """
+
+    routed = None
+    out = []
+    for ev in log:
+        if ev[0] == 'init':
+            routed = ev[1:]
+        elif ev == ('sd_cs', 0):
+            out.append(routed)
+    return out
+
+
+def test_shared_spi_switches_baudrate_only():
+    Mux.reset()
+    cs = CsPin(name='sd_cs')
+    hw = HwSPI(None, cs, 'hw', TFT_BAUD)
+    hw.init()
+    arb = SpiArbiter('tft', hw, None, TFT_BAUD)
+    arb.add('sd', hw, cs, SD_BAUD)
+    Mux.log = []
+    assert arb.acquire('sd') is hw
+    cs(0)
+    arb.release()
+    assert Mux.log == [('init', 'hw', SD_BAUD), ('sd_cs', 0), ('sd_cs', 1), ('init', 'hw', TFT_BAUD)]
+    assert arb.owner == 'tft'
+    assert arb.switches == 2
+
+
+def test_acquire_by_owner_is_free():
+    Mux.reset()
+    hw = HwSPI(None, CsPin(), 'hw', TFT_BAUD)
+    arb = SpiArbiter('tft', hw, None, TFT_BAUD)
+    arb.acquire('tft')
+    arb.release()
+    assert Mux.log == []
+    assert arb.switches == 0
+
+
+def test_own_spi_takes_over_the_pins():
+    """ a SoftSPI client -- the other spi object is re-initialized each way, display deselected first """
+
+    Mux.reset()
+    tft_cs = CsPin(name='tft_cs')
+    sd_cs = CsPin(name='sd_cs')
+    hw = HwSPI(None, tft_cs, 'hw', TFT_BAUD)
+    soft = FakeSPI(None, sd_cs, 'soft')
+    hw.init()
+    arb = SpiArbiter('tft', hw, tft_cs, TFT_BAUD)
+    arb.add('sd', soft, sd_cs, 1000000)
+    tft_cs(0)
+    Mux.log = []
+    assert arb.acquire('sd') is soft
+    assert Mux.log == [('tft_cs', 1), ('deinit', 'soft'), ('mux', 'soft'), ('init', 'soft', 1000000)]
+    Mux.log = []
+    arb.release()
+    assert Mux.log == [('deinit', 'hw'), ('mux', 'hw'), ('init', 'hw', TFT_BAUD)]
+
+
+def test_remove_owner_hands_bus_back():
+    Mux.reset()
+    hw = HwSPI(None, CsPin(), 'hw', TFT_BAUD)
+    arb = SpiArbiter('tft', hw, None, TFT_BAUD)
+    arb.add('sd', hw, CsPin(name='sd_cs'), SD_BAUD)
+    arb.acquire('sd')
+    arb.remove('sd')
+    assert arb.owner == 'tft'
+    assert hw.baudrate == TFT_BAUD
+    assert sorted(arb.clients) == ['tft']
+
+
+def test_transfers_select_card_at_its_clock_only(bus):
+    card, cs, hw, arb, sd = bus
+    assert sd.baudrate == SD_BAUD
+    dev = SharedSD(sd, arb)
+    for i in range(8):
+        dev.writeblocks(100 + i, bytearray([i]) * 512)
+        hw.draw()
+    buf = bytearray(1024)
+    dev.readblocks(106, buf)
+    hw.draw()
+    assert buf[0] == 6 and buf[512] == 7
+    # every block went out with the card selected at its negotiated clock, the display drew at its own in between
+    sel = windows(Mux.log)
+    assert len(sel) >= 9
+    assert set(sel) == {('hw', SD_BAUD)}
+    draws = [ev for ev in Mux.log if ev[0] == 'draw']
+    assert draws == [('draw', 'hw', TFT_BAUD)] * 9
+    assert hw.lost == 0
+    assert cs.v == 1 and arb.owner == 'tft'
+    # the card is deselected before the bus goes back to the display clock
+    low = False
+    for ev in Mux.log:
+        if ev[0] == 'sd_cs':
+            low = not ev[1]
+        elif ev == ('init', 'hw', TFT_BAUD):
+            assert not low
+    # 9 transfers of a 512-byte block and its command take well under 2 ms of bus time at 20 MHz
+    assert card.bus_us < 9 * 2000
+
+
+def test_reinit_once_after_error(bus):
+    card, cs, hw, arb, sd = bus
+    dev = SharedSD(sd, arb)
+    card.reset()
+    dev.writeblocks(200, bytearray(b'\x5a') * 512)
+    assert dev.errors == 1
+    assert dev.inits == 1
+    assert card.data[200 * 512] == 0x5a
+    assert sd.max_baudrate == SD_BAUD // 2
+    assert arb.clients['sd'][2] == sd.baudrate
+    assert arb.owner == 'tft' and hw.baudrate == TFT_BAUD
@@ -0,0 +1,96 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" SDCard.negotiate on the fakesd cards of bench_sd_clock, and the halved ceiling after a transfer error """
+import os
+
+import pytest
+
+from bench_sd_clock import make, throughput
+from fakesd import CsPin, FakeSPI, crc16
+from sd_bus import SharedSD, SpiArbiter
+from sdcard import SDCard
+
+
+@pytest.mark.parametrize('top, kw, rate', [
+    (None, {}, 500000),
+    (20000000, {}, 20000000),
+    (3000000, {}, 3000000),
+    (20000000, {'max_baud': 8000000}, 8000000),
+    (40000000, {'max_baud': 5000000}, 4000000),
+    (20000000, {'max_baud': 8000000, 'no_crc': True}, 8000000),
+])
+def test_settles_on_last_good_rate(top, kw, rate):
+    card, spi, sd = make(top, **kw)
+    assert sd.baudrate == rate
+    assert spi.baudrate == rate
+    # the card still answers at the settled clock, every block reads back as written
+    buf = bytearray(512 * 4)
+    sd.readblocks(40, buf)
+    assert buf == bytes([40]) * 512 + bytes([41]) * 512 + bytes([42]) * 512 + bytes([43]) * 512
+
+
+def test_crc_check_reported(capsys):
+    make(20000000)
+    assert "clock 20000 kHz (crc checked)" in capsys.readouterr().out
+    make(20000000, no_crc=True)
+    out = capsys.readouterr().out
+    assert "clock 20000 kHz" in out and "crc checked" not in out
+
+
+def test_intermittent_errors_keep_reference_clock():
+    """ a card corrupting every other block read -- no faster clock passes the repeated reads, 500 kHz stays """
+
+    card, spi, sd = make(20000000, flip_every=2)
+    assert sd.baudrate == 500000
+
+
+def test_crc16_matches_card():
+    data = os.urandom(512)
+    assert SDCard.crc16(SDCard, data) == crc16(data)
+
+
+def test_throughput_scales_with_clock():
+    card, spi, sd = make(None)
+    slow = throughput(card, sd, kb=64)
+    card, spi, sd = make(20000000)
+    fast = throughput(card, sd, kb=64)
+    assert fast[0] > 30 * slow[0] and fast[1] > 30 * slow[1]
+
+
+def test_reinit_halves_ceiling():
+    card, spi, sd = make(20000000)
+    hw = FakeSPI(card, CsPin(None, 'tft'), 'hw', 500000)
+    bus = SpiArbiter('tft', hw, None, 500000)
+    bus.add('sd', spi, sd.cs, sd.baudrate)
+    dev = SharedSD(sd, bus)
+    # the card drops out and comes back only good to 6 MHz
+    card.max_baud = 6000000
+    card.reset()
+    buf = bytearray(512)
+    dev.readblocks(5, buf)
+    assert (dev.errors, dev.inits) == (1, 1)
+    assert sd.max_baudrate == 10000000
+    assert sd.baudrate == 4000000
+    assert bus.clients['sd'][2] == 4000000
+    assert buf == bytes([5]) * 512
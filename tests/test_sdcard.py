@@ -0,0 +1,69 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" SDCard driver on the fakesd card -- data integrity of single and multi-block transfers and the allocation budget
+of block reads measured by bench_sdcard """
+import pytest
+
+from bench_sdcard import measure
+from fakesd import Card, CsPin, FakeSPI, Mux
+from sdcard import SDCard
+
+
+@pytest.fixture
+def sd():
+    Mux.reset()
+    card = Card()
+    cs = CsPin(card)
+    spi = FakeSPI(card, cs)
+    spi.init(100000)
+    return card, SDCard(spi, cs)
+
+
+def test_geometry(sd):
+    card, sd = sd
+    assert sd.sectors == card.sectors
+    assert sd.ioctl(4, 0) == card.sectors
+
+
+def test_write_read_back(sd):
+    card, sd = sd
+    one = bytearray(b'\xa5') * 512
+    many = bytearray(range(256)) * 12
+    sd.writeblocks(3, one)
+    sd.writeblocks(10, many)
+    assert card.cmds['24'] == 1 and card.cmds['25'] == 1 and card.cmds['A23'] == 1
+    buf = bytearray(512 * 7)
+    sd.readblocks(9, buf)
+    assert buf[512:] == many
+    blk = bytearray(512)
+    sd.readblocks(3, blk)
+    assert blk == one
+
+
+def test_block_reads_allocate_once_per_call():
+    """ one memoryview per readblocks call and nothing per block, the pre-022 driver ran over 1000 lines a block """
+
+    r = measure(blocks=256)
+    assert r['allocs'] <= r['calls']
+    assert r['lines'] < 256 * 30
@@ -0,0 +1,164 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" SectorCache tests on a file backed block device -- a random mix of reads, writes, offset transfers and erases
+checked against a reference image for write-through and write-back, LRU eviction and hit accounting, and the
+transfers saved on the bench_sector_cache workload """
+import random
+
+import pytest
+
+from bench_sector_cache import STACKS, FileDev, run
+from sd_bus import SectorCache
+
+
+@pytest.fixture
+def mk(tmp_path):
+    devs = []
+
+    def mk(bsize=512, n=64, ext=False):
+        dev = FileDev(str(tmp_path / 'd{}.img'.format(len(devs))), bsize, n, ext)
+        devs.append(dev)
+        return dev
+
+    yield mk
+    for dev in devs:
+        dev.close()
+
+
+def blk(v, n=1):
+    return bytearray([v]) * (512 * n)
+
+
+@pytest.mark.parametrize('write_back', [False, True])
+@pytest.mark.parametrize('bsize, ext', [(512, False), (4096, True)])
+def test_random_mix_matches_reference(mk, write_back, bsize, ext):
+    """ sd like 512 byte blocks and flash like 4KB blocks with the offset interface and erase """
+
+    dev = mk(bsize, 64, ext)
+    ref = bytearray(bsize * 64)
+    c = SectorCache(dev, 8, write_back=write_back)
+    assert c.bsize == bsize
+    r = random.Random(1)
+    for _ in range(5000):
+        op = r.random()
+        n = r.randrange(60)
+        k = r.choice([1, 1, 1, 2, 4])
+        if op < 0.4:
+            buf = bytearray(r.randbytes(bsize * k))
+            c.writeblocks(n, buf)
+            ref[n * bsize:(n + k) * bsize] = buf
+        elif op < 0.8:
+            buf = bytearray(bsize * k)
+            c.readblocks(n, buf)
+            assert buf == ref[n * bsize:(n + k) * bsize], (n, k)
+        elif ext and op < 0.85:
+            c.ioctl(6, n)
+            ref[n * bsize:(n + 1) * bsize] = b'\xff' * bsize
+        elif ext and op < 0.92:
+            o = r.randrange(0, bsize, 16)
+            buf = bytearray(r.randbytes(16))
+            c.writeblocks(n, buf, o)
+            ref[n * bsize + o:n * bsize + o + 16] = buf
+        elif ext:
+            o = r.randrange(0, bsize, 16)
+            buf = bytearray(32 if o < bsize - 32 else 16)
+            c.readblocks(n, buf, o)
+            assert buf == ref[n * bsize + o:n * bsize + o + len(buf)], (n, o)
+        else:
+            c.ioctl(3, 0)
+    c.ioctl(3, 0)
+    assert dev.image() == ref
+    assert c.hits and c.misses
+
+
+def test_lru_eviction_and_hits(mk):
+    dev = mk()
+    c = SectorCache(dev, 2)
+    buf = bytearray(512)
+    c.readblocks(1, buf)
+    c.readblocks(2, buf)
+    c.readblocks(1, buf)  # 2 is now least recently used
+    c.readblocks(3, buf)
+    assert (c.hits, c.misses, dev.ops) == (1, 3, 3)
+    c.readblocks(1, buf)
+    c.readblocks(3, buf)
+    assert (c.hits, c.misses, dev.ops) == (3, 3, 3)
+    c.readblocks(2, buf)
+    assert (c.hits, c.misses, dev.ops) == (3, 4, 4)
+    assert sorted(c.slot) == [2, 3]
+
+
+def test_write_back_holds_until_eviction_or_sync(mk):
+    dev = mk()
+    c = SectorCache(dev, 2, write_back=True)
+    c.writeblocks(5, blk(1))
+    c.writeblocks(5, blk(2))
+    c.writeblocks(6, blk(3))
+    assert dev.ops == 0
+    c.writeblocks(7, blk(4))  # evicts 5, written once with its last contents
+    assert dev.ops == 1 and dev.image()[5 * 512] == 2
+    c.ioctl(3, 0)
+    assert dev.ops == 3 and c.writes == 3
+    img = dev.image()
+    assert img[6 * 512] == 3 and img[7 * 512] == 4
+
+
+def test_multi_block_transfers_bypass_and_stay_coherent(mk):
+    dev = mk()
+    c = SectorCache(dev, 4, write_back=True)
+    c.writeblocks(11, blk(8))
+    buf = bytearray(512 * 3)
+    c.readblocks(10, buf)  # one device read, the held block overlaid
+    assert buf == blk(0) + blk(8) + blk(0)
+    assert c.misses == 0 and dev.ops == 1
+    c.writeblocks(10, blk(9, 3))  # updates the cached copy and clears its dirty flag
+    one = bytearray(512)
+    c.readblocks(11, one)
+    assert one == blk(9) and c.hits == 1
+    c.ioctl(3, 0)
+    assert dev.ops == 2
+
+
+def test_offset_interface_and_erase(mk):
+    dev = mk(4096, 8, ext=True)
+    c = SectorCache(dev, 2, write_back=True)
+    c.writeblocks(3, bytearray([1]) * 4096)
+    part = bytearray(16)
+    c.readblocks(3, part, 100)  # offset read served from the slot
+    assert part == bytearray([1]) * 16 and dev.ops == 0
+    c.writeblocks(3, bytearray([2]) * 16, 32)  # dirty copy written back, then the program goes to the device
+    assert 3 not in c.slot and dev.ops == 2
+    c.readblocks(3, part, 32)
+    assert part == bytearray([2]) * 16
+    c.ioctl(6, 3)  # erase drops the cached copy
+    assert 3 not in c.slot
+    c.readblocks(3, part, 0)
+    assert part == b'\xff' * 16
+
+
+def test_metadata_workload_transfers(tmp_path):
+    """ the 20 save workload costs 1180 transfers raw, 665 write-through and 365 write-back """
+
+    ops = [run(wrap, str(tmp_path / 'w.img')) for label, wrap in STACKS]
+    assert ops == [1180, 665, 365]
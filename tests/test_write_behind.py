@@ -0,0 +1,161 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" WriteBehind over a recording block device on the virtual clock, and its SD command count on the fakesd card """
+import time
+
+import pytest
+
+from bench_sd_writes import STACKS, run
+from sd_bus import WriteBehind
+
+
+class Dev:
+    """ 64 block device logging each transfer as (op, block, count) """
+
+    def __init__(self):
+        self.data = bytearray(512 * 64)
+        self.log = []
+
+    def ioctl(self, op, arg):
+        return None
+
+    def readblocks(self, n, buf, offset=0):
+        self.log.append(('r', n, len(buf) // 512))
+        buf[:] = self.data[n * 512 + offset:n * 512 + offset + len(buf)]
+
+    def writeblocks(self, n, buf, offset=0):
+        self.log.append(('w', n, len(buf) // 512))
+        self.data[n * 512 + offset:n * 512 + offset + len(buf)] = buf
+
+    def writes(self):
+        return [(n, k) for op, n, k in self.log if op == 'w']
+
+
+def blk(v, n=1):
+    return bytearray([v]) * (512 * n)
+
+
+@pytest.fixture
+def dev(clock):
+    return Dev()
+
+
+def test_coalesces_adjacent_blocks_in_order(dev):
+    wb = WriteBehind(dev, 8)
+    wb.writeblocks(6, blk(2))
+    wb.writeblocks(7, blk(3, 2))
+    wb.writeblocks(20, blk(9))
+    wb.writeblocks(5, blk(1))
+    wb.ioctl(3, 0)
+    # 6-8 were appended into adjacent slots and go out as one transfer, 5 landed elsewhere
+    assert dev.writes() == [(5, 1), (6, 3), (20, 1)]
+    assert dev.data[5 * 512] == 1 and dev.data[8 * 512] == 3 and dev.data[20 * 512] == 9
+    assert (wb.flushes, wb.writes, wb.blocks) == (1, 3, 5)
+
+
+def test_split_slots_split_transfers(dev):
+    """ a block whose predecessor's next slot is taken goes elsewhere, the run is written in two parts """
+
+    wb = WriteBehind(dev, 8)
+    wb.writeblocks(6, blk(2))
+    wb.writeblocks(20, blk(9))
+    wb.writeblocks(7, blk(3, 2))
+    wb.flush()
+    assert dev.writes() == [(6, 1), (7, 2), (20, 1)]
+
+
+def test_full_slots_flush(dev):
+    wb = WriteBehind(dev, 4)
+    wb.writeblocks(1, blk(1, 4))
+    assert dev.writes() == []
+    wb.writeblocks(9, blk(2))
+    assert dev.writes() == [(1, 4)]
+
+
+def test_held_single_block_read_from_slot(dev):
+    wb = WriteBehind(dev, 4)
+    wb.writeblocks(3, blk(7))
+    buf = bytearray(512)
+    wb.readblocks(3, buf)
+    assert buf == blk(7)
+    part = bytearray(16)
+    wb.readblocks(3, part, 100)
+    assert part == blk(7)[:16]
+    assert dev.log == []
+    wb.readblocks(4, buf)
+    assert dev.log == [('r', 4, 1)]
+
+
+def test_multi_block_read_overlays_held(dev):
+    wb = WriteBehind(dev, 4)
+    dev.data[:] = blk(5, 64)
+    wb.writeblocks(11, blk(8))
+    buf = bytearray(512 * 3)
+    wb.readblocks(10, buf)
+    assert buf[0] == 5 and buf[512] == 8 and buf[1024] == 5
+    assert dev.writes() == []
+
+
+def test_ages_out_on_access_and_poll(dev, clock):
+    wb = WriteBehind(dev, 8, age_ms=100)
+    wb.writeblocks(5, blk(1))
+    wb.poll()
+    assert dev.writes() == []
+    clock.advance(100)
+    wb.poll()
+    assert dev.writes() == [(5, 1)]
+    # the next access checks the age too
+    wb.writeblocks(6, blk(2))
+    time.sleep_ms(150)
+    wb.readblocks(0, bytearray(512))
+    assert dev.writes() == [(5, 1), (6, 1)]
+    wb.poll()
+    assert wb.since is None
+
+
+def test_large_and_partial_writes_go_straight_out(dev):
+    wb = WriteBehind(dev, 2)
+    wb.writeblocks(1, blk(1))
+    wb.writeblocks(10, blk(2, 3))
+    assert dev.writes() == [(1, 1), (10, 3)]
+    wb.writeblocks(20, blk(3))
+    wb.writeblocks(20, bytearray(b'\x04') * 16, 32)
+    assert dev.writes()[-2:] == [(20, 1), (20, 0)]
+    assert dev.data[20 * 512 + 32] == 4 and dev.data[20 * 512] == 3
+
+
+def test_erase_drops_held_block(dev):
+    wb = WriteBehind(dev, 4)
+    wb.writeblocks(3, blk(1))
+    wb.ioctl(6, 3)
+    wb.ioctl(3, 0)
+    assert dev.writes() == []
+
+
+def test_sd_commands_for_appends(clock):
+    """ 64KB in 4KB appends on the fakesd card, every block verified by run() """
+
+    counts = {label: sum(run(wrap, kb=64)[0].values()) for label, wrap in STACKS}
+    assert counts["WriteBehind 32"] * 3 < counts["SDCard"]
+    assert counts["SectorCache+WriteBehind"] == counts["WriteBehind 32"]
@@ -0,0 +1,99 @@
+"""
+The MIT License (MIT)
+
+Copyright (c) 2022 bachipeachy@gmail.com
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+""" virtual MicroPython clock -- patches time.ticks_*, time.sleep_* and time.time_ns so timing code runs
+deterministically on the host. It counts microseconds, tests move it with advance() or through the sleeps, and hooks
+run after every sleep_ms so a fake device can produce samples as time passes. REAL[0] = True switches back to the
+host clock """
+import time
+
+_host = time.monotonic
+_host_ns = time.time_ns
+_epoch = _host_ns() // 1000000 * 1000000
+
+_clk = [0]  # us
+REAL = [False]
+hooks = []
+
+_MASK = 0x3FFFFFFF
+
+
+def ticks_ms():
+    if REAL[0]:
+        return int(_host() * 1000) & _MASK
+    return (_clk[0] // 1000) & _MASK
+
+
+def ticks_us():
+    if REAL[0]:
+        return int(_host() * 1000000) & _MASK
+    return _clk[0] & _MASK
+
+
+def time_ns():
+    """ wall clock moving with the virtual ticks from the import time """
+
+    if REAL[0]:
+        return _host_ns()
+    return _epoch + _clk[0] * 1000
+
+
+def ticks_add(a, b):
+    return (a + b) & _MASK
+
+
+def ticks_diff(a, b):
+    d = (a - b) & _MASK
+    return d - 0x40000000 if d >= 0x20000000 else d
+
+
+def sleep_ms(ms):
+    if REAL[0]:
+        time.sleep(ms / 1000)
+        return
+    _clk[0] += max(int(ms * 1000), 0)
+    for h in hooks:
+        h()
+
+
+def sleep_us(us):
+    if REAL[0]:
+        time.sleep(us / 1000000)
+        return
+    _clk[0] += max(int(us), 0)
+
+
+def advance(ms=0, us=0):
+    """ move the virtual clock without running hooks """
+
+    _clk[0] += ms * 1000 + us
+
+
+def reset():
+    _clk[0] = 0
+    REAL[0] = False
+    del hooks[:]
+
+
+for _n in ('ticks_ms', 'ticks_us', 'ticks_add', 'ticks_diff', 'sleep_ms', 'sleep_us', 'time_ns'):
+    setattr(time, _n, globals()[_n])
@@ -42,8 +42,8 @@ class Wifi(Bos):
         else:
             self.edit('btn_5', bg=self.RED)
 
-    def tsk_15(self, uid, uidt):
-        """ toggle wifi connection if available """
+    async def tsk_15(self, uid, uidt):
+        """ toggle wifi connection if available, runs as a coroutine while connecting """
 
         print("t15> {}:{}".format(uid, uidt))
 
@@ -54,7 +54,7 @@ class Wifi(Bos):
             self.edit('btn_5', bg=self.RED)
         else:
             self.write(["connecting to '" + self.m5parms['essid'] + "' with 15 sec timeout"], yl=[96])
-            ip = self.connect_wifi()
+            ip = await self.aconnect_wifi()
             self.edit('btn_w')
             self.write(["got ip address -> " + ip], yl=[96])
             if ip != '0.0.0.0':